@@ -0,0 +1,288 @@
+"""
+전체 사용자 행동 임베딩을 청크 단위로 일괄 갱신하는 배치.
+
+    PYTHONPATH=. python -m app.behavior.bulk_embedding --workers 4 --chunk-size 500 --resume
+    PYTHONPATH=. python -m app.behavior.bulk_embedding --dirty-only
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.database.pool import get_connection
+from app.behavior.user_behavior import behavior_text_from_rows, find_stale_users
+from app.database.pinecone_client import upsert_user_behavior_vectors
+from app.redis.embedding_freshness import (
+    set_freshness,
+    mark_users_dirty,
+    pop_dirty_users,
+    count_dirty_users,
+    get_last_dirty_scan,
+    set_last_dirty_scan,
+)
+
+LAST_ACTIVITY_BULK_QUERY = """
+    SELECT user_id, MAX(latest) FROM (
+        SELECT users_id AS user_id, MAX(watched_at) AS latest FROM watched_history
+            WHERE users_id = ANY(%(ids)s) GROUP BY users_id
+        UNION ALL
+        SELECT users_id, MAX(liked_at) FROM liked_history
+            WHERE users_id = ANY(%(ids)s) GROUP BY users_id
+        UNION ALL
+        SELECT p.user_id, MAX(p.updated_at) FROM playlist_contents_list pcl
+            JOIN playlist p ON pcl.playlist_id = p.id
+            WHERE p.user_id = ANY(%(ids)s) GROUP BY p.user_id
+    ) AS combined
+    GROUP BY user_id
+"""
+
+DIRTY_SCAN_QUERY = """
+    SELECT users_id FROM watched_history WHERE watched_at > %(since)s
+    UNION
+    SELECT users_id FROM liked_history WHERE liked_at > %(since)s
+    UNION
+    SELECT user_id FROM playlist WHERE updated_at > %(since)s
+"""
+
+# 스캔 직전에 커밋된 활동을 놓치지 않도록 이전 스캔 시각보다 조금 앞에서부터 다시 확인
+DIRTY_SCAN_OVERLAP = timedelta(minutes=5)
+
+BEHAVIOR_BULK_QUERY = """
+    WITH interactions AS (
+        SELECT users_id AS user_id, contents_id FROM watched_history WHERE users_id = ANY(%(ids)s)
+        UNION
+        SELECT users_id, contents_id FROM liked_history WHERE users_id = ANY(%(ids)s)
+        UNION
+        SELECT p.user_id, pcl.contents_list_id FROM playlist_contents_list pcl
+            JOIN playlist p ON pcl.playlist_id = p.id
+            WHERE p.user_id = ANY(%(ids)s)
+    )
+    SELECT
+        i.user_id, c.id, c.title, c.description, c.category, u.nickname,
+        c.creator_id, ARRAY_AGG(h.name) AS hashtags
+    FROM interactions i
+    JOIN contents c ON c.id = i.contents_id
+    LEFT JOIN creator cr ON c.creator_id = cr.id
+    LEFT JOIN users u ON cr.user_id = u.id
+    LEFT JOIN hashtags_contents_mapping hcm ON hcm.contents_id = c.id
+    LEFT JOIN hashtags h ON hcm.hashtags_id = h.id
+    GROUP BY i.user_id, c.id, u.nickname, c.title, c.description, c.category, c.creator_id
+"""
+
+
+def fetch_last_activity_times(user_ids: list[int]) -> dict:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(LAST_ACTIVITY_BULK_QUERY, {"ids": user_ids})
+        rows = cursor.fetchall()
+        cursor.close()
+    return {row[0]: row[1] for row in rows if row[1]}
+
+
+def fetch_behavior_rows(user_ids: list[int]) -> dict:
+    """
+    {user_id: [(id, title, description, category, nickname, creator_id, hashtags), ...]}
+    """
+    if not user_ids:
+        return {}
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(BEHAVIOR_BULK_QUERY, {"ids": user_ids})
+        rows = cursor.fetchall()
+        cursor.close()
+
+    rows_by_user = defaultdict(list)
+    for row in rows:
+        rows_by_user[row[0]].append(row[1:])
+    return rows_by_user
+
+
+def store_user_embeddings_chunk(user_ids: list[int]) -> dict:
+    """
+    청크 하나를 처리: 활동 시각/기존 메타데이터/행동 행을 한 번에 조회하고 배치 인코딩 후 배치 업서트
+    """
+    from app.recommender.embedding import get_embeddings
+
+    last_activity = fetch_last_activity_times(user_ids)
+    active_ids = [user_id for user_id in user_ids if user_id in last_activity]
+
+    stale_ids = find_stale_users({user_id: last_activity[user_id] for user_id in active_ids})
+
+    rows_by_user = fetch_behavior_rows(stale_ids)
+    texts = [behavior_text_from_rows(rows_by_user.get(user_id, [])) for user_id in stale_ids]
+    embeddings = get_embeddings(texts)
+
+    updated_at = datetime.utcnow().isoformat()
+    vectors = []
+    for user_id, text, embedding in zip(stale_ids, texts, embeddings):
+        rows = rows_by_user.get(user_id, [])
+        vectors.append((str(user_id), embedding, {
+            "source": "user_behavior",
+            "length": len(text),
+            "preferred_content_ids": list({str(row[0]) for row in rows if row[0]}),
+            "preferred_creator_ids": list({str(row[5]) for row in rows if row[5]}),
+            "last_updated_at": updated_at
+        }))
+    upsert_user_behavior_vectors(vectors, settings.PINECONE_UPSERT_BATCH_SIZE)
+    set_freshness({user_id: last_activity[user_id] for user_id in stale_ids})
+
+    return {
+        "processed": len(user_ids),
+        "no_activity": len(user_ids) - len(active_ids),
+        "up_to_date": len(active_ids) - len(stale_ids),
+        "stored": len(vectors),
+    }
+
+
+def iter_user_id_chunks(after_id: int, chunk_size: int):
+    # id 기준 keyset 페이지네이션으로 사용자 목록을 스트리밍
+    last_id = after_id
+    while True:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM users WHERE id > %s ORDER BY id LIMIT %s", (last_id, chunk_size))
+            user_ids = [row[0] for row in cursor.fetchall()]
+            cursor.close()
+        if not user_ids:
+            return
+        yield user_ids
+        last_id = user_ids[-1]
+
+
+def count_users(after_id: int) -> int:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM users WHERE id > %s", (after_id,))
+        total = cursor.fetchone()[0]
+        cursor.close()
+    return total
+
+
+def scan_dirty_users() -> int:
+    """
+    마지막 스캔 이후 활동이 있었던 사용자를 한 번의 쿼리로 찾아 dirty 로 표시
+    """
+    since = get_last_dirty_scan()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT NOW()")
+        scanned_at = cursor.fetchone()[0]
+        cursor.execute(DIRTY_SCAN_QUERY, {"since": since - DIRTY_SCAN_OVERLAP if since else datetime.min})
+        user_ids = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+
+    mark_users_dirty(user_ids)
+    set_last_dirty_scan(scanned_at)
+    return len(user_ids)
+
+
+def store_dirty_user_embeddings(chunk_size: int = None):
+    """
+    dirty 사용자만 갱신 (활동이 바뀐 사용자만 건드림)
+    """
+    chunk_size = chunk_size or settings.EMBEDDING_BULK_CHUNK_SIZE
+    scanned = scan_dirty_users()
+    print(f"🔎 {scanned} users with new activity, {count_dirty_users()} dirty in total")
+
+    totals = defaultdict(int)
+    started = time.time()
+    while True:
+        user_ids = pop_dirty_users(chunk_size)
+        if not user_ids:
+            break
+        try:
+            stats = store_user_embeddings_chunk(sorted(user_ids))
+        except Exception:
+            # 실패한 청크는 다음 실행에서 다시 처리
+            mark_users_dirty(user_ids)
+            raise
+        for k, v in stats.items():
+            totals[k] += v
+        print(f"[{totals['processed']}] stored={totals['stored']} up_to_date={totals['up_to_date']}")
+
+    elapsed = time.time() - started
+    print(f"✅ Done: {totals['processed']} dirty users in {elapsed:.1f}s")
+    return dict(totals)
+
+
+def load_checkpoint(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return json.load(f).get("last_user_id", 0)
+
+
+def save_checkpoint(path: str, last_user_id: int):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"last_user_id": last_user_id, "saved_at": datetime.utcnow().isoformat()}, f)
+    os.replace(tmp_path, path)
+
+
+def store_all_user_embeddings_bulk(workers: int = None, chunk_size: int = None, resume: bool = False, checkpoint_path: str = None):
+    workers = workers or settings.EMBEDDING_BULK_WORKERS
+    chunk_size = chunk_size or settings.EMBEDDING_BULK_CHUNK_SIZE
+    checkpoint_path = checkpoint_path or settings.EMBEDDING_BULK_CHECKPOINT
+
+    start_after = load_checkpoint(checkpoint_path) if resume else 0
+    total = count_users(start_after)
+    print(f"🚀 Bulk embedding refresh: {total} users after id {start_after}, {workers} workers, chunk {chunk_size}")
+
+    totals = defaultdict(int)
+    started = time.time()
+
+    def report(stats: dict, last_user_id: int):
+        for k, v in stats.items():
+            totals[k] += v
+        save_checkpoint(checkpoint_path, last_user_id)
+        elapsed = time.time() - started
+        rate = totals["processed"] / elapsed if elapsed > 0 else 0.0
+        print(
+            f"[{totals['processed']}/{total}] stored={totals['stored']} up_to_date={totals['up_to_date']} "
+            f"no_activity={totals['no_activity']} ({rate:.1f} users/sec, checkpoint={last_user_id})"
+        )
+
+    if workers <= 1:
+        for user_ids in iter_user_id_chunks(start_after, chunk_size):
+            report(store_user_embeddings_chunk(user_ids), user_ids[-1])
+    else:
+        # 워커마다 모델/커넥션을 새로 만들도록 spawn 사용 (fork 시 커넥션 공유 방지)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            pending = []
+            for user_ids in iter_user_id_chunks(start_after, chunk_size):
+                pending.append((user_ids[-1], pool.submit(store_user_embeddings_chunk, user_ids)))
+
+                # 제출량을 제한하고, 앞선 청크가 모두 끝난 지점까지만 체크포인트를 전진
+                while len(pending) >= workers * 2 or (pending and pending[0][1].done()):
+                    last_user_id, future = pending.pop(0)
+                    report(future.result(), last_user_id)
+
+            for last_user_id, future in pending:
+                report(future.result(), last_user_id)
+
+    elapsed = time.time() - started
+    print(f"✅ Done: {totals['processed']} users in {elapsed:.1f}s ({totals['processed'] / max(elapsed, 1e-9):.1f} users/sec)")
+    return dict(totals)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk refresh of user behavior embeddings")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--resume", action="store_true", help="continue after the last checkpointed user id")
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--dirty-only", action="store_true", help="only refresh users whose activity changed")
+    args = parser.parse_args()
+
+    try:
+        if args.dirty_only:
+            store_dirty_user_embeddings(args.chunk_size)
+        else:
+            store_all_user_embeddings_bulk(args.workers, args.chunk_size, args.resume, args.checkpoint)
+    except Exception as e:
+        print(f"❌ Error: {e}")
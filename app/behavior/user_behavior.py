@@ -1,114 +1,119 @@
 from datetime import datetime
-import psycopg2
-from app.core.config import settings
+from app.database.pool import get_connection, execute_prepared
 from app.recommender.embedding import get_embedding
 from app.database.pinecone_client import (
     upsert_user_behavior_vector,
-    fetch_existing_user_metadata,
+    fetch_existing_users_metadata,
 )
+from app.redis.embedding_freshness import get_freshness, set_freshness
+from app.monitoring.tracing import traced
 
+@traced("behavior_query")
 def fetch_user_behavior_text(user_id: int) -> str:
-    conn = psycopg2.connect(
-        dbname=settings.DB_NAME,
-        user=settings.DB_USER,
-        password=settings.DB_PASSWORD,
-        host=settings.DB_HOST,
-        port=settings.DB_PORT
-    )
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT DISTINCT
-            c.id, c.title, c.description, c.category, u.nickname,
-            c.creator_id, ARRAY_AGG(h.name) AS hashtags
-        FROM contents c
-        LEFT JOIN watched_history v ON v.contents_id = c.id AND v.users_id = %s
-        LEFT JOIN liked_history l ON l.contents_id = c.id AND l.users_id = %s
-        LEFT JOIN playlist_contents_list pcl ON pcl.contents_list_id = c.id
-        LEFT JOIN playlist p ON pcl.playlist_id = p.id AND p.user_id = %s
-        LEFT JOIN creator cr ON c.creator_id = cr.id
-        LEFT JOIN users u ON cr.user_id = u.id
-        LEFT JOIN hashtags_contents_mapping hcm ON hcm.contents_id = c.id
-        LEFT JOIN hashtags h ON hcm.hashtags_id = h.id
-        WHERE v.users_id IS NOT NULL OR l.users_id IS NOT NULL OR p.user_id IS NOT NULL
-        GROUP BY c.id, u.nickname, c.title, c.description, c.category, c.creator_id
-    """, (user_id, user_id, user_id))
-
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        execute_prepared(cursor, "select_user_behavior", """
+            SELECT DISTINCT
+                c.id, c.title, c.description, c.category, u.nickname,
+                c.creator_id, ARRAY_AGG(h.name) AS hashtags
+            FROM contents c
+            LEFT JOIN watched_history v ON v.contents_id = c.id AND v.users_id = $1
+            LEFT JOIN liked_history l ON l.contents_id = c.id AND l.users_id = $1
+            LEFT JOIN playlist_contents_list pcl ON pcl.contents_list_id = c.id
+            LEFT JOIN playlist p ON pcl.playlist_id = p.id AND p.user_id = $1
+            LEFT JOIN creator cr ON c.creator_id = cr.id
+            LEFT JOIN users u ON cr.user_id = u.id
+            LEFT JOIN hashtags_contents_mapping hcm ON hcm.contents_id = c.id
+            LEFT JOIN hashtags h ON hcm.hashtags_id = h.id
+            WHERE v.users_id IS NOT NULL OR l.users_id IS NOT NULL OR p.user_id IS NOT NULL
+            GROUP BY c.id, u.nickname, c.title, c.description, c.category, c.creator_id
+        """, (user_id,))
+        rows = cursor.fetchall()
+        cursor.close()
+
+    return behavior_text_from_rows(rows)
+
+def behavior_text_from_rows(rows) -> str:
+    """
+    (id, title, description, category, nickname, creator_id, hashtags) 행 목록을 임베딩용 텍스트로 변환
+    """
     if not rows:
         return ""
 
     text_blocks = []
     for row in rows:
         title, desc, category, creator, hashtags = row[1], row[2], row[3], row[4], row[6] or []
-        hashtags_str = ", ".join(hashtags)
+        hashtags_str = ", ".join(h for h in hashtags if h)
         block = f"Title: {title}, Desc: {desc}, Category: {category}, Tags: {hashtags_str}, Creator: {creator}"
         text_blocks.append(block)
 
     return "\n".join(text_blocks)
 
 def get_last_activity_time(user_id: int):
-    conn = psycopg2.connect(
-        dbname=settings.DB_NAME,
-        user=settings.DB_USER,
-        password=settings.DB_PASSWORD,
-        host=settings.DB_HOST,
-        port=settings.DB_PORT
-    )
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT MAX(latest) FROM (
-            SELECT MAX(watched_at) AS latest FROM watched_history WHERE users_id = %s
-            UNION ALL
-            SELECT MAX(liked_at) FROM liked_history WHERE users_id = %s
-            UNION ALL
-            SELECT MAX(p.updated_at) FROM playlist_contents_list pcl
-                JOIN playlist p ON pcl.playlist_id = p.id
-                WHERE p.user_id = %s
-        ) AS combined;
-    """, (user_id, user_id, user_id))
-    result = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        execute_prepared(cursor, "select_last_activity_time", """
+            SELECT MAX(latest) FROM (
+                SELECT MAX(watched_at) AS latest FROM watched_history WHERE users_id = $1
+                UNION ALL
+                SELECT MAX(liked_at) FROM liked_history WHERE users_id = $1
+                UNION ALL
+                SELECT MAX(p.updated_at) FROM playlist_contents_list pcl
+                    JOIN playlist p ON pcl.playlist_id = p.id
+                    WHERE p.user_id = $1
+            ) AS combined
+        """, (user_id,))
+        result = cursor.fetchone()
+        cursor.close()
     return result[0] if result and result[0] else None
 
+def is_up_to_date(last_activity_time, last_updated) -> bool:
+    return bool(last_updated) and last_activity_time <= datetime.fromisoformat(last_updated)
+
+def find_stale_users(last_activity: dict) -> list:
+    """
+    {user_id: 마지막 활동 시각} 중 임베딩 갱신이 필요한 사용자 목록.
+    freshness 저장소를 한 번에 조회하고, 기록이 없는 사용자만 벡터 메타데이터로 판단 후 기록을 채운다
+    """
+    recorded = get_freshness(list(last_activity))
+    unknown = [user_id for user_id in last_activity if user_id not in recorded]
+    if unknown:
+        existing = fetch_existing_users_metadata([str(user_id) for user_id in unknown])
+        backfill = {
+            user_id: last_activity[user_id] for user_id in unknown
+            if is_up_to_date(last_activity[user_id], existing.get(str(user_id), {}).get("last_updated_at"))
+        }
+        set_freshness(backfill)
+        recorded.update(backfill)
+
+    return [
+        user_id for user_id, activity_time in last_activity.items()
+        if user_id not in recorded or activity_time > recorded[user_id]
+    ]
+
 def store_user_behavior_embedding(user_id: int):
     last_activity_time = get_last_activity_time(user_id)
     if not last_activity_time:
         print(f"[user-{user_id}] No behavior data found.")
         return
 
-    existing = fetch_existing_user_metadata(str(user_id))
-    last_updated = existing.get("last_updated_at")
-    if last_updated and last_activity_time <= datetime.fromisoformat(last_updated):
+    if not find_stale_users({user_id: last_activity_time}):
         print(f"[user-{user_id}] No new activity since last update.")
         return
 
-    conn = psycopg2.connect(
-        dbname=settings.DB_NAME,
-        user=settings.DB_USER,
-        password=settings.DB_PASSWORD,
-        host=settings.DB_HOST,
-        port=settings.DB_PORT
-    )
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT DISTINCT c.id, c.creator_id
-        FROM contents c
-        LEFT JOIN watched_history v ON v.contents_id = c.id AND v.users_id = %s
-        LEFT JOIN liked_history l ON l.contents_id = c.id AND l.users_id = %s
-        LEFT JOIN playlist_contents_list pcl ON pcl.contents_list_id = c.id
-        LEFT JOIN playlist p ON pcl.playlist_id = p.id AND p.user_id = %s
-        WHERE v.users_id IS NOT NULL OR l.users_id IS NOT NULL OR p.user_id IS NOT NULL
-    """, (user_id, user_id, user_id))
-
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT DISTINCT c.id, c.creator_id
+            FROM contents c
+            LEFT JOIN watched_history v ON v.contents_id = c.id AND v.users_id = %s
+            LEFT JOIN liked_history l ON l.contents_id = c.id AND l.users_id = %s
+            LEFT JOIN playlist_contents_list pcl ON pcl.contents_list_id = c.id
+            LEFT JOIN playlist p ON pcl.playlist_id = p.id AND p.user_id = %s
+            WHERE v.users_id IS NOT NULL OR l.users_id IS NOT NULL OR p.user_id IS NOT NULL
+        """, (user_id, user_id, user_id))
+        rows = cursor.fetchall()
+        cursor.close()
 
     content_ids = {str(row[0]) for row in rows if row[0]}
     creator_ids = {str(row[1]) for row in rows if row[1]}
@@ -125,21 +130,15 @@ def store_user_behavior_embedding(user_id: int):
     }
 
     upsert_user_behavior_vector(str(user_id), embedding, metadata)
+    set_freshness({user_id: last_activity_time})
     print(f"[user-{user_id}] Behavior embedding stored in Pinecone.")
 
 def store_all_user_embeddings():
-    conn = psycopg2.connect(
-        dbname=settings.DB_NAME,
-        user=settings.DB_USER,
-        password=settings.DB_PASSWORD,
-        host=settings.DB_HOST,
-        port=settings.DB_PORT
-    )
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM users")
-    user_ids = [row[0] for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM users")
+        user_ids = [row[0] for row in cursor.fetchall()]
+        cursor.close()
 
     for user_id in user_ids:
         store_user_behavior_embedding(user_id)
@@ -7,14 +7,23 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     DB_HOST: str
     DB_PORT: int
+    DB_POOL_MIN: int = 1
+    DB_POOL_MAX: int = 10
+    DB_POOL_TIMEOUT: float = 5.0
 
     # JWT
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
 
-    # Pinecone
-    PINECONE_API_KEY: str
-    PINECONE_INDEX: str
+    # Vector store ("pinecone" 또는 "local")
+    VECTOR_BACKEND: str = "pinecone"
+    VECTOR_DIMENSION: int = 384
+    LOCAL_VECTOR_INDEX_PATH: str = "data/vector_index"
+
+    # Pinecone (VECTOR_BACKEND=pinecone 일 때 필요)
+    PINECONE_API_KEY: str = ""
+    PINECONE_INDEX: str = ""
+    PINECONE_UPSERT_BATCH_SIZE: int = 100
 
     # AWS
     AWS_ACCESS_KEY_ID: str
@@ -25,10 +34,117 @@ class Settings(BaseSettings):
     REDIS_HOST: str = "redis"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT: float = 2.0
+
+    # Daily usage limit (needs 별)
+    USAGE_MAX_PER_DAY: int = 20
 
     # DeepL
     DEEPL_API_KEY: str
 
+    # Embedding ("torch", "onnx" 또는 모델 없는 "hash")
+    EMBEDDING_BACKEND: str = "torch"
+    EMBEDDING_MODEL_PATH: str = "models/all-MiniLM-L6-v2"
+    EMBEDDING_ONNX_PATH: str = "models/all-MiniLM-L6-v2/onnx/model_int8.onnx"
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_THREADS: int = 0
+
+    # Bulk embedding refresh
+    EMBEDDING_BULK_WORKERS: int = 1
+    EMBEDDING_BULK_CHUNK_SIZE: int = 500
+    EMBEDDING_BULK_CHECKPOINT: str = ".embedding_bulk_checkpoint.json"
+
+    # User vector reuse ("stored": Pinecone 에 저장된 벡터 우선, "encode": 매 요청 인코딩)
+    USER_VECTOR_MODE: str = "stored"
+    USER_VECTOR_CACHE_TTL_SECONDS: int = 300
+    USER_NEIGHBORHOOD_CACHE_TTL_SECONDS: int = 3600
+    USER_NEIGHBORHOOD_CACHE_MAXSIZE: int = 10000
+
+    # Item embedding index (후보 선정)
+    ITEM_INDEX_ENABLED: bool = True
+    LLM_CANDIDATES: int = 10
+    ITEM_PREFERENCE_WEIGHT: float = 0.1
+
+    # Blocking client executor
+    BLOCKING_EXECUTOR_WORKERS: int = 32
+
+    # Bedrock client / concurrency governor
+    BEDROCK_REGION: str = "us-east-1"
+    BEDROCK_ENDPOINT_URL: str = ""
+    BEDROCK_MAX_ATTEMPTS: int = 3
+    BEDROCK_MAX_IN_FLIGHT: int = 16
+    BEDROCK_MIN_IN_FLIGHT: int = 1
+    BEDROCK_MAX_QUEUED: int = 64
+    BEDROCK_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    BEDROCK_BREAKER_FAILURE_THRESHOLD: int = 5
+    BEDROCK_BREAKER_RESET_SECONDS: float = 30.0
+
+    # Hedged requests (지연 꼬리 완화, 호출 지점별 opt-in)
+    HEDGE_WORKERS: int = 32
+    HEDGE_QUANTILE: float = 0.9
+    HEDGE_MAX_RATE: float = 0.1
+    HEDGE_WINDOW: int = 200
+    HEDGE_BEDROCK_ENABLED: bool = False
+    HEDGE_BEDROCK_DEFAULT_DELAY_SECONDS: float = 3.0
+    HEDGE_WEBSEARCH_ENABLED: bool = False
+    HEDGE_WEBSEARCH_DEFAULT_DELAY_SECONDS: float = 1.5
+
+    # LLM reason cache
+    LLM_REASON_CACHE_ENABLED: bool = True
+    LLM_REASON_CACHE_TTL_SECONDS: int = 21600
+    LLM_REASON_CACHE_MAXSIZE: int = 2048
+    LLM_REASON_VARIANTS: int = 3
+
+    # Pre-generated creator reasons
+    CREATOR_REASON_STORE_ENABLED: bool = True
+    CREATOR_REASON_TTL_SECONDS: int = 604800
+    CREATOR_REASON_BATCH_WORKERS: int = 4
+
+    # Duplicate recommend request coalescing (in-process, 선택적으로 Redis 로 인스턴스 간)
+    RECOMMEND_COALESCE_ENABLED: bool = True
+    RECOMMEND_COALESCE_REDIS: bool = False
+    RECOMMEND_COALESCE_LOCK_TTL_SECONDS: float = 30.0
+    RECOMMEND_COALESCE_RESULT_TTL_SECONDS: int = 5
+    RECOMMEND_COALESCE_LOCAL_RESULTS_MAX: int = 1024
+    RECOMMEND_COALESCE_POLL_INTERVAL_SECONDS: float = 0.1
+    RECOMMEND_COALESCE_COORD_DECIMALS: int = 3
+
+    # Deferred reason generation (추천 먼저 응답 후 reason 은 백그라운드 생성)
+    REASON_WORKERS: int = 4
+    REASON_QUEUE_SIZE: int = 100
+    REASON_JOB_TTL_SECONDS: int = 3600
+    REASON_POLL_MAX_WAIT_SECONDS: float = 25.0
+    REASON_POLL_INTERVAL_SECONDS: float = 0.25
+    REASON_SHUTDOWN_TIMEOUT_SECONDS: float = 10.0
+
+    # Recommendation history (keyset 페이지네이션 + 사용자별 캐시)
+    HISTORY_PAGE_SIZE: int = 20
+    HISTORY_MAX_PAGE_SIZE: int = 100
+    HISTORY_CACHE_ENABLED: bool = True
+    HISTORY_CACHE_TTL_SECONDS: int = 300
+    HISTORY_VERSION_TTL_SECONDS: int = 86400
+
+    # Recommendation history write-behind (메모리 버퍼 → 배치 INSERT)
+    HISTORY_WRITE_BEHIND_ENABLED: bool = True
+    HISTORY_FLUSH_BATCH_SIZE: int = 100
+    HISTORY_FLUSH_INTERVAL_SECONDS: float = 1.0
+    HISTORY_BUFFER_MAX: int = 5000
+    HISTORY_FLUSH_MAX_RETRIES: int = 3
+    HISTORY_REASON_WAIT_SECONDS: float = 10.0
+    HISTORY_SHUTDOWN_TIMEOUT_SECONDS: float = 10.0
+
+    # Web search
+    WEB_SPECULATIVE_FANOUT: int = 0
+    WEB_CACHE_TTL_SECONDS: int = 86400
+    WEB_CACHE_LOCAL_MAXSIZE: int = 1024
+    WEB_CACHE_REDIS_ENABLED: bool = True
+
+    # Catalog snapshot
+    CATALOG_REFRESH_SECONDS: int = 60
+    CATALOG_FULL_REFRESH_SECONDS: int = 3600
+    CATALOG_INCREMENTAL: bool = True
+
     class Config:
         env_file = ".env"
         case_sensitive = True
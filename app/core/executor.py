@@ -0,0 +1,57 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+
+# DB / Redis / Pinecone / Bedrock / DuckDuckGo 등 블로킹 클라이언트 전용 스레드 풀
+# (FastAPI 기본 threadpool 과 분리해 다른 엔드포인트가 굶지 않도록 함)
+executor = ThreadPoolExecutor(
+    max_workers=settings.BLOCKING_EXECUTOR_WORKERS,
+    thread_name_prefix="blocking"
+)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    블로킹 함수를 전용 executor 에서 실행하고 결과를 await (contextvars 유지)
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(executor, functools.partial(ctx.run, func, *args, **kwargs))
+
+
+async def iterate_blocking(func, *args, **kwargs):
+    """
+    블로킹 이터레이터(func(*args, **kwargs) 의 반환값)를 전용 executor 에서 소비하며 항목을 하나씩 async 로 전달.
+    소비 측이 중간에 멈추면 다음 항목에서 생산을 중단한다.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    queue = asyncio.Queue()
+    finished = object()
+    stopped = threading.Event()
+
+    def produce():
+        try:
+            for item in func(*args, **kwargs):
+                if stopped.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (finished, e))
+            return
+        loop.call_soon_threadsafe(queue.put_nowait, (finished, None))
+
+    loop.run_in_executor(executor, functools.partial(ctx.run, produce))
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is finished:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
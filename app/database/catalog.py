@@ -0,0 +1,332 @@
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
+import psycopg2
+from app.core.config import settings
+from app.database.pool import get_connection
+from app.utils.spatial import LocationIndex
+from app.recommender.item_index import attach_item_indexes
+from app.database.postgres import (
+    CONTENTS_QUERY,
+    LOCATIONS_QUERY,
+    CREATORS_QUERY,
+    content_from_row,
+    location_from_row,
+    creator_from_row,
+    load_documents_from_postgres,
+)
+from app.monitoring.metrics import (
+    catalog_refresh_duration_seconds,
+    catalog_refresh_failures_total,
+    catalog_staleness_seconds,
+    catalog_items,
+)
+from app.monitoring.tracing import traced
+
+WATERMARK_QUERY = """
+    SELECT
+        (SELECT MAX(updated_at) FROM contents),
+        (SELECT MAX(updated_at) FROM location),
+        (SELECT GREATEST(MAX(c.updated_at), MAX(u.updated_at))
+            FROM creator c JOIN users u ON c.user_id = u.id)
+"""
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    한 시점의 콘텐츠/장소/크리에이터 목록 (생성 후 변경하지 않음)
+    """
+    contents: list
+    locations: list
+    creators: list
+    watermarks: dict
+    refreshed_at: float
+    full_loaded_at: float
+    contents_by_id: dict = field(repr=False)
+    locations_by_key: dict = field(repr=False)
+    creators_by_id: dict = field(repr=False)
+    location_index: LocationIndex = field(repr=False)
+    contents_by_category: dict = field(repr=False)
+    creators_by_category_country: dict = field(repr=False)
+    content_index: object = field(default=None, repr=False)
+    creator_index: object = field(default=None, repr=False)
+
+
+def normalize_key(value) -> str:
+    return (value or "").strip().upper()
+
+
+def index_contents_by_category(contents: list) -> dict:
+    """
+    정규화된 category → 콘텐츠 목록 (카탈로그 순서 유지)
+    """
+    index = defaultdict(list)
+    for content in contents:
+        index[normalize_key(content["category"])].append(content)
+    return dict(index)
+
+
+def index_creators_by_category_country(creators: list) -> dict:
+    """
+    (정규화된 category, 정규화된 country) → 크리에이터 목록 (카탈로그 순서 유지)
+    """
+    index = defaultdict(list)
+    for creator in creators:
+        country = normalize_key(creator.get("country"))
+        for category in dict.fromkeys(normalize_key(cat) for cat in (creator.get("category") or [])):
+            index[(category, country)].append(creator)
+    return dict(index)
+
+
+def build_snapshot(contents_by_id, locations_by_key, creators_by_id, watermarks, full_loaded_at) -> CatalogSnapshot:
+    contents = list(contents_by_id.values())
+    locations = list(locations_by_key.values())
+    creators = list(creators_by_id.values())
+    return CatalogSnapshot(
+        contents=contents,
+        locations=locations,
+        creators=creators,
+        watermarks=watermarks,
+        refreshed_at=time.time(),
+        full_loaded_at=full_loaded_at,
+        contents_by_id=contents_by_id,
+        locations_by_key=locations_by_key,
+        creators_by_id=creators_by_id,
+        location_index=LocationIndex(locations),
+        contents_by_category=index_contents_by_category(contents),
+        creators_by_category_country=index_creators_by_category_country(creators),
+    )
+
+
+class Catalog:
+    """
+    프로세스 단위로 공유되는 카탈로그 스냅샷.
+
+    최초 1회 전체 로드 후, updated_at 워터마크 기준으로 변경분만 다시 읽어
+    새 스냅샷을 만든 뒤 참조를 교체한다. 요청은 항상 완성된 스냅샷만 본다.
+    삭제는 워터마크로 감지할 수 없으므로 CATALOG_FULL_REFRESH_SECONDS 주기로 전체 로드한다.
+    아이템 임베딩 인덱스가 아직 없으면 백그라운드에서 만들어 붙이고, 그 전까지 요청은 선호 순서 정렬을 사용한다.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._load_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._incremental = settings.CATALOG_INCREMENTAL
+
+    def get(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._load_lock:
+                if self._snapshot is None:
+                    self.refresh(full=True)
+                return self._snapshot
+
+        if time.time() - snapshot.refreshed_at >= settings.CATALOG_REFRESH_SECONDS:
+            self._refresh_in_background()
+        return snapshot
+
+    def staleness(self) -> float:
+        snapshot = self._snapshot
+        return time.time() - snapshot.refreshed_at if snapshot else 0.0
+
+    def refresh(self, full: bool = False) -> CatalogSnapshot:
+        current = self._snapshot
+        if current is None or not self._incremental:
+            full = True
+        elif time.time() - current.full_loaded_at >= settings.CATALOG_FULL_REFRESH_SECONDS:
+            full = True
+
+        mode = "full" if full else "incremental"
+        started = time.perf_counter()
+        try:
+            snapshot = self._load_full() if full else self._load_incremental(current)
+            if settings.ITEM_INDEX_ENABLED and snapshot.content_index is None and current and current.content_index:
+                # 바뀐 아이템만 다시 인코딩하고, 완성된 뒤에 스냅샷과 함께 교체
+                snapshot = attach_item_indexes(snapshot, current)
+        except Exception:
+            catalog_refresh_failures_total.labels(mode=mode).inc()
+            raise
+        catalog_refresh_duration_seconds.labels(mode=mode).observe(time.perf_counter() - started)
+
+        # 참조 교체는 원자적이므로 진행 중인 요청은 이전 스냅샷을 그대로 사용
+        with self._swap_lock:
+            live = self._snapshot
+            if settings.ITEM_INDEX_ENABLED and snapshot.content_index is None and live and live.content_index:
+                # 로드하는 동안 백그라운드 인덱스가 붙었으면 그 인덱스를 이어받는다 (바뀐 아이템만 인코딩)
+                snapshot = attach_item_indexes(snapshot, live)
+            self._snapshot = snapshot
+        catalog_items.labels(kind="contents").set(len(snapshot.contents))
+        catalog_items.labels(kind="locations").set(len(snapshot.locations))
+        catalog_items.labels(kind="creators").set(len(snapshot.creators))
+
+        if settings.ITEM_INDEX_ENABLED and snapshot.content_index is None:
+            # 처음 로드할 때는 전체 인코딩이 오래 걸리므로 첫 요청을 막지 않도록 따로 만든다
+            self._index_in_background()
+        return snapshot
+
+    def warm(self):
+        """
+        서버 시작 시 호출. 첫 요청 전에 스냅샷을 읽고 인덱스 생성을 시작해 둔다
+        """
+        def run():
+            try:
+                self.get()
+            except Exception as e:
+                print("카탈로그 사전 로드 실패:", e)
+
+        threading.Thread(target=run, name="catalog-warm", daemon=True).start()
+
+    def wait_for_index(self) -> CatalogSnapshot:
+        # 진행 중인 백그라운드 인덱스 생성이 끝날 때까지 대기 (벤치마크 등에서 사용)
+        with self._index_lock:
+            return self._snapshot
+
+    def _index_in_background(self):
+        if not self._index_lock.acquire(blocking=False):
+            return
+
+        def run():
+            finished = False
+            try:
+                previous = None
+                while True:
+                    snapshot = self._snapshot
+                    if snapshot.content_index is not None:
+                        break
+                    indexed = attach_item_indexes(snapshot, previous)
+                    with self._swap_lock:
+                        if self._snapshot is snapshot:
+                            self._snapshot = indexed
+                            break
+                    # 만드는 동안 새 스냅샷으로 교체됐으면 인코딩 결과를 재사용해 다시 만든다
+                    previous = indexed
+                finished = True
+            except Exception as e:
+                print("아이템 임베딩 인덱스 생성 실패:", e)
+            finally:
+                self._index_lock.release()
+            # lock 을 놓기 직전에 교체된 스냅샷은 refresh 쪽 acquire 가 실패했을 수 있으므로 다시 확인
+            if finished and self._snapshot.content_index is None:
+                self._index_in_background()
+
+        threading.Thread(target=run, name="item-index", daemon=True).start()
+
+    def _refresh_in_background(self):
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print("카탈로그 갱신 실패:", e)
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=run, name="catalog-refresh", daemon=True).start()
+
+    def _load_full(self) -> CatalogSnapshot:
+        # 워터마크를 먼저 읽어야 로드 도중 변경된 행을 다음 증분 갱신에서 다시 읽는다
+        watermarks = self._fetch_watermarks() if self._incremental else {}
+        contents, locations, creators = load_documents_from_postgres()
+        return build_snapshot(
+            {c["id"]: c for c in contents},
+            {(loc["id"], loc["contents_id"]): loc for loc in locations},
+            {c["id"]: c for c in creators},
+            watermarks,
+            full_loaded_at=time.time(),
+        )
+
+    def _fetch_watermarks(self) -> dict:
+        try:
+            with get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(WATERMARK_QUERY)
+                row = cursor.fetchone()
+                cursor.close()
+        except psycopg2.Error as e:
+            # updated_at 컬럼이 없는 스키마에서는 주기적 전체 로드만 사용
+            print("카탈로그 증분 갱신 비활성화:", e)
+            self._incremental = False
+            return {}
+        return {"contents": row[0], "location": row[1], "creator": row[2]}
+
+    def _load_incremental(self, current: CatalogSnapshot) -> CatalogSnapshot:
+        watermarks = current.watermarks
+        if not all(watermarks.get(k) for k in ("contents", "location", "creator")):
+            return self._load_full()
+
+        with get_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(WATERMARK_QUERY)
+            row = cursor.fetchone()
+            next_watermarks = {"contents": row[0], "location": row[1], "creator": row[2]}
+
+            # 같은 시각에 커밋된 행을 놓치지 않도록 >= 로 조회하고 id 기준으로 덮어쓴다
+            cursor.execute(CONTENTS_QUERY + " WHERE c.updated_at >= %s", (watermarks["contents"],))
+            # >= 조회는 워터마크 시각의 행을 매번 다시 읽으므로, 현재 스냅샷과 같은 행은 변경으로 보지 않는다
+            changed_contents = [
+                content for content in (content_from_row(row) for row in cursor.fetchall())
+                if current.contents_by_id.get(content["id"]) != content
+            ]
+            changed_content_ids = [c["id"] for c in changed_contents]
+
+            cursor.execute(
+                LOCATIONS_QUERY + " WHERE c.id = ANY(%s) OR l.updated_at >= %s",
+                (changed_content_ids, watermarks["location"])
+            )
+            changed_locations = [location_from_row(row) for row in cursor.fetchall()]
+
+            cursor.execute(
+                CREATORS_QUERY + " WHERE c.updated_at >= %s OR u.updated_at >= %s",
+                (watermarks["creator"], watermarks["creator"])
+            )
+            changed_creators = [
+                creator for creator in (creator_from_row(row) for row in cursor.fetchall())
+                if current.creators_by_id.get(creator["id"]) != creator
+            ]
+
+            cursor.close()
+
+        locations_changed = any(
+            current.locations_by_key.get((loc["id"], loc["contents_id"])) != loc for loc in changed_locations
+        )
+        if not (changed_contents or locations_changed or changed_creators):
+            return replace(current, watermarks=next_watermarks, refreshed_at=time.time())
+
+        contents_by_id = dict(current.contents_by_id)
+        contents_by_id.update((c["id"], c) for c in changed_contents)
+
+        # 변경된 콘텐츠의 장소 매핑은 통째로 교체
+        changed_ids = set(changed_content_ids)
+        locations_by_key = {
+            key: loc for key, loc in current.locations_by_key.items()
+            if loc["contents_id"] not in changed_ids
+        }
+        locations_by_key.update(((loc["id"], loc["contents_id"]), loc) for loc in changed_locations)
+
+        creators_by_id = dict(current.creators_by_id)
+        creators_by_id.update((c["id"], c) for c in changed_creators)
+
+        return build_snapshot(
+            contents_by_id,
+            locations_by_key,
+            creators_by_id,
+            next_watermarks,
+            full_loaded_at=current.full_loaded_at,
+        )
+
+
+catalog = Catalog()
+catalog_staleness_seconds.set_function(catalog.staleness)
+
+
+@traced("catalog")
+def get_catalog() -> CatalogSnapshot:
+    return catalog.get()
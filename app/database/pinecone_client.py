@@ -1,31 +1,45 @@
-from pinecone import Pinecone
-from app.core.config import settings
+from app.database.vector_store import create_vector_store
+from app.monitoring.tracing import traced
 
-# Pinecone 인스턴스 초기화
-pc = Pinecone(api_key=settings.PINECONE_API_KEY)
-index = pc.Index(settings.PINECONE_INDEX)
+# VECTOR_BACKEND 설정에 따라 Pinecone 또는 로컬 인덱스 사용
+store = create_vector_store()
 
 def upsert_user_behavior_vector(user_id: str, embedding: list[float], metadata: dict = None):
-    index.upsert(vectors=[
-        {
-            "id": f"user-{user_id}",
-            "values": embedding,
-            "metadata": metadata or {}
-        }
-    ])
+    store.upsert([(f"user-{user_id}", embedding, metadata or {})])
 
+def upsert_user_behavior_vectors(vectors: list[tuple], batch_size: int = 100):
+    """
+    (user_id, embedding, metadata) 목록을 batch_size 단위로 업서트
+    """
+    store.upsert(
+        [(f"user-{user_id}", embedding, metadata) for user_id, embedding, metadata in vectors],
+        batch_size
+    )
+
+@traced("vector_query")
 def query_similar_users(embedding: list[float], top_k: int = 5):
-    return index.query(vector=embedding, top_k=top_k, include_metadata=True)
+    return store.query(embedding, top_k)
 
 def fetch_existing_user_metadata(user_id: str) -> dict:
     """
-    Pinecone에서 특정 user_id의 벡터 메타데이터를 가져옴
+    벡터 저장소에서 특정 user_id의 벡터 메타데이터를 가져옴
     """
-    response = index.query(
-        id=f"user-{user_id}",
-        top_k=1,
-        include_metadata=True
-    )
-    if response and response.matches:
-        return response.matches[0].metadata or {}
-    return {}
+    stored = fetch_user_vector(user_id)
+    return stored[1] if stored else {}
+
+@traced("vector_fetch")
+def fetch_user_vector(user_id: str):
+    """
+    저장된 사용자 벡터와 메타데이터를 (values, metadata) 로 반환, 없으면 None
+    """
+    return store.fetch([f"user-{user_id}"]).get(f"user-{user_id}")
+
+def fetch_existing_users_metadata(user_ids: list[str], batch_size: int = 500) -> dict:
+    """
+    여러 user_id 의 메타데이터를 fetch 로 한 번에 조회 ({user_id: metadata})
+    """
+    fetched = store.fetch([f"user-{user_id}" for user_id in user_ids], batch_size)
+    return {vector_id.removeprefix("user-"): metadata for vector_id, (_, metadata) in fetched.items()}
+
+def describe_index_stats() -> dict:
+    return store.describe()
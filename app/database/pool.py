@@ -0,0 +1,119 @@
+import threading
+import time
+from contextlib import contextmanager
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+from app.core.config import settings
+from app.monitoring.metrics import (
+    db_pool_checkout_wait_seconds,
+    db_pool_checkout_timeouts_total,
+    db_pool_connections_in_use,
+    db_pool_max_connections,
+)
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """
+    세션 단위로 PREPARE 된 statement 이름을 기억하는 커넥션
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+class ConnectionPool:
+    """
+    크기가 제한된 스레드 안전 커넥션 풀.
+
+    ThreadedConnectionPool 은 가득 차면 바로 PoolError 를 던지므로,
+    세마포어로 대기 시간을 두고 빌려준다.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, timeout: float):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self._pool = None
+        self._init_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        db_pool_max_connections.set(maxconn)
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        # import 시점이 아니라 첫 사용 시점에 연결 (워커 fork 이후)
+        if self._pool is None:
+            with self._init_lock:
+                if self._pool is None:
+                    self._pool = ThreadedConnectionPool(
+                        self.minconn,
+                        self.maxconn,
+                        dbname=settings.DB_NAME,
+                        user=settings.DB_USER,
+                        password=settings.DB_PASSWORD,
+                        host=settings.DB_HOST,
+                        port=settings.DB_PORT,
+                        connection_factory=PooledConnection,
+                    )
+        return self._pool
+
+    @contextmanager
+    def connection(self):
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            db_pool_checkout_timeouts_total.inc()
+            raise PoolTimeout(f"No PostgreSQL connection available within {self.timeout}s")
+        db_pool_checkout_wait_seconds.observe(time.perf_counter() - started)
+        db_pool_connections_in_use.inc()
+
+        pool = None
+        conn = None
+        try:
+            pool = self._get_pool()
+            conn = pool.getconn()
+            yield conn
+            conn.commit()
+        except Exception:
+            if conn is not None and not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            if conn is not None:
+                pool.putconn(conn, close=bool(conn.closed))
+            db_pool_connections_in_use.dec()
+            self._slots.release()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+
+
+pool = ConnectionPool(settings.DB_POOL_MIN, settings.DB_POOL_MAX, settings.DB_POOL_TIMEOUT)
+
+
+def get_connection():
+    """
+    with get_connection() as conn: 형태로 사용. 정상 종료 시 commit, 예외 시 rollback
+    """
+    return pool.connection()
+
+
+def execute_prepared(cursor, name: str, sql: str, params: tuple = ()):
+    """
+    서버 사이드 prepared statement 로 실행 (sql 은 $1, $2 ... 플레이스홀더 사용)
+    """
+    conn = cursor.connection
+    if name not in conn.prepared:
+        cursor.execute(f"PREPARE {name} AS {sql}")
+        conn.prepared.add(name)
+
+    if params:
+        placeholders = ", ".join(["%s"] * len(params))
+        cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+    else:
+        cursor.execute(f"EXECUTE {name}")
@@ -1,155 +1,228 @@
 import json
-import psycopg2
-from app.core.config import settings
+from psycopg2.extras import execute_values
+from app.database.pool import get_connection, execute_prepared
+from app.monitoring.tracing import traced
+
+
+CONTENTS_QUERY = """
+    SELECT c.id, c.category, c.thumbnail, c.title, c.description,
+        ARRAY(
+            SELECT h.name FROM hashtags_contents_mapping hcm
+            JOIN hashtags h ON hcm.hashtags_id = h.id
+            WHERE hcm.contents_id = c.id
+        ) AS hashtags
+    FROM contents c
+"""
+
+LOCATIONS_QUERY = """
+    SELECT l.id, l.place_name, l.address, l.latitude, l.longitude, l.google_map_id, c.id as contents_id, c.category
+    FROM location l
+    JOIN contents_location cl ON l.id = cl.location_id
+    JOIN contents c ON cl.contents_id = c.id
+"""
+
+CREATORS_QUERY = """
+    SELECT c.id, u.nickname, c.category, u.country, c.youtube, c.introduction
+    FROM creator c
+    JOIN users u ON c.user_id = u.id
+"""
+
+
+def content_from_row(row) -> dict:
+    return {
+        "id": row[0],
+        "type": "content",
+        "category": row[1],
+        "thumbnail": row[2],
+        "title": row[3],
+        "desc": row[4] or "",
+        "hashtags": [h for h in (row[5] or []) if h]
+    }
+
+
+def location_from_row(row) -> dict:
+    return {
+        "id": row[0],
+        "type": "location",
+        "title": row[1],
+        "desc": row[2] or "",
+        "latitude": float(row[3]),
+        "longitude": float(row[4]),
+        "google_map_id": row[5],
+        "contents_id": row[6],
+        "category": row[7]
+    }
+
+
+def creator_from_row(row) -> dict:
+    return {
+        "id": row[0],
+        "name": row[1],
+        "category": row[2],
+        "country": row[3],
+        "youtube": row[4],
+        "introduction": row[5]
+    }
 
 
 def load_documents_from_postgres():
-    conn = psycopg2.connect(
-        dbname=settings.DB_NAME,
-        user=settings.DB_USER,
-        password=settings.DB_PASSWORD,
-        host=settings.DB_HOST,
-        port=settings.DB_PORT
-    )
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT id, category, thumbnail, title, description FROM contents")
-    contents = [
-        {
-            "id": row[0],
-            "type": "content",
-            "category": row[1],
-            "thumbnail": row[2],
-            "title": row[3],
-            "desc": row[4] or ""
-        }
-        for row in cursor.fetchall()
-    ]
-
-    cursor.execute("""
-        SELECT l.id, l.place_name, l.address, l.latitude, l.longitude, l.google_map_id, c.id as contents_id, c.category
-        FROM location l
-        JOIN contents_location cl ON l.id = cl.location_id
-        JOIN contents c ON cl.contents_id = c.id
-    """)
-    locations = [
-        {
-            "id": row[0],
-            "type": "location",
-            "title": row[1],
-            "desc": row[2] or "",
-            "latitude": float(row[3]),
-            "longitude": float(row[4]),
-            "google_map_id": row[5],
-            "contents_id": row[6],
-            "category": row[7]
-        }
-        for row in cursor.fetchall()
-    ]
-
-    cursor.execute("""
-        SELECT c.id, u.nickname, c.category, u.country, c.youtube, c.introduction
-        FROM creator c
-        JOIN users u ON c.user_id = u.id
-    """)
-    creators = [
-        {
-            "id": row[0],
-            "name": row[1],
-            "category": row[2],
-            "country": row[3],
-            "youtube": row[4],
-            "introduction": row[5]
-        }
-        for row in cursor.fetchall()
-    ]
-
-    cursor.close()
-    conn.close()
-    return contents, locations, creators
+    with get_connection() as conn:
+        cursor = conn.cursor()
 
+        cursor.execute(CONTENTS_QUERY)
+        contents = [content_from_row(row) for row in cursor.fetchall()]
 
-def save_recommendation_to_db(data: dict):
-    conn = psycopg2.connect(
-        dbname=settings.DB_NAME,
-        user=settings.DB_USER,
-        password=settings.DB_PASSWORD,
-        host=settings.DB_HOST,
-        port=settings.DB_PORT
-    )
-    cursor = conn.cursor()
+        cursor.execute(LOCATIONS_QUERY)
+        locations = [location_from_row(row) for row in cursor.fetchall()]
+
+        cursor.execute(CREATORS_QUERY)
+        creators = [creator_from_row(row) for row in cursor.fetchall()]
 
+        cursor.close()
+    return contents, locations, creators
+
+
+def history_row_values(data: dict) -> tuple:
     contents_id = data.get("contents_id")
     creator_id = data.get("creator_id")
-    if isinstance(contents_id, dict):
-        contents_id = None
-    if isinstance(creator_id, dict):
-        creator_id = None
-
-    cursor.execute(
-        """
-        INSERT INTO recommendation_history (user_id, needs, category, contents_id, creator_id, reason)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        """,
-        (
-            data["user_id"],
-            data["needs"],
-            data["category"],
-            contents_id,
-            creator_id,
-            json.dumps(data["reason"])
-        )
+    return (
+        data["user_id"],
+        data["needs"],
+        data["category"],
+        None if isinstance(contents_id, dict) else contents_id,
+        None if isinstance(creator_id, dict) else creator_id,
+        json.dumps(data["reason"])
     )
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+
+def save_recommendation_to_db(data: dict) -> int:
+    """
+    추천 이력 저장 후 생성된 id 반환
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        execute_prepared(
+            cursor,
+            "insert_recommendation_history",
+            """
+            INSERT INTO recommendation_history (user_id, needs, category, contents_id, creator_id, reason)
+            VALUES ($1, $2, $3, $4, $5, $6)
+            RETURNING id
+            """,
+            history_row_values(data)
+        )
+        history_id = cursor.fetchone()[0]
+        cursor.close()
+    return history_id
+
+
+def reserve_recommendation_ids(count: int) -> list:
+    """
+    recommendation_history 시퀀스에서 id 를 count 개 미리 받는다
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence('recommendation_history', 'id')) FROM generate_series(1, %s)",
+            (count,)
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+    return ids
+
+
+def save_recommendations_to_db(records: list, ids: list):
+    """
+    추천 이력 여러 건을 multi-row INSERT 한 번으로 저장.
+    id 는 reserve_recommendation_ids 로 먼저 받아 명시적으로 넣는다 (RETURNING 순서에 의존하지 않도록)
+    """
+    if not records:
+        return
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        execute_values(
+            cursor,
+            """
+            INSERT INTO recommendation_history (id, user_id, needs, category, contents_id, creator_id, reason)
+            VALUES %s
+            """,
+            [(history_id,) + history_row_values(data) for history_id, data in zip(ids, records)],
+            page_size=len(records)
+        )
+        cursor.close()
 
 
-def get_recommendations_by_user(user_id: int) -> list:
-    conn = psycopg2.connect(
-        dbname=settings.DB_NAME,
-        user=settings.DB_USER,
-        password=settings.DB_PASSWORD,
-        host=settings.DB_HOST,
-        port=settings.DB_PORT
+def update_recommendation_reason(history_id: int, reason):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        execute_prepared(
+            cursor,
+            "update_recommendation_reason",
+            "UPDATE recommendation_history SET reason = $2 WHERE id = $1",
+            (history_id, json.dumps(reason))
+        )
+        cursor.close()
+
+
+HISTORY_PAGE_QUERY = """
+    SELECT h.id, h.needs, h.category, h.contents_id, h.creator_id, {reason}, h.created_at,
+        c.title, c.thumbnail, u.nickname
+    FROM recommendation_history h
+    LEFT JOIN contents c ON c.id = h.contents_id
+    LEFT JOIN creator cr ON cr.id = h.creator_id
+    LEFT JOIN users u ON cr.user_id = u.id
+    WHERE h.user_id = $1 {after}
+    ORDER BY h.created_at DESC, h.id DESC
+    LIMIT $2
+"""
+
+# (created_at, id) 보다 오래된 이력만 (keyset)
+HISTORY_AFTER_CONDITION = "AND (h.created_at < $3 OR (h.created_at = $3 AND h.id < $4))"
+
+
+def history_item_from_row(row, compact: bool = False) -> dict:
+    item = {
+        "id": row[0],
+        "needs": row[1],
+        "category": row[2],
+        "contentsId": row[3],
+        "creatorId": row[4],
+        "createdAt": row[6].isoformat(),
+        "contentsTitle": row[7],
+        "thumbnail": row[8],
+        "creatorName": row[9]
+    }
+    if not compact:
+        item["reason"] = row[5]
+    return item
+
+
+def get_recommendations_by_user(user_id: int, limit: int, before: tuple = None, compact: bool = False) -> list:
+    """
+    최신순 추천 이력 최대 limit 개 (콘텐츠 제목/썸네일, 크리에이터 이름 포함).
+    before=(created_at, id) 이면 그보다 오래된 이력부터, compact 면 reason 제외
+    """
+    name = "select_recommendation_history" + ("_compact" if compact else "") + ("_after" if before else "")
+    sql = HISTORY_PAGE_QUERY.format(
+        reason="NULL" if compact else "h.reason",
+        after=HISTORY_AFTER_CONDITION if before else ""
     )
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT id, needs, category, contents_id, creator_id, reason, created_at
-        FROM recommendation_history
-        WHERE user_id = %s
-        ORDER BY created_at DESC
-    """, (user_id,))
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
-    return [
-        {
-            "id": row[0],
-            "needs": row[1],
-            "category": row[2],
-            "contentsId": row[3],
-            "creatorId": row[4],
-            "reason": row[5],
-            "createdAt": row[6].isoformat()
-        }
-        for row in rows
-    ]
+    params = (user_id, limit) + (tuple(before) if before else ())
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        execute_prepared(cursor, name, sql, params)
+        rows = cursor.fetchall()
+        cursor.close()
 
+    return [history_item_from_row(row, compact) for row in rows]
+
+@traced("user_country")
 def fetch_user_country(user_id: int) -> str:
-    conn = psycopg2.connect(
-        dbname=settings.DB_NAME,
-        user=settings.DB_USER,
-        password=settings.DB_PASSWORD,
-        host=settings.DB_HOST,
-        port=settings.DB_PORT
-    )
-    cursor = conn.cursor()
-    cursor.execute("SELECT country FROM users WHERE id = %s", (user_id,))
-    result = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        execute_prepared(cursor, "select_user_country", "SELECT country FROM users WHERE id = $1", (user_id,))
+        result = cursor.fetchone()
+        cursor.close()
     return result[0] if result else None
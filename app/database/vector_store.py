@@ -0,0 +1,299 @@
+import fcntl
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+import numpy as np
+from app.core.config import settings
+
+
+class Match(dict):
+    """
+    Pinecone ScoredVector 처럼 match["metadata"] / match.metadata 둘 다 지원
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class QueryResponse:
+    def __init__(self, matches: list):
+        self.matches = matches
+
+
+class PineconeVectorStore:
+    def __init__(self, api_key: str, index_name: str):
+        from pinecone import Pinecone
+
+        # Pinecone 인스턴스 초기화
+        self.pc = Pinecone(api_key=api_key)
+        self.index = self.pc.Index(index_name)
+
+    def upsert(self, vectors: list[tuple], batch_size: int = 100):
+        for start in range(0, len(vectors), batch_size):
+            self.index.upsert(vectors=[
+                {"id": vector_id, "values": values, "metadata": metadata or {}}
+                for vector_id, values, metadata in vectors[start:start + batch_size]
+            ])
+
+    def query(self, vector: list[float], top_k: int):
+        return self.index.query(vector=vector, top_k=top_k, include_metadata=True)
+
+    def fetch(self, ids: list[str], batch_size: int = 500) -> dict:
+        result = {}
+        for start in range(0, len(ids), batch_size):
+            response = self.index.fetch(ids=ids[start:start + batch_size])
+            for vector_id, vector in (response.vectors or {}).items():
+                result[vector_id] = (list(vector.values), dict(vector.metadata or {}))
+        return result
+
+    def describe(self) -> dict:
+        return {"total_vector_count": self.index.describe_index_stats().get("total_vector_count", 0)}
+
+
+class LocalVectorStore:
+    """
+    NumPy 행렬 기반 인프로세스 벡터 인덱스 (코사인 brute-force top-k).
+
+    벡터는 float32 memmap 파일, id/메타데이터는 meta.json 스냅샷 + rows.log (JSON lines) 추가 기록으로 저장한다.
+    upsert 는 바뀐 행만 log 에 덧붙이고 norm 도 바뀐 행만 다시 계산한다. log 가 커지면 스냅샷으로 합친다.
+    여러 프로세스(배치 워커)가 같은 디렉터리를 쓰므로 쓰기는 lock 파일의 배타 flock 안에서
+    최신 상태 반영 → 기록 → 저장을 한 번에 하고, 다시 읽을 때는 공유 flock 을 잡는다.
+    """
+
+    META_FILE = "meta.json"
+    LOG_FILE = "rows.log"
+    LOCK_FILE = "lock"
+    COMPACT_MIN_ENTRIES = 10000
+
+    def __init__(self, path: str, dim: int):
+        self.path = path
+        self.dim = dim
+        self._lock = threading.RLock()
+        self._meta_stamp_loaded = None
+        self._log_offset = 0
+        self._log_entries = 0
+        os.makedirs(path, exist_ok=True)
+        self._lock_file = open(os.path.join(path, self.LOCK_FILE), "a+")
+        with self._locked(exclusive=False):
+            self._load()
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.path, self.META_FILE)
+
+    @property
+    def log_path(self) -> str:
+        return os.path.join(self.path, self.LOG_FILE)
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        # RLock 은 같은 프로세스의 스레드 사이, flock 은 프로세스 사이 (같은 fd 를 쓰는 스레드끼리는 flock 이 배타적이지 않음)
+        with self._lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _empty(self):
+        self.ids = []
+        self.positions = {}
+        self.metadata = []
+        self.capacity = 0
+        self.generation = 0
+        self.matrix = np.zeros((0, self.dim), dtype=np.float32)
+        self.norms = np.zeros(0, dtype=np.float32)
+
+    def _vectors_path(self, generation: int) -> str:
+        return os.path.join(self.path, f"vectors.{generation}.f32")
+
+    def _load(self):
+        self._log_offset = 0
+        self._log_entries = 0
+        self._meta_stamp_loaded = self._meta_stamp()
+        if self._meta_stamp_loaded is None:
+            self._empty()
+            return
+
+        with open(self.meta_path) as f:
+            meta = json.load(f)
+
+        self.ids = meta["ids"]
+        self.positions = {vector_id: i for i, vector_id in enumerate(self.ids)}
+        self.metadata = meta["metadata"]
+        self.capacity = meta["capacity"]
+        self.generation = meta["generation"]
+        self.matrix = np.memmap(
+            self._vectors_path(self.generation), dtype=np.float32, mode="r+", shape=(self.capacity, self.dim)
+        )
+        self.norms = np.zeros(self.capacity, dtype=np.float32)
+        self.norms[:len(self.ids)] = np.linalg.norm(self.matrix[:len(self.ids)], axis=1)
+        self._replay_log()
+
+    def _replay_log(self):
+        """
+        마지막으로 읽은 위치 이후의 log 항목을 반영하고 해당 행의 norm 만 다시 계산
+        """
+        try:
+            with open(self.log_path) as f:
+                f.seek(self._log_offset)
+                lines = f.readlines()
+                self._log_offset = f.tell()
+        except FileNotFoundError:
+            return
+
+        changed = []
+        for line in lines:
+            position, vector_id, metadata = json.loads(line)
+            self._set_row(position, vector_id, metadata)
+            changed.append(position)
+        self._log_entries += len(lines)
+        self._update_norms(changed)
+
+    def _set_row(self, position: int, vector_id: str, metadata: dict):
+        if position == len(self.ids):
+            self.ids.append(vector_id)
+            self.metadata.append(metadata)
+            self.positions[vector_id] = position
+        else:
+            self.metadata[position] = metadata
+
+    def _update_norms(self, positions: list):
+        if positions:
+            positions = np.asarray(positions, dtype=np.int64)
+            self.norms[positions] = np.linalg.norm(self.matrix[positions], axis=1)
+
+    def _meta_stamp(self):
+        # 스냅샷은 os.replace 로 바뀌므로 inode 까지 비교해 mtime 해상도가 낮은 파일시스템에서도 변경을 놓치지 않는다
+        try:
+            stat = os.stat(self.meta_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _changed(self) -> bool:
+        try:
+            log_size = os.stat(self.log_path).st_size
+        except FileNotFoundError:
+            log_size = 0
+        return self._meta_stamp() != self._meta_stamp_loaded or log_size != self._log_offset
+
+    def _reload_if_changed(self):
+        # 호출 측이 flock 을 잡은 상태에서 호출
+        if self._meta_stamp() != self._meta_stamp_loaded:
+            self._load()
+        else:
+            self._replay_log()
+
+    def _refresh(self):
+        # 읽기 경로: 바뀐 게 있을 때만 공유 lock 을 잡고 반영
+        if self._changed():
+            with self._locked(exclusive=False):
+                self._reload_if_changed()
+
+    def _grow(self, required: int):
+        capacity = max(required, self.capacity * 2, 1024)
+        generation = self.generation + 1
+        matrix = np.memmap(self._vectors_path(generation), dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        matrix[:len(self.ids)] = self.matrix[:len(self.ids)]
+        norms = np.zeros(capacity, dtype=np.float32)
+        norms[:len(self.ids)] = self.norms[:len(self.ids)]
+        old_path = self._vectors_path(self.generation) if self.capacity else None
+
+        self.matrix, self.norms, self.capacity, self.generation = matrix, norms, capacity, generation
+        return old_path
+
+    def _save_meta(self):
+        """
+        현재 상태 전체를 meta.json 스냅샷으로 쓰고 log 를 비운다 (배타 lock 안에서 호출)
+        """
+        tmp_path = f"{self.meta_path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "dim": self.dim,
+                "capacity": self.capacity,
+                "generation": self.generation,
+                "ids": self.ids,
+                "metadata": self.metadata,
+            }, f)
+        os.replace(tmp_path, self.meta_path)
+        # 스냅샷이 log 내용을 모두 포함하므로 비워도 된다 (중간에 멈춰도 log 재생은 같은 결과)
+        open(self.log_path, "w").close()
+        self._meta_stamp_loaded = self._meta_stamp()
+        self._log_offset = 0
+        self._log_entries = 0
+
+    def upsert(self, vectors: list[tuple], batch_size: int = 100):
+        with self._locked(exclusive=True):
+            self._reload_if_changed()
+            new_ids = list(dict.fromkeys(vector_id for vector_id, _, _ in vectors if vector_id not in self.positions))
+            grown, old_path = False, None
+            if len(self.ids) + len(new_ids) > self.capacity:
+                grown, old_path = True, self._grow(len(self.ids) + len(new_ids))
+
+            entries = []
+            for vector_id, values, metadata in vectors:
+                position = self.positions.get(vector_id, len(self.ids))
+                self._set_row(position, vector_id, metadata or {})
+                self.matrix[position] = np.asarray(values, dtype=np.float32)
+                entries.append((position, vector_id, metadata or {}))
+            self.matrix.flush()
+            self._update_norms([position for position, _, _ in entries])
+
+            if grown or self._log_entries + len(entries) > max(self.COMPACT_MIN_ENTRIES, len(self.ids)):
+                # 세대가 바뀌었거나 log 가 커졌으면 스냅샷으로 합친다
+                self._save_meta()
+            else:
+                with open(self.log_path, "a") as f:
+                    f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+                    f.flush()
+                    os.fsync(f.fileno())
+                    self._log_offset = f.tell()
+                self._log_entries += len(entries)
+
+            # 다른 프로세스는 다음 읽기에서 새 세대를 다시 연다 (이미 매핑한 파일은 삭제돼도 유효)
+            if old_path and os.path.exists(old_path):
+                os.remove(old_path)
+
+    def query(self, vector: list[float], top_k: int) -> QueryResponse:
+        with self._lock:
+            self._refresh()
+            count = len(self.ids)
+            if count == 0:
+                return QueryResponse([])
+
+            q = np.asarray(vector, dtype=np.float32)
+            scores = (self.matrix[:count] @ q) / np.clip(self.norms[:count] * np.linalg.norm(q), 1e-12, None)
+            k = min(top_k, count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return QueryResponse([
+                Match(id=self.ids[i], score=float(scores[i]), metadata=self.metadata[i])
+                for i in top
+            ])
+
+    def fetch(self, ids: list[str], batch_size: int = 500) -> dict:
+        with self._lock:
+            self._refresh()
+            return {
+                vector_id: (self.matrix[self.positions[vector_id]].tolist(), dict(self.metadata[self.positions[vector_id]]))
+                for vector_id in ids if vector_id in self.positions
+            }
+
+    def describe(self) -> dict:
+        with self._lock:
+            self._refresh()
+            return {"total_vector_count": len(self.ids)}
+
+
+def create_vector_store():
+    if settings.VECTOR_BACKEND == "local":
+        return LocalVectorStore(settings.LOCAL_VECTOR_INDEX_PATH, settings.VECTOR_DIMENSION)
+    if settings.VECTOR_BACKEND == "pinecone":
+        return PineconeVectorStore(settings.PINECONE_API_KEY, settings.PINECONE_INDEX)
+    raise ValueError(f"Unknown vector backend: {settings.VECTOR_BACKEND}")
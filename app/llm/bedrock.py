@@ -1,9 +1,17 @@
 import boto3
+import hashlib
 import json
 import re
 import random
 from botocore.config import Config
 from prometheus_client import Summary
+from app.core.config import settings
+from app.utils.cache import TTLCache
+from app.llm.reason_stream import ReasonStreamParser
+from app.llm.governor import governor, BedrockUnavailable
+from app.utils.hedging import Hedger, hedged
+from app.monitoring.metrics import llm_reason_cache_requests_total
+from app.monitoring.tracing import traced
 
 # LLM 응답 시간 측정을 위한 Prometheus metric 정의
 llm_latency_seconds = Summary(
@@ -11,17 +19,19 @@ llm_latency_seconds = Summary(
     "Latency for Claude LLM responses (in seconds)"
 )
 
-# Claude 3 Haiku 모델 설정
+# Claude 3 Haiku 모델 설정 (BEDROCK_ENDPOINT_URL 로 로컬 fake Bedrock 을 가리킬 수 있음)
 bedrock = boto3.client(
     "bedrock-runtime",
-    region_name="us-east-1",
-    config=Config(retries={"max_attempts": 3})
+    region_name=settings.BEDROCK_REGION,
+    endpoint_url=settings.BEDROCK_ENDPOINT_URL or None,
+    config=Config(retries={"max_attempts": settings.BEDROCK_MAX_ATTEMPTS, "mode": "standard"})
 )
 
-# Claude 3 Messages API 형식 호출
-@llm_latency_seconds.time()
-def invoke_claude(prompt: str) -> str:
-    body = {
+MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
+
+
+def claude_request_body(prompt: str) -> str:
+    return json.dumps({
         "anthropic_version": "bedrock-2023-05-31",
         "max_tokens": 1024,
         "temperature": 0.7,
@@ -29,22 +39,177 @@ def invoke_claude(prompt: str) -> str:
         "messages": [
             {"role": "user", "content": prompt}
         ]
+    })
+
+
+# Claude 3 Messages API 형식 호출
+# 느린 completion 은 p90 이후 한 번 더 요청 (HEDGE_BEDROCK_ENABLED)
+claude_hedger = Hedger(
+    "bedrock",
+    default_delay=settings.HEDGE_BEDROCK_DEFAULT_DELAY_SECONDS,
+    quantile=settings.HEDGE_QUANTILE,
+    max_rate=settings.HEDGE_MAX_RATE,
+    window=settings.HEDGE_WINDOW,
+)
+
+
+@llm_latency_seconds.time()
+def invoke_claude(prompt: str) -> str:
+    return hedged(claude_hedger, settings.HEDGE_BEDROCK_ENABLED, invoke_claude_once, prompt)
+
+
+def invoke_claude_once(prompt: str) -> str:
+    with governor.acquire():
+        response = bedrock.invoke_model(
+            modelId=MODEL_ID,
+            body=claude_request_body(prompt),
+            contentType="application/json",
+            accept="application/json"
+        )
+        result = json.loads(response['body'].read().decode())
+    return result["content"][0]["text"]
+
+
+def invoke_claude_stream(prompt: str):
+    """
+    invoke_model_with_response_stream 으로 생성되는 텍스트 조각을 순서대로 yield
+    """
+    # 스트림을 다 읽을 때까지 governor 슬롯을 점유
+    with governor.acquire():
+        response = bedrock.invoke_model_with_response_stream(
+            modelId=MODEL_ID,
+            body=claude_request_body(prompt),
+            contentType="application/json",
+            accept="application/json"
+        )
+
+        for event in response["body"]:
+            chunk = event.get("chunk")
+            if not chunk:
+                continue
+            payload = json.loads(chunk["bytes"].decode())
+            if payload.get("type") == "content_block_delta":
+                text = payload.get("delta", {}).get("text")
+                if text:
+                    yield text
+
+
+# 동일한 장소/크리에이터 + 비슷한 사용자 조건의 reason 응답 캐시 (key 당 최대 N개 variant)
+reason_cache = TTLCache(settings.LLM_REASON_CACHE_MAXSIZE, settings.LLM_REASON_CACHE_TTL_SECONDS)
+
+
+def age_bucket(age):
+    try:
+        return int(age) // 10 * 10
+    except (TypeError, ValueError):
+        return None
+
+
+def reason_fingerprint(kind: str, fields: dict) -> str:
+    """
+    프롬프트 입력을 정규화한 지문 (이름 같은 사용자별 노이즈는 호출 측에서 제외)
+    """
+    canonical = {
+        k: " ".join(str(v).lower().split()) if isinstance(v, str) else v
+        for k, v in fields.items()
     }
+    digest = hashlib.sha1(json.dumps(canonical, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{kind}:{digest}"
+
+
+def canned_reason(kind: str, fields: dict) -> dict:
+    """
+    Bedrock 이 불안정해 호출을 보내지 않을 때 바로 돌려주는 고정 reason
+    """
+    if kind == "creator":
+        return {
+            "title": f"Meet {fields.get('creator_name')}",
+            "lines": [
+                f"A creator who shares your interest in {fields.get('category')}.",
+                "Their channel is a good fit for what you've been exploring.",
+                "Take a look and see what they're up to.",
+            ]
+        }
+    return {
+        "title": f"{fields.get('place_name')} is waiting for you",
+        "lines": [
+            f"A {fields.get('category')} spot that fits the way you like to travel.",
+            "It matches the places you've been enjoying lately.",
+            "Add it to your route and see for yourself.",
+        ]
+    }
+
+
+def lookup_cached_reason(kind: str, fields: dict):
+    """
+    (캐시 key, 저장된 variant 목록, 재사용할 reason) 반환. 새로 생성해야 하면 reason 은 None
+    """
+    key = reason_fingerprint(kind, fields)
+    variants = reason_cache.get(key) or []
+
+    # variant 가 N개 모일 때까지는 새로 생성해 다양성을 확보하고, 이후에는 그중 하나를 반환
+    if len(variants) >= max(settings.LLM_REASON_VARIANTS, 1):
+        llm_reason_cache_requests_total.labels(kind=kind, result="hit").inc()
+        return key, variants, random.choice(variants)
+
+    llm_reason_cache_requests_total.labels(kind=kind, result="miss").inc()
+    return key, variants, None
 
-    response = bedrock.invoke_model(
-        modelId="anthropic.claude-3-haiku-20240307-v1:0",
-        body=json.dumps(body),
-        contentType="application/json",
-        accept="application/json"
+
+def cached_reason(kind: str, fields: dict, generate):
+    try:
+        if not settings.LLM_REASON_CACHE_ENABLED:
+            return generate()
+
+        key, variants, reason = lookup_cached_reason(kind, fields)
+        if reason:
+            return reason
+
+        result = generate()
+        if result:
+            reason_cache.set(key, variants + [result])
+        return result
+    except BedrockUnavailable:
+        # 기다리지 않고 고정 reason 으로 응답 (캐시에는 넣지 않음)
+        return canned_reason(kind, fields)
+
+
+def stream_reason(kind: str, fields: dict, prompt: str):
+    """
+    cached_reason 의 스트리밍 버전.
+    title/lines 조각을 delta 이벤트로 yield 하고, 마지막에 {"type": "reason", "reason": ...} 를 yield
+    """
+    key, variants, reason = (
+        lookup_cached_reason(kind, fields) if settings.LLM_REASON_CACHE_ENABLED else (None, [], None)
     )
+    if reason:
+        yield {"type": "reason", "reason": reason}
+        return
 
-    result = json.loads(response['body'].read().decode())
-    return result["content"][0]["text"]
+    parser = ReasonStreamParser()
+    try:
+        for text in invoke_claude_stream(prompt):
+            yield from parser.feed(text)
+            if parser.done:
+                break
+    except BedrockUnavailable:
+        yield {"type": "reason", "reason": canned_reason(kind, fields)}
+        return
+    except Exception as e:
+        print("Claude 스트리밍 실패:", e)
+
+    reason = parser.result()
+    if reason and key:
+        reason_cache.set(key, variants + [reason])
+    yield {"type": "reason", "reason": reason}
 
 
 # 콘텐츠 또는 장소 중 하나 추천
-def ask_llama_for_json(user, items, item_type="contents"):
-    items = random.sample(items, min(len(items), 10))
+@traced("llm_pick")
+def ask_llama_for_json(user, items, item_type="contents", ranked=False):
+    # ranked=True 이면 호출 측에서 우선순위 순으로 정렬한 후보이므로 앞에서부터 자르고, 순서 정보가 없을 때만 무작위로 고른다
+    limit = settings.LLM_CANDIDATES
+    items = items[:limit] if ranked else random.sample(items, min(len(items), limit))
     formatted_items = "".join(
         f"- ID: {item['id']}, Title: {item['title']}, Description: {item['desc']}\n"
         if item_type == "contents" else
@@ -74,15 +239,48 @@ Respond only in JSON format:
         result = invoke_claude(prompt)
         match = re.search(r"\{[\s\S]*?\}", result)
         return json.loads(match.group(0)) if match else None
+    except BedrockUnavailable:
+        # Bedrock 이 불안정하면 기다리지 않고 첫 번째 후보(점수 순이면 최상위)로 대체
+        return {
+            f"{item_type}Id": items[0]["id"],
+            "reason": "Picked for you based on your interests."
+        } if items else None
     except Exception as e:
         print("Claude JSON 응답 실패:", e)
         return None
 
 
+def emotional_reason_fields(place_name, category, place_facts, keywords) -> dict:
+    # place_facts 는 사용자 카테고리별 검색 결과라 프롬프트에 들어가는 그대로 key 에 포함
+    return {
+        "place_name": place_name,
+        "category": category,
+        "place_facts": place_facts,
+        "keywords": sorted(keywords),
+    }
+
+
 # 장소 기반 감성 메시지 생성
+@traced("llm_reason")
 def generate_reason_emotional(user, place_name, category, place_facts, keywords):
+    return cached_reason(
+        "emotional",
+        emotional_reason_fields(place_name, category, place_facts, keywords),
+        lambda: generate_reason_emotional_live(place_name, category, place_facts, keywords)
+    )
+
+
+def stream_reason_emotional(user, place_name, category, place_facts, keywords):
+    return stream_reason(
+        "emotional",
+        emotional_reason_fields(place_name, category, place_facts, keywords),
+        emotional_reason_prompt(place_name, category, place_facts, keywords)
+    )
+
+
+def emotional_reason_prompt(place_name, category, place_facts, keywords) -> str:
     keyword_str = ", ".join([f"**{k}**" for k in keywords])
-    prompt = f"""
+    return f"""
 You’re a travel-savvy friend. Recommend a specific place emotionally.
 
 Format:
@@ -103,37 +301,73 @@ Return JSON like:
   "lines": ["<line1>", "<line2>", "<line3>"]
 }}
 """
+
+
+def generate_reason_emotional_live(place_name, category, place_facts, keywords):
+    prompt = emotional_reason_prompt(place_name, category, place_facts, keywords)
     try:
         result = invoke_claude(prompt)
         match = re.search(r"\{[\s\S]*?\}", result)
         return json.loads(match.group(0)) if match else None
+    except BedrockUnavailable:
+        raise
     except Exception as e:
         print("Claude 메시지 실패:", e)
         return None
-    
+
+
+def creator_reason_fields(user, creator) -> dict:
+    return {
+        "creator_id": creator["id"],
+        "creator_name": creator["name"],
+        "creator_country": creator["country"],
+        "creator_category": creator["category"],
+        "creator_introduction": creator["introduction"],
+        "country": user.get("country"),
+        "age": age_bucket(user.get("age")),
+        "gender": user.get("gender"),
+        "category": user.get("category"),
+    }
+
+
+@traced("llm_reason")
 def generate_creator_reason(user, creator):
+    return cached_reason(
+        "creator",
+        creator_reason_fields(user, creator),
+        lambda: generate_creator_reason_live(user, creator)
+    )
+
+
+def stream_creator_reason(user, creator):
+    fields = creator_reason_fields(user, creator)
+    return stream_reason("creator", fields, creator_reason_prompt(fields))
+
+
+def creator_reason_prompt(fields: dict) -> str:
+    # 캐시된 reason 이 다른 사용자에게 재사용되므로 캐시 key 와 같은 정규화 필드로만 만든다 (이름, 정확한 나이 제외)
     creator_category = (
-        ", ".join(creator['category']) if isinstance(creator['category'], list)
-        else creator['category']
+        ", ".join(fields['creator_category']) if isinstance(fields['creator_category'], list)
+        else fields['creator_category']
     )
+    age = f"{fields['age']}s" if fields['age'] is not None else None
 
-    prompt = f"""
+    return f"""
 You're a recommendation expert for creators.
 
 Your goal is to emotionally persuade the user why this creator is the best match,
 based on the user's preferences and behavior.
 
 User:
-- Name: {user['name']}
-- Age: {user['age']}, Gender: {user['gender']}, Country: {user['country']}
-- Interested category: {user['category']}
+- Age: {age}, Gender: {fields['gender']}, Country: {fields['country']}
+- Interested category: {fields['category']}
 - This user has shown interest in content with related hashtags and creators from similar categories and regions.
 
 Creator:
-- Name: {creator['name']}
-- Country: {creator['country']}
+- Name: {fields['creator_name']}
+- Country: {fields['creator_country']}
 - Category: {creator_category}
-- Introduction: {creator['introduction']}
+- Introduction: {fields['creator_introduction']}
 
 Please format your answer strictly in this JSON format:
 {{
@@ -148,10 +382,16 @@ Please format your answer strictly in this JSON format:
 The combined length of all 3 lines should be within 100 characters total.
 Use natural, intuitive language that builds emotional connection.
 """
+
+
+def generate_creator_reason_live(user, creator):
+    prompt = creator_reason_prompt(creator_reason_fields(user, creator))
     try:
         result = invoke_claude(prompt)
         match = re.search(r"\{[\s\S]*?\}", result)
         return json.loads(match.group(0)) if match else None
+    except BedrockUnavailable:
+        raise
     except Exception as e:
         print("Claude 크리에이터 추천 reason 실패:", e)
         return None
@@ -0,0 +1,102 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.core.config import settings
+from app.redis.client import get_redis
+from app.llm.bedrock import generate_creator_reason_live
+from app.monitoring.metrics import creator_reason_store_requests_total
+from app.monitoring.tracing import traced
+
+
+def segment_key(creator_id, category: str, country: str) -> str:
+    return f"creator_reason:{creator_id}:{(category or '').strip().upper()}:{(country or '').strip().upper()}"
+
+
+def enumerate_segments(creators: list) -> list:
+    """
+    (creator, category, country) 조합 목록. 온라인 경로는 카테고리/국가가 모두 일치하는 크리에이터만 고르므로
+    크리에이터의 각 카테고리 × 크리에이터 국가만 만들면 된다
+    """
+    segments = []
+    for creator in creators:
+        for category in creator.get("category") or []:
+            segments.append((creator, category.strip().upper(), (creator.get("country") or "").strip().upper()))
+    return segments
+
+
+def segment_user(category: str, country: str) -> dict:
+    # 토큰에는 나이/성별이 없으므로 세그먼트 단위의 가상 사용자로 생성
+    return {
+        "name": "Traveler",
+        "age": None,
+        "gender": None,
+        "country": country,
+        "category": category
+    }
+
+
+@traced("creator_reason_store")
+def get_stored_creator_reason(creator: dict, user: dict):
+    if not settings.CREATOR_REASON_STORE_ENABLED:
+        return None
+    try:
+        raw = get_redis().get(segment_key(creator["id"], user.get("category"), user.get("country")))
+    except Exception as e:
+        print("크리에이터 reason 조회 실패:", e)
+        return None
+
+    creator_reason_store_requests_total.labels(result="hit" if raw else "miss").inc()
+    return json.loads(raw) if raw else None
+
+
+def store_creator_reason(creator: dict, category: str, country: str, reason: dict):
+    get_redis().set(
+        segment_key(creator["id"], category, country),
+        json.dumps(reason),
+        ex=settings.CREATOR_REASON_TTL_SECONDS
+    )
+
+
+def generate_segment_reason(creator: dict, category: str, country: str) -> bool:
+    reason = generate_creator_reason_live(segment_user(category, country), creator)
+    if not reason:
+        return False
+    store_creator_reason(creator, category, country, reason)
+    return True
+
+
+def pregenerate_creator_reasons(workers: int = None):
+    from app.database.postgres import load_documents_from_postgres
+
+    _, _, creators = load_documents_from_postgres()
+    segments = enumerate_segments(creators)
+    workers = workers or settings.CREATOR_REASON_BATCH_WORKERS
+    print(f"🧩 {len(segments)} creator segments, {workers} workers")
+
+    started = time.time()
+    stored = failed = 0
+    # Bedrock 동시 호출 수를 workers 로 제한
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(generate_segment_reason, creator, category, country): (creator["id"], category, country)
+            for creator, category, country in segments
+        }
+        for future in as_completed(futures):
+            try:
+                ok = future.result()
+            except Exception as e:
+                print(f"[creator-{futures[future][0]}] ❌ Error: {e}")
+                ok = False
+            stored += ok
+            failed += not ok
+
+    print(f"✅ Stored {stored} creator reasons ({failed} failed) in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    import sys
+
+    try:
+        pregenerate_creator_reasons(int(sys.argv[1]) if len(sys.argv) > 1 else None)
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -0,0 +1,195 @@
+import threading
+import time
+from contextlib import contextmanager
+from botocore.exceptions import ClientError, ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError
+from app.core.config import settings
+from app.monitoring.metrics import (
+    bedrock_in_flight,
+    bedrock_queued,
+    bedrock_concurrency_limit,
+    bedrock_throttled_total,
+    bedrock_rejected_total,
+    bedrock_circuit_state,
+)
+
+THROTTLE_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"}
+UNHEALTHY_CODES = {
+    "ServiceUnavailableException", "InternalServerException", "ModelTimeoutException", "ModelNotReadyException",
+}
+
+
+class BedrockUnavailable(Exception):
+    """
+    governor 가 호출을 보내지 않고 바로 거절한 경우 (circuit open, 대기열 초과, 대기 시간 초과)
+    """
+
+
+def classify_error(e: BaseException):
+    """
+    "throttled" / "unhealthy" / None (요청 자체의 문제 등 Bedrock 상태와 무관한 오류)
+    """
+    if isinstance(e, ClientError):
+        code = e.response.get("Error", {}).get("Code")
+        status = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        if code in THROTTLE_CODES or status == 429:
+            return "throttled"
+        if code in UNHEALTHY_CODES or status >= 500:
+            return "unhealthy"
+        return None
+    if isinstance(e, (EndpointConnectionError, ConnectTimeoutError, ReadTimeoutError)):
+        return "unhealthy"
+    return None
+
+
+class BedrockGovernor:
+    """
+    Bedrock 호출 동시성 제어.
+
+    - 동시 호출 수를 limit 이하로 제한하고, 초과분은 최대 max_queued 개까지 queue_timeout 동안 대기
+    - limit 은 AIMD 로 조정: 성공마다 +1/limit (윈도우당 약 +1), throttle 응답이면 절반으로 (cooldown 당 1회)
+    - throttle/장애가 failure_threshold 번 연속되면 circuit 을 열어 reset_seconds 동안 바로 거절하고,
+      이후 probe 한 건으로 회복 여부를 확인 (half_open)
+    """
+
+    def __init__(self, max_in_flight: int, min_in_flight: int = 1, max_queued: int = 64, queue_timeout: float = 5.0,
+                 failure_threshold: int = 5, reset_seconds: float = 30.0, decrease_cooldown: float = 1.0):
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min(min_in_flight, max_in_flight)
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.decrease_cooldown = decrease_cooldown
+
+        self.limit = float(max_in_flight)
+        self.in_flight = 0
+        self.queued = 0
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.last_decrease = 0.0
+        self.probe_in_flight = False
+        self._cond = threading.Condition()
+
+        bedrock_concurrency_limit.set(self.limit)
+        bedrock_circuit_state.state(self.state)
+
+    @contextmanager
+    def acquire(self):
+        """
+        with governor.acquire(): 블록 안에서 Bedrock 을 호출. 블록에서 난 예외로 limit / circuit 상태를 갱신한다
+        """
+        probe = self._enter()
+        try:
+            yield
+        except BaseException as e:
+            self._on_error(e, probe)
+            raise
+        else:
+            self._on_success(probe)
+        finally:
+            self._leave(probe)
+
+    def call(self, func, *args, **kwargs):
+        with self.acquire():
+            return func(*args, **kwargs)
+
+    def _set_state(self, state: str):
+        self.state = state
+        bedrock_circuit_state.state(state)
+
+    def _enter(self) -> bool:
+        with self._cond:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_seconds:
+                    bedrock_rejected_total.labels(reason="circuit_open").inc()
+                    raise BedrockUnavailable("Bedrock circuit is open")
+                self._set_state("half_open")
+
+            if self.state == "half_open":
+                # 회복 확인용 probe 는 한 번에 하나만
+                if self.probe_in_flight:
+                    bedrock_rejected_total.labels(reason="circuit_open").inc()
+                    raise BedrockUnavailable("Bedrock circuit is half-open")
+                self.probe_in_flight = True
+                self._occupy()
+                return True
+
+            if self.in_flight >= int(self.limit):
+                if self.queued >= self.max_queued:
+                    bedrock_rejected_total.labels(reason="queue_full").inc()
+                    raise BedrockUnavailable("Too many Bedrock calls waiting")
+
+                self.queued += 1
+                bedrock_queued.set(self.queued)
+                deadline = time.monotonic() + self.queue_timeout
+                try:
+                    while self.in_flight >= int(self.limit):
+                        if self.state == "open":
+                            bedrock_rejected_total.labels(reason="circuit_open").inc()
+                            raise BedrockUnavailable("Bedrock circuit opened while waiting")
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            bedrock_rejected_total.labels(reason="queue_timeout").inc()
+                            raise BedrockUnavailable("Timed out waiting for a Bedrock slot")
+                        self._cond.wait(remaining)
+                finally:
+                    self.queued -= 1
+                    bedrock_queued.set(self.queued)
+
+            self._occupy()
+            return False
+
+    def _occupy(self):
+        self.in_flight += 1
+        bedrock_in_flight.set(self.in_flight)
+
+    def _leave(self, probe: bool):
+        with self._cond:
+            self.in_flight -= 1
+            if probe:
+                self.probe_in_flight = False
+            bedrock_in_flight.set(self.in_flight)
+            self._cond.notify_all()
+
+    def _on_success(self, probe: bool):
+        with self._cond:
+            if probe:
+                self._set_state("closed")
+            elif self.state != "closed":
+                # open 전에 시작한 호출이 늦게 성공한 것은 회복 신호로 보지 않는다 (probe 만 circuit 을 닫음)
+                return
+            self.consecutive_failures = 0
+            self.limit = min(float(self.max_in_flight), self.limit + 1.0 / max(self.limit, 1.0))
+            bedrock_concurrency_limit.set(self.limit)
+
+    def _on_error(self, e: BaseException, probe: bool):
+        kind = classify_error(e)
+        if kind is None:
+            return
+
+        with self._cond:
+            now = time.monotonic()
+            if kind == "throttled":
+                bedrock_throttled_total.inc()
+                if now - self.last_decrease >= self.decrease_cooldown:
+                    self.limit = max(float(self.min_in_flight), self.limit / 2)
+                    self.last_decrease = now
+                    bedrock_concurrency_limit.set(self.limit)
+
+            self.consecutive_failures += 1
+            if probe or self.consecutive_failures >= self.failure_threshold:
+                self._set_state("open")
+                self.opened_at = now
+                # 대기 중인 호출도 바로 실패하도록 깨운다
+                self._cond.notify_all()
+
+
+governor = BedrockGovernor(
+    max_in_flight=settings.BEDROCK_MAX_IN_FLIGHT,
+    min_in_flight=settings.BEDROCK_MIN_IN_FLIGHT,
+    max_queued=settings.BEDROCK_MAX_QUEUED,
+    queue_timeout=settings.BEDROCK_QUEUE_TIMEOUT_SECONDS,
+    failure_threshold=settings.BEDROCK_BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=settings.BEDROCK_BREAKER_RESET_SECONDS,
+)
@@ -0,0 +1,143 @@
+import json
+import re
+
+
+class ReasonStreamParser:
+    """
+    Claude 가 스트리밍하는 {"title": "...", "lines": ["...", ...]} JSON 을 토큰 단위로 해석.
+
+    feed() 에 텍스트 조각을 넣으면 이번 조각에서 새로 확정된 문자열 조각을
+    {"type": "delta", "field": "title", "delta": ...} / {"type": "delta", "field": "lines", "index": i, "delta": ...}
+    형태로 반환한다. JSON 앞뒤의 잡담은 무시한다.
+    """
+
+    ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self):
+        self.text = ""
+        self.title = None
+        self.lines = []
+        self.done = False
+
+        self._stack = []            # 열린 괄호 ("{" / "[")
+        self._in_string = False
+        self._escape = None         # None | "" (백슬래시 직후) | "uXXXX" 누적
+        self._high_surrogate = None
+        self._key = None            # 최상위 객체에서 마지막으로 읽은 key
+        self._expect_value = False
+        self._target = None         # 현재 문자열이 채우는 필드: ("key",) / ("title",) / ("lines", i) / None
+        self._key_buffer = ""
+
+    def feed(self, chunk: str) -> list[dict]:
+        self.text += chunk
+        deltas = []
+        for ch in chunk:
+            if self.done:
+                break
+            if self._in_string:
+                decoded = self._string_char(ch)
+                if decoded:
+                    self._append(decoded, deltas)
+            else:
+                self._structural_char(ch)
+        return deltas
+
+    def result(self):
+        if self.title is not None or self.lines:
+            return {"title": self.title or "", "lines": self.lines}
+
+        # 형식을 벗어난 응답은 기존 방식(정규식 + json.loads)으로 한 번 더 시도
+        match = re.search(r"\{[\s\S]*?\}", self.text)
+        try:
+            return json.loads(match.group(0)) if match else None
+        except ValueError:
+            return None
+
+    def _structural_char(self, ch: str):
+        if not self._stack:
+            if ch == "{":
+                self._stack.append("{")
+            return
+
+        top_level = len(self._stack) == 1
+        if ch == '"':
+            self._in_string = True
+            if top_level and not self._expect_value:
+                self._target = ("key",)
+                self._key_buffer = ""
+            elif top_level and self._key == "title":
+                self._target = ("title",)
+                self.title = ""
+            elif len(self._stack) == 2 and self._stack[-1] == "[" and self._key == "lines":
+                self._target = ("lines", len(self.lines))
+                self.lines.append("")
+            else:
+                self._target = None
+        elif ch == ":" and top_level:
+            self._expect_value = True
+        elif ch == "," and top_level:
+            self._expect_value = False
+        elif ch in "{[":
+            self._stack.append(ch)
+        elif ch in "}]":
+            self._stack.pop()
+            if not self._stack:
+                self.done = True
+
+    def _string_char(self, ch: str) -> str:
+        if self._escape is None:
+            if ch == "\\":
+                self._escape = ""
+                return ""
+            if ch == '"':
+                self._close_string()
+                return ""
+            return ch
+
+        if self._escape == "":
+            if ch == "u":
+                self._escape = "u"
+                return ""
+            self._escape = None
+            return self.ESCAPES.get(ch, ch)
+
+        self._escape += ch
+        if len(self._escape) < 5:
+            return ""
+        code = int(self._escape[1:], 16)
+        self._escape = None
+        if 0xD800 <= code < 0xDC00:
+            self._high_surrogate = code
+            return ""
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self._high_surrogate = None
+        return chr(code)
+
+    def _close_string(self):
+        self._in_string = False
+        if self._target == ("key",):
+            self._key = self._key_buffer
+        self._target = None
+
+    def _append(self, text: str, deltas: list):
+        target = self._target
+        if target is None:
+            return
+        if target[0] == "key":
+            self._key_buffer += text
+            return
+
+        if target[0] == "title":
+            self.title += text
+            delta = {"type": "delta", "field": "title", "delta": text}
+        else:
+            self.lines[target[1]] += text
+            delta = {"type": "delta", "field": "lines", "index": target[1], "delta": text}
+
+        # 같은 필드로 이어지는 문자는 하나의 delta 로 합친다
+        last = deltas[-1] if deltas else None
+        if last and last["field"] == delta["field"] and last.get("index") == delta.get("index"):
+            last["delta"] += text
+        else:
+            deltas.append(delta)
@@ -6,12 +6,18 @@ from prometheus_fastapi_instrumentator import Instrumentator
 from prometheus_client import Counter
 
 from app.core.auth import get_user_from_token
-from app.service.user import handle_recommendation
+from app.service.coalescing import handle_recommendation_coalesced
+from app.service.recommend_stream import handle_recommendation_stream
+from app.service.reason_jobs import get_user_reason_job, reason_pool
+from app.service.history_writer import history_writer
+from app.database.catalog import catalog
+from app.core.config import settings
 from app.service.usage import (
     get_user_recommendation_history,
     get_user_remaining_usage
 )
 from app.monitoring.metrics import recommendation_failures_total
+from app.monitoring.tracing import StageTimingMiddleware
 from app.translate.router import router as translate_router
 
 app = FastAPI()
@@ -35,8 +41,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# 추천 API 단계별 소요 시간 (Server-Timing 헤더 + 구조화 로그)
+app.add_middleware(StageTimingMiddleware, path_prefix="/api/v1/users/recommend")
+
 # Swagger UI 상단 Authorize 버튼 활성화
 def custom_openapi():
     if app.openapi_schema:
@@ -68,19 +78,45 @@ app.openapi = custom_openapi
 
 # 추천 요청 API
 @app.get("/api/v1/users/recommend")
-def recommend(
+async def recommend(
+    needs: str = Query(...),
+    category: str = Query(...),
+    latitude: float = Query(...),
+    longitude: float = Query(...),
+    defer_reason: bool = Query(False),
+    user=Depends(get_user_from_token)
+):
+    return await handle_recommendation_coalesced(user, needs, category, latitude, longitude, defer_reason)
+
+# 추천 스트리밍 API (SSE: 선택 결과 → reason 토큰 → 잔여 횟수)
+@app.get("/api/v1/users/recommend/stream")
+async def recommend_stream(
     needs: str = Query(...),
     category: str = Query(...),
     latitude: float = Query(...),
     longitude: float = Query(...),
     user=Depends(get_user_from_token)
 ):
-    return handle_recommendation(user, needs, category, latitude, longitude)
+    return await handle_recommendation_stream(user, needs, category, latitude, longitude)
 
-# 추천 이력 조회 API
+# 백그라운드 reason 조회 API (wait 초 동안 long-poll)
+@app.get("/api/v1/users/recommend/reason/{job_id}")
+async def get_recommendation_reason(
+    job_id: str,
+    wait: float = Query(0),
+    user=Depends(get_user_from_token)
+):
+    return await get_user_reason_job(user["userId"], job_id, wait)
+
+# 추천 이력 조회 API (최신순, nextCursor 로 다음 페이지 조회, compact 면 reason 제외)
 @app.get("/api/v1/users/recommend/history")
-def get_recommendation_history(user=Depends(get_user_from_token)):
-    return get_user_recommendation_history(user["userId"])
+def get_recommendation_history(
+    cursor: str = Query(None),
+    limit: int = Query(settings.HISTORY_PAGE_SIZE, ge=1, le=settings.HISTORY_MAX_PAGE_SIZE),
+    compact: bool = Query(False),
+    user=Depends(get_user_from_token)
+):
+    return get_user_recommendation_history(user["userId"], cursor, limit, compact)
 
 # 잔여 요청 횟수 조회 API
 @app.get("/api/v1/users/usage")
@@ -88,3 +124,14 @@ def get_remaining_usage_all(user=Depends(get_user_from_token)):
     return get_user_remaining_usage(user["userId"])
 
 app.include_router(translate_router)
+
+# 시작 시 카탈로그와 아이템 임베딩 인덱스를 백그라운드에서 미리 준비
+@app.on_event("startup")
+def warm_catalog():
+    catalog.warm()
+
+# 종료 시 대기 중인 reason 작업을 제한 시간까지 처리한 뒤 버퍼에 남은 추천 이력을 저장
+@app.on_event("shutdown")
+def drain_background_work():
+    reason_pool.drain(settings.REASON_SHUTDOWN_TIMEOUT_SECONDS)
+    history_writer.close(settings.HISTORY_SHUTDOWN_TIMEOUT_SECONDS)
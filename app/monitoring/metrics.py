@@ -1,6 +1,236 @@
-from prometheus_client import Counter
+from prometheus_client import Counter, Enum, Gauge, Histogram
 
 recommendation_failures_total = Counter(
     "recommendation_failures_total",
     "Total number of failed recommendations"
 )
+
+# 카탈로그 스냅샷
+catalog_refresh_duration_seconds = Histogram(
+    "catalog_refresh_duration_seconds",
+    "Time spent rebuilding the in-process catalog snapshot",
+    ["mode"]
+)
+
+catalog_refresh_failures_total = Counter(
+    "catalog_refresh_failures_total",
+    "Total number of failed catalog snapshot refreshes",
+    ["mode"]
+)
+
+catalog_staleness_seconds = Gauge(
+    "catalog_staleness_seconds",
+    "Seconds since the catalog snapshot was last refreshed successfully"
+)
+
+catalog_items = Gauge(
+    "catalog_items",
+    "Number of items held in the current catalog snapshot",
+    ["kind"]
+)
+
+# PostgreSQL 커넥션 풀
+db_pool_checkout_wait_seconds = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting to check out a PostgreSQL connection from the pool",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+db_pool_checkout_timeouts_total = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Total number of pool checkouts that timed out"
+)
+
+db_pool_connections_in_use = Gauge(
+    "db_pool_connections_in_use",
+    "Number of PostgreSQL connections currently checked out"
+)
+
+db_pool_max_connections = Gauge(
+    "db_pool_max_connections",
+    "Configured upper bound of the PostgreSQL connection pool"
+)
+
+# 웹 검색 투기적 선조회
+web_speculation_total = Counter(
+    "web_speculation_total",
+    "Speculative web-fact prefetch outcomes for the chosen content",
+    ["outcome"]
+)
+
+web_speculation_wasted_total = Counter(
+    "web_speculation_wasted_total",
+    "Speculative web searches started for contents that were not chosen"
+)
+
+# 웹 검색 캐시
+websearch_cache_requests_total = Counter(
+    "websearch_cache_requests_total",
+    "Web search cache lookups by result (local_hit, redis_hit, miss, coalesced)",
+    ["kind", "result"]
+)
+
+websearch_latency_seconds = Histogram(
+    "websearch_latency_seconds",
+    "Latency of live DuckDuckGo searches (in seconds)"
+)
+
+# LLM reason 캐시
+llm_reason_cache_requests_total = Counter(
+    "llm_reason_cache_requests_total",
+    "LLM reason cache lookups by prompt kind and result (hit, miss)",
+    ["kind", "result"]
+)
+
+# 사전 생성된 크리에이터 reason
+creator_reason_store_requests_total = Counter(
+    "creator_reason_store_requests_total",
+    "Lookups of pre-generated creator reasons by result (hit, miss)",
+    ["result"]
+)
+
+# 사용자 벡터 재사용
+user_vector_source_total = Counter(
+    "user_vector_source_total",
+    "Where the request-path user vector came from (cache, stored, encoded, none)",
+    ["source"]
+)
+
+user_neighborhood_cache_requests_total = Counter(
+    "user_neighborhood_cache_requests_total",
+    "Similar-user neighborhood cache lookups by result (hit, miss)",
+    ["result"]
+)
+
+# SSE 스트리밍 추천
+recommendation_stream_ttfb_seconds = Histogram(
+    "recommendation_stream_ttfb_seconds",
+    "Time from request start to the first SSE event of a streamed recommendation",
+    ["needs"]
+)
+
+# 백그라운드 reason 생성
+reason_jobs_total = Counter(
+    "reason_jobs_total",
+    "Deferred reason jobs by outcome (queued, rejected, done, failed)",
+    ["outcome"]
+)
+
+reason_queue_depth = Gauge(
+    "reason_queue_depth",
+    "Number of deferred reason jobs waiting for a worker"
+)
+
+reason_job_duration_seconds = Histogram(
+    "reason_job_duration_seconds",
+    "Time spent generating a deferred reason, including web search"
+)
+
+# 중복 추천 요청 병합
+recommendation_coalesced_total = Counter(
+    "recommendation_coalesced_total",
+    "Recommend requests answered with another in-flight request's result, by source (local, redis)",
+    ["source"]
+)
+
+# Bedrock 동시성 governor
+bedrock_in_flight = Gauge(
+    "bedrock_in_flight",
+    "Bedrock calls currently in flight"
+)
+
+bedrock_queued = Gauge(
+    "bedrock_queued",
+    "Bedrock calls waiting for a concurrency slot"
+)
+
+bedrock_concurrency_limit = Gauge(
+    "bedrock_concurrency_limit",
+    "Current adaptive (AIMD) Bedrock concurrency limit"
+)
+
+bedrock_throttled_total = Counter(
+    "bedrock_throttled_total",
+    "Bedrock calls that failed with a throttling response"
+)
+
+bedrock_rejected_total = Counter(
+    "bedrock_rejected_total",
+    "Bedrock calls rejected by the governor without being sent, by reason (circuit_open, queue_full, queue_timeout)",
+    ["reason"]
+)
+
+bedrock_circuit_state = Enum(
+    "bedrock_circuit_state",
+    "Bedrock circuit breaker state",
+    states=["closed", "open", "half_open"]
+)
+
+# Hedged requests
+hedges_fired_total = Counter(
+    "hedges_fired_total",
+    "Duplicate (hedge) requests sent because the original was slower than the hedge delay",
+    ["call"]
+)
+
+hedges_won_total = Counter(
+    "hedges_won_total",
+    "Hedge requests that returned before the original request",
+    ["call"]
+)
+
+hedges_suppressed_total = Counter(
+    "hedges_suppressed_total",
+    "Hedges skipped because the hedge-rate budget was exhausted",
+    ["call"]
+)
+
+hedge_delay_seconds = Gauge(
+    "hedge_delay_seconds",
+    "Current hedge delay (observed latency quantile or the configured default)",
+    ["call"]
+)
+
+# 추천 파이프라인 단계별 지연 시간
+recommendation_stage_seconds = Histogram(
+    "recommendation_stage_seconds",
+    "Latency of each recommendation pipeline stage",
+    ["stage", "needs"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+history_cache_requests_total = Counter(
+    "history_cache_requests_total",
+    "Recommendation history page cache lookups by result (hit, miss, error)",
+    ["result"]
+)
+
+# 추천 이력 write-behind
+history_write_queue_depth = Gauge(
+    "history_write_queue_depth",
+    "Recommendation history records buffered and not yet flushed"
+)
+
+history_flush_duration_seconds = Histogram(
+    "history_flush_duration_seconds",
+    "Time to write one batch of recommendation history records",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+history_flush_batch_size = Histogram(
+    "history_flush_batch_size",
+    "Records per recommendation history flush",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500)
+)
+
+history_records_written_total = Counter(
+    "history_records_written_total",
+    "Recommendation history records written (batch: write-behind flush, inline: buffer disabled or full)",
+    ["mode"]
+)
+
+history_records_dropped_total = Counter(
+    "history_records_dropped_total",
+    "Recommendation history records dropped (flush_failed, shutdown)",
+    ["reason"]
+)
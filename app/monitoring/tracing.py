@@ -0,0 +1,133 @@
+import contextvars
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qs
+from app.monitoring.metrics import recommendation_stage_seconds
+
+KNOWN_NEEDS = {"contents", "creator"}
+
+
+class RequestTrace:
+    """
+    요청 하나의 단계별 소요 시간. run_blocking / hedge 스레드로 전파된 context 에서도 같은 객체에 기록된다
+    """
+
+    def __init__(self, needs: str):
+        self.needs = needs
+        self.started = time.perf_counter()
+        self.spans = []
+        self.attrs = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.spans.append((stage, seconds))
+
+    def totals(self) -> dict:
+        # 같은 단계가 여러 번 실행되면 합산
+        totals = {}
+        with self._lock:
+            for stage, seconds in self.spans:
+                totals[stage] = totals.get(stage, 0.0) + seconds
+        return totals
+
+    def server_timing(self) -> str:
+        entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.totals().items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+def normalize_needs(needs) -> str:
+    needs = (needs or "").strip().lower()
+    return needs if needs in KNOWN_NEEDS else "other"
+
+
+def annotate(**attrs):
+    """
+    현재 요청 trace 로그에 남길 속성 추가 (userId 등)
+    """
+    trace = current_trace.get()
+    if trace is not None:
+        trace.attrs.update(attrs)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    블록 실행 시간을 recommendation_stage_seconds{stage, needs} 와 현재 요청 trace 에 기록
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        trace = current_trace.get()
+        recommendation_stage_seconds.labels(stage=name, needs=trace.needs if trace else "none").observe(seconds)
+        if trace is not None:
+            trace.add(name, seconds)
+
+
+def traced(name: str):
+    """
+    함수 전체를 하나의 단계로 기록하는 데코레이터
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def log_trace(trace: RequestTrace, path: str, status: int):
+    print(json.dumps({
+        "event": "request_trace",
+        "path": path,
+        "needs": trace.needs,
+        "status": status,
+        "total_ms": round((time.perf_counter() - trace.started) * 1000, 1),
+        "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in trace.totals().items()},
+        **trace.attrs,
+    }), flush=True)
+
+
+class StageTimingMiddleware:
+    """
+    path_prefix 아래 요청마다 trace 를 열고, 응답 시작 시점까지의 단계별 시간을 Server-Timing 헤더로,
+    요청이 끝나면 전체 breakdown 을 구조화 로그(JSON 한 줄)로 남긴다.
+    """
+
+    def __init__(self, app, path_prefix: str):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            return await self.app(scope, receive, send)
+
+        query = parse_qs(scope.get("query_string", b"").decode())
+        trace = RequestTrace(normalize_needs(query.get("needs", [None])[0]))
+        token = current_trace.set(trace)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_trace.reset(token)
+            log_trace(trace, scope["path"], status)
@@ -1,6 +1,103 @@
-from sentence_transformers import SentenceTransformer
+import hashlib
+import numpy as np
+from app.core.config import settings
+from app.monitoring.tracing import traced
 
-model = SentenceTransformer("models/all-MiniLM-L6-v2")
 
+class TorchEmbeddingBackend:
+    """
+    sentence-transformers (PyTorch) 기반 기본 백엔드
+    """
+
+    def __init__(self, model_path: str, threads: int = 0):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads > 0:
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_path)
+
+    def encode(self, texts: list[str], batch_size: int) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size)
+
+
+class OnnxEmbeddingBackend:
+    """
+    int8 동적 양자화된 ONNX 모델 + tokenizers 기반 백엔드 (torch import 없음)
+
+    sentence-transformers 파이프라인(Transformer → mean pooling → Normalize)을 그대로 재현한다.
+    """
+
+    def __init__(self, model_path: str, onnx_path: str, threads: int = 0, max_seq_length: int = 256):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        options = ort.SessionOptions()
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(f"{model_path}/tokenizer.json")
+        self.tokenizer.enable_truncation(max_length=max_seq_length)
+        self.tokenizer.enable_padding()
+
+    def encode(self, texts: list[str], batch_size: int) -> np.ndarray:
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feed["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+            token_embeddings = self.session.run(None, feed)[0]
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            outputs.append(pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None))
+        return np.vstack(outputs) if outputs else np.empty((0, 0), dtype=np.float32)
+
+
+class HashEmbeddingBackend:
+    """
+    모델 없이 텍스트 해시로 만드는 결정적 단위 벡터 (벤치마크 / 로컬 개발용, 의미 유사도 없음)
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def encode(self, texts: list[str], batch_size: int) -> np.ndarray:
+        vectors = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.sha1(text.encode()).digest()[:8], "little")
+            vectors[i] = np.random.default_rng(seed).standard_normal(self.dim)
+        return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def load_backend(name: str = None):
+    name = name or settings.EMBEDDING_BACKEND
+    if name == "hash":
+        return HashEmbeddingBackend(settings.VECTOR_DIMENSION)
+    if name == "onnx":
+        return OnnxEmbeddingBackend(settings.EMBEDDING_MODEL_PATH, settings.EMBEDDING_ONNX_PATH, settings.EMBEDDING_THREADS)
+    if name == "torch":
+        return TorchEmbeddingBackend(settings.EMBEDDING_MODEL_PATH, settings.EMBEDDING_THREADS)
+    raise ValueError(f"Unknown embedding backend: {name}")
+
+
+backend = load_backend()
+
+
+def get_embeddings(texts: list[str], batch_size: int = None) -> list[list[float]]:
+    """
+    여러 텍스트를 batch_size 단위로 한 번에 인코딩
+    """
+    if not texts:
+        return []
+    return backend.encode(list(texts), batch_size or settings.EMBEDDING_BATCH_SIZE).tolist()
+
+
+@traced("embedding")
 def get_embedding(text: str) -> list[float]:
-    return model.encode(text).tolist()
+    return get_embeddings([text])[0]
@@ -0,0 +1,123 @@
+import hashlib
+import numpy as np
+
+
+def content_text(content: dict) -> str:
+    hashtags = ", ".join(content.get("hashtags") or [])
+    return f"Title: {content['title']}, Desc: {content['desc']}, Tags: {hashtags}"
+
+
+def creator_text(creator: dict) -> str:
+    category = creator.get("category")
+    category = ", ".join(category) if isinstance(category, list) else (category or "")
+    return f"Introduction: {creator.get('introduction') or ''}, Category: {category}"
+
+
+class ItemEmbeddingIndex:
+    """
+    카탈로그 아이템(콘텐츠/크리에이터) 임베딩을 하나의 연속된 float32 행렬로 보관.
+
+    build 시 이전 인덱스를 넘기면 텍스트 해시가 같은 아이템은 재사용하고 바뀐 아이템만 다시 인코딩한다.
+    """
+
+    def __init__(self, ids: list, text_hashes: list, matrix: np.ndarray):
+        self.ids = ids
+        self.text_hashes = text_hashes
+        self.matrix = matrix
+        self.positions = {item_id: i for i, item_id in enumerate(ids)}
+
+    @classmethod
+    def build(cls, items: list, text_fn, previous: "ItemEmbeddingIndex" = None) -> "ItemEmbeddingIndex":
+        from app.recommender.embedding import get_embeddings
+
+        ids = [item["id"] for item in items]
+        texts = [text_fn(item) for item in items]
+        text_hashes = [hashlib.sha1(text.encode()).hexdigest() for text in texts]
+
+        reused = {}
+        if previous is not None:
+            for i, (item_id, text_hash) in enumerate(zip(ids, text_hashes)):
+                position = previous.positions.get(item_id)
+                if position is not None and previous.text_hashes[position] == text_hash:
+                    reused[i] = previous.matrix[position]
+
+        changed = [i for i in range(len(items)) if i not in reused]
+        encoded = get_embeddings([texts[i] for i in changed])
+
+        dim = len(encoded[0]) if encoded else (previous.matrix.shape[1] if previous is not None else 0)
+        matrix = np.empty((len(items), dim), dtype=np.float32)
+        for i, vector in reused.items():
+            matrix[i] = vector
+        for i, vector in zip(changed, encoded):
+            matrix[i] = vector
+
+        # 코사인 유사도를 내적으로 계산하도록 정규화
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True) if len(items) else 1.0
+        matrix /= np.clip(norms, 1e-12, None)
+        return cls(ids, text_hashes, matrix)
+
+    def scores(self, vector, item_ids: list) -> np.ndarray:
+        """
+        item_ids 각각과 vector 의 코사인 유사도 (인덱스에 없는 아이템은 0)
+        """
+        q = np.asarray(vector, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        positions = np.asarray([self.positions.get(item_id, -1) for item_id in item_ids], dtype=np.int64)
+        known = positions >= 0
+
+        result = np.zeros(len(item_ids), dtype=np.float32)
+        if known.any():
+            result[known] = self.matrix[positions[known]] @ q
+        return result
+
+
+def preference_scores(items: list, similar_user_metadata: list, key: str) -> np.ndarray:
+    """
+    유사 사용자 선호 순서를 점수로 변환 (앞 순위일수록 1 에 가깝고, 없으면 0)
+    """
+    preferred_ids = []
+    for meta in similar_user_metadata:
+        preferred_ids.extend(meta.get(key, []))
+    if not preferred_ids:
+        return np.zeros(len(items), dtype=np.float32)
+
+    first_rank = {}
+    for rank, item_id in enumerate(preferred_ids):
+        first_rank.setdefault(item_id, rank)
+    return np.asarray([
+        1.0 - first_rank[str(item["id"])] / len(preferred_ids) if str(item["id"]) in first_rank else 0.0
+        for item in items
+    ], dtype=np.float32)
+
+
+def rank_by_similarity(items: list, index: ItemEmbeddingIndex, user_embedding, similar_user_metadata: list,
+                       key: str, k: int, preference_weight: float) -> list:
+    """
+    사용자 벡터와의 유사도 + 유사 사용자 선호 가중치로 상위 k 개를 점수 순으로 반환
+    """
+    if not items:
+        return []
+    scores = index.scores(user_embedding, [item["id"] for item in items])
+    scores = scores + preference_weight * preference_scores(items, similar_user_metadata, key)
+
+    k = min(k, len(items))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [items[i] for i in top]
+
+
+def attach_item_indexes(snapshot, previous=None):
+    """
+    카탈로그 스냅샷에 콘텐츠/크리에이터 임베딩 인덱스를 붙인 새 스냅샷 반환 (이전 스냅샷 인덱스 재사용)
+    """
+    from dataclasses import replace
+
+    return replace(
+        snapshot,
+        content_index=ItemEmbeddingIndex.build(
+            snapshot.contents, content_text, previous.content_index if previous else None
+        ),
+        creator_index=ItemEmbeddingIndex.build(
+            snapshot.creators, creator_text, previous.creator_index if previous else None
+        ),
+    )
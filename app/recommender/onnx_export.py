@@ -0,0 +1,87 @@
+"""
+번들된 MiniLM 모델을 ONNX 로 내보내고 int8 동적 양자화 후, torch 백엔드와 코사인 유사도로 정확도를 비교한다.
+
+    PYTHONPATH=. python -m app.recommender.onnx_export export
+    PYTHONPATH=. python -m app.recommender.onnx_export check
+"""
+import os
+import sys
+import time
+import numpy as np
+from app.core.config import settings
+
+SAMPLE_TEXTS = [
+    "Title: Seoul night market tour, Desc: Street food and neon alleys, Category: FOOD, Tags: market, night, Creator: trit",
+    "Title: Jeju Olle trail, Desc: Coastal hiking with ocean views, Category: NATURE, Tags: hiking, sea, Creator: walker",
+    "Title: Busan Gamcheon village, Desc: Colorful houses and murals on the hillside, Category: CULTURE, Tags: art, village",
+    "Title: Hidden cafe in Seongsu, Desc: Industrial interior with specialty coffee, Category: CAFE, Tags: coffee, brunch",
+    "K-pop dance studio experience for beginners",
+    "",
+]
+
+
+def export_onnx(model_path: str = None, onnx_path: str = None):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    model_path = model_path or settings.EMBEDDING_MODEL_PATH
+    onnx_path = onnx_path or settings.EMBEDDING_ONNX_PATH
+    fp32_path = onnx_path.replace(".onnx", "_fp32.onnx")
+    os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModel.from_pretrained(model_path).eval()
+    dummy = tokenizer(["export sample"], return_tensors="pt")
+
+    torch.onnx.export(
+        model,
+        (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+        fp32_path,
+        input_names=["input_ids", "attention_mask", "token_type_ids"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "token_type_ids": {0: "batch", 1: "sequence"},
+            "last_hidden_state": {0: "batch", 1: "sequence"},
+        },
+        opset_version=14,
+    )
+    quantize_dynamic(fp32_path, onnx_path, weight_type=QuantType.QInt8)
+    print(f"✅ Exported {fp32_path} ({os.path.getsize(fp32_path) / 1e6:.1f} MB)")
+    print(f"✅ Quantized {onnx_path} ({os.path.getsize(onnx_path) / 1e6:.1f} MB)")
+
+
+def check_accuracy(texts: list[str] = None, min_cosine: float = 0.98) -> bool:
+    from app.recommender.embedding import TorchEmbeddingBackend, OnnxEmbeddingBackend
+
+    texts = texts or SAMPLE_TEXTS
+    batch_size = settings.EMBEDDING_BATCH_SIZE
+    torch_backend = TorchEmbeddingBackend(settings.EMBEDDING_MODEL_PATH, settings.EMBEDDING_THREADS)
+    onnx_backend = OnnxEmbeddingBackend(settings.EMBEDDING_MODEL_PATH, settings.EMBEDDING_ONNX_PATH, settings.EMBEDDING_THREADS)
+
+    timings = {}
+    vectors = {}
+    for name, backend in (("torch", torch_backend), ("onnx", onnx_backend)):
+        backend.encode(texts, batch_size)  # warm-up
+        started = time.perf_counter()
+        vectors[name] = np.asarray(backend.encode(texts, batch_size), dtype=np.float32)
+        timings[name] = time.perf_counter() - started
+
+    # 두 백엔드 모두 정규화된 벡터를 반환하므로 내적이 곧 코사인 유사도
+    cosines = (vectors["torch"] * vectors["onnx"]).sum(axis=1)
+    print(f"cosine min={cosines.min():.4f} mean={cosines.mean():.4f} over {len(texts)} texts")
+    print(f"latency torch={timings['torch'] * 1000:.1f}ms onnx={timings['onnx'] * 1000:.1f}ms (batch of {len(texts)})")
+    return bool(cosines.min() >= min_cosine)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "export"
+    if command == "export":
+        export_onnx()
+    elif command == "check":
+        sys.exit(0 if check_accuracy() else 1)
+    else:
+        print(f"❌ Unknown command: {command}")
+        sys.exit(2)
@@ -1,184 +1,466 @@
-from app.utils.distance import calculate_distance
+import asyncio
+from app.utils.spatial import LocationIndex
+from app.database.catalog import normalize_key
 from app.llm.bedrock import ask_llama_for_json, generate_reason_emotional, generate_creator_reason
-from app.utils.websearch import search_web, summarize_place_facts, extract_top_keywords
+from app.llm.creator_reasons import get_stored_creator_reason
+from app.utils.websearch import get_place_insight
 from app.behavior.user_behavior import fetch_user_behavior_text
 from app.recommender.embedding import get_embedding
-from app.database.pinecone_client import query_similar_users
+from app.database.pinecone_client import query_similar_users, fetch_user_vector
+from app.core.executor import run_blocking
+from app.core.config import settings
+from app.utils.cache import TTLCache
+from app.recommender.item_index import rank_by_similarity
+from app.monitoring.metrics import (
+    web_speculation_total,
+    web_speculation_wasted_total,
+    user_vector_source_total,
+    user_neighborhood_cache_requests_total,
+)
+from app.monitoring.tracing import traced
 
+# 사용자 벡터 로컬 사본과 (user_id, last_updated_at) 기준 유사 사용자 캐시
+user_vector_cache = TTLCache(settings.USER_NEIGHBORHOOD_CACHE_MAXSIZE, settings.USER_VECTOR_CACHE_TTL_SECONDS)
+neighborhood_cache = TTLCache(settings.USER_NEIGHBORHOOD_CACHE_MAXSIZE, settings.USER_NEIGHBORHOOD_CACHE_TTL_SECONDS)
 
-def generate_recommendation(user, contents, locations, creators):
-    needs = user["needs"].lower()
+
+def query_similar_user_metadata(user_embedding) -> list:
+    similar_user_results = query_similar_users(user_embedding, top_k=5)
+    return [match["metadata"] for match in similar_user_results.matches if match.get("metadata")]
+
+
+def get_stored_user_vector(user_id: int):
+    stored = user_vector_cache.get(user_id)
+    if stored is not None:
+        user_vector_source_total.labels(source="cache").inc()
+        return stored
+
+    stored = fetch_user_vector(str(user_id))
+    if stored is not None:
+        user_vector_source_total.labels(source="stored").inc()
+        user_vector_cache.set(user_id, stored)
+    return stored
+
+
+def find_user_signals(user_id: int):
+    """
+    (사용자 벡터, 유사 사용자 메타데이터 목록) 반환. 벡터가 없으면 (None, [])
+    """
+    # 배치로 저장해 둔 벡터가 있으면 행동 조회/인코딩 없이 바로 이웃 검색
+    if settings.USER_VECTOR_MODE == "stored":
+        stored = get_stored_user_vector(user_id)
+        if stored is not None:
+            user_embedding, metadata = stored
+            key = (user_id, metadata.get("last_updated_at"))
+            similar_user_metadata = neighborhood_cache.get(key)
+            if similar_user_metadata is not None:
+                user_neighborhood_cache_requests_total.labels(result="hit").inc()
+                return user_embedding, similar_user_metadata
+
+            user_neighborhood_cache_requests_total.labels(result="miss").inc()
+            similar_user_metadata = query_similar_user_metadata(user_embedding)
+            neighborhood_cache.set(key, similar_user_metadata)
+            return user_embedding, similar_user_metadata
 
     # 사용자 행동 임베딩 생성 및 유사 사용자 검색
-    user_behavior_text = fetch_user_behavior_text(user["userId"])
+    user_behavior_text = fetch_user_behavior_text(user_id)
     user_embedding = get_embedding(user_behavior_text) if user_behavior_text else None
 
+    user_vector_source_total.labels(source="encoded" if user_embedding else "none").inc()
+
     similar_user_metadata = []
     if user_embedding:
-        similar_user_results = query_similar_users(user_embedding, top_k=5)
-        similar_user_metadata = [match["metadata"] for match in similar_user_results.matches if match.get("metadata")]
+        similar_user_metadata = query_similar_user_metadata(user_embedding)
+    return user_embedding, similar_user_metadata
 
-    if needs == "contents":
-        matched_contents = [
-            c for c in contents
-            if c["category"].strip().upper() == user["category"].strip().upper()
-        ]
-
-        # 콘텐츠 없을 경우
-        if not matched_contents:
-            return {
-                "userId": user["userId"],
-                "message": {
-                    "recommendation": {
-                        "contentsId": None,
-                        "creatorId": None,
-                        "reason": {
-                            "title": "No recommendation",
-                            "lines": [f"There is no {user['category']} content available for you at the moment."]
-                        }
-                    }
-                }
-            }
 
-        # 유사 사용자들이 선호한 콘텐츠 우선순위 반영
-        preferred_content_ids = []
-        for meta in similar_user_metadata:
-            preferred_content_ids.extend(meta.get("preferred_content_ids", []))
+def find_similar_user_metadata(user_id: int) -> list:
+    return find_user_signals(user_id)[1]
 
-        sorted_contents = sorted(
-            matched_contents,
-            key=lambda c: preferred_content_ids.index(str(c["id"])) if str(c["id"]) in preferred_content_ids else len(preferred_content_ids)
-        ) if preferred_content_ids else matched_contents
 
-        llama_result = ask_llama_for_json(user, sorted_contents, "contents")
+@traced("ranking")
+def rank_candidates(items: list, similar_user_metadata: list, key: str, item_index=None, user_embedding=None):
+    """
+    (정렬된 후보, 우선순위 순 여부) 반환.
+    사용자 벡터와 아이템 임베딩 인덱스가 있으면 유사도 + 선호 가중치로 상위 LLM_CANDIDATES 개,
+    없으면 유사 사용자 선호 순서로 정렬한 전체 목록 (선호 정보가 전혀 없으면 순서 없음)
+    """
+    if item_index is not None and user_embedding is not None:
+        return rank_by_similarity(
+            items, item_index, user_embedding, similar_user_metadata, key,
+            settings.LLM_CANDIDATES, settings.ITEM_PREFERENCE_WEIGHT
+        ), True
+    ordered = any(meta.get(key) for meta in similar_user_metadata)
+    return rank_by_preference(items, similar_user_metadata, key), ordered
 
-        if llama_result:
-            recommended_content_id = llama_result.get("contentsId")
-            recommended = next((c for c in matched_contents if c["id"] == recommended_content_id), None)
-
-            # 웹 검색 기반 reason 생성
-            if recommended:
-                query = f"{recommended['title']} {user['category']} travel"
-                web_results = search_web(query)
-                place_facts = summarize_place_facts(web_results)
-                keywords = extract_top_keywords(web_results)
-
-                reason_result = generate_reason_emotional(
-                    user=user,
-                    place_name=recommended["title"],
-                    category=recommended["category"],
-                    place_facts=place_facts,
-                    keywords=keywords
-                )
-            else:
-                reason_result = None
-
-            # 관련 장소 찾기
-            related_locations = [loc for loc in locations if loc["contents_id"] == recommended_content_id]
-            user_lat, user_lon = float(user["latitude"]), float(user["longitude"])
-
-            nearest = min(
-                related_locations,
-                key=lambda loc: calculate_distance(user_lat, user_lon, loc["latitude"], loc["longitude"]),
-                default=None
-            )
-
-            content_info = {
-                "contentsId": recommended_content_id,
-                "thumbnail": recommended["thumbnail"],
-                "locationId": nearest["id"] if nearest else None,
-                "latitude": nearest["latitude"] if nearest else None,
-                "longitude": nearest["longitude"] if nearest else None,
-                "googleMapId": nearest["google_map_id"] if nearest else None,
-            } if nearest else None
-        else:
-            content_info = None
-            reason_result = None
-
-        return {
-            "userId": user["userId"],
-            "message": {
-                "recommendation": {
-                    "contentsId": content_info,
-                    "creatorId": None,
-                    "reason": (
-                        reason_result if reason_result
-                        else {"title": "Recommendation", "lines": [llama_result.get("reason")]} if llama_result
-                        else {"title": "Recommendation", "lines": ["Could not generate content recommendation."]}
-                    )
+
+def rank_by_preference(items: list, similar_user_metadata: list, key: str) -> list:
+    # 유사 사용자들이 선호한 id 순서대로 우선순위 반영
+    preferred_ids = []
+    for meta in similar_user_metadata:
+        preferred_ids.extend(meta.get(key, []))
+
+    return sorted(
+        items,
+        key=lambda c: preferred_ids.index(str(c["id"])) if str(c["id"]) in preferred_ids else len(preferred_ids)
+    ) if preferred_ids else items
+
+
+@traced("matching")
+def match_contents(user, contents, catalog=None) -> list:
+    # 카탈로그 스냅샷의 category 역색인이 있으면 O(매칭 수)로 조회
+    if catalog:
+        return catalog.contents_by_category.get(normalize_key(user["category"]), [])
+
+    return [
+        c for c in contents
+        if c["category"].strip().upper() == user["category"].strip().upper()
+    ]
+
+
+@traced("matching")
+def match_creators(user, creators, catalog=None) -> list:
+    user_category = (user.get("category") or "").strip().upper()
+    user_country = (user.get("country") or "").strip().upper()
+
+    if catalog:
+        return catalog.creators_by_category_country.get((user_category, user_country), [])
+
+    creators_same_category = [
+        c for c in creators
+        if user_category in [cat.strip().upper() for cat in (c.get("category") or [])]
+    ]
+
+    return [
+        c for c in creators_same_category
+        if (c.get("country") or "").strip().upper() == user_country
+    ]
+
+
+def place_query(user, content) -> str:
+    return f"{content['title']} {user['category']} travel"
+
+
+def generate_place_reason(user, recommended, place_insight=None):
+    # 웹 검색 기반 reason 생성
+    place_facts, keywords = place_insight or get_place_insight(place_query(user, recommended))
+
+    return generate_reason_emotional(
+        user=user,
+        place_name=recommended["title"],
+        category=recommended["category"],
+        place_facts=place_facts,
+        keywords=keywords
+    )
+
+
+@traced("nearest_location")
+def find_nearest_location(user, locations, contents_id, catalog=None):
+    # 관련 장소 찾기 (카탈로그 스냅샷의 공간 인덱스 사용, 없으면 즉석에서 생성)
+    location_index = catalog.location_index if catalog else LocationIndex(locations)
+    return location_index.nearest(contents_id, float(user["latitude"]), float(user["longitude"]))
+
+
+def build_content_info(recommended, recommended_content_id, nearest):
+    return {
+        "contentsId": recommended_content_id,
+        "thumbnail": recommended["thumbnail"],
+        "locationId": nearest["id"] if nearest else None,
+        "latitude": nearest["latitude"] if nearest else None,
+        "longitude": nearest["longitude"] if nearest else None,
+        "googleMapId": nearest["google_map_id"] if nearest else None,
+    } if nearest else None
+
+
+def no_contents_response(user):
+    return {
+        "userId": user["userId"],
+        "message": {
+            "recommendation": {
+                "contentsId": None,
+                "creatorId": None,
+                "reason": {
+                    "title": "No recommendation",
+                    "lines": [f"There is no {user['category']} content available for you at the moment."]
                 }
             }
         }
+    }
 
-    elif needs == "creator":
-        user_category = (user.get("category") or "").strip().upper()
-        user_country = (user.get("country") or "").strip().upper()
-
-        creators_same_category = [
-            c for c in creators
-            if user_category in [cat.strip().upper() for cat in (c.get("category") or [])]
-        ]
-
-        matched_creators = [
-            c for c in creators_same_category
-            if (c.get("country") or "").strip().upper() == user_country
-        ]
-
-        # 유사 사용자들의 선호 크리에이터 우선 반영
-        preferred_creator_ids = []
-        for meta in similar_user_metadata:
-            preferred_creator_ids.extend(meta.get("preferred_creator_ids", []))
-
-        sorted_creators = sorted(
-            matched_creators,
-            key=lambda c: preferred_creator_ids.index(str(c["id"])) if str(c["id"]) in preferred_creator_ids else len(preferred_creator_ids)
-        ) if preferred_creator_ids else matched_creators
-
-        # 크리에이터 없을 경우
-        if not sorted_creators:
-            return {
-                "userId": user["userId"],
-                "message": {
-                    "recommendation": {
-                        "contentsId": None,
-                        "creatorId": None,
-                        "reason": {
-                            "title": "No creator found",
-                            "lines": [f"No creators match your category and country."]
-                        }
-                    }
-                }
+
+def contents_response(user, content_info, reason_result, llama_result):
+    return {
+        "userId": user["userId"],
+        "message": {
+            "recommendation": {
+                "contentsId": content_info,
+                "creatorId": None,
+                "reason": (
+                    reason_result if reason_result
+                    else {"title": "Recommendation", "lines": [llama_result.get("reason")]} if llama_result
+                    else {"title": "Recommendation", "lines": ["Could not generate content recommendation."]}
+                )
             }
+        }
+    }
+
 
-        selected = sorted_creators[0]
-        reason = generate_creator_reason(user, selected)
-
-        return {
-            "userId": user["userId"],
-            "message": {
-                "recommendation": {
-                    "contentsId": None,
-                    "creatorId": {
-                        "creatorId": selected["id"],
-                        "instruction": selected["introduction"],
-                        "youtube": selected["youtube"]
-                    },
-                    "reason": reason if reason else {
-                        "title": "Matched Creator",
-                        "lines": ["A creator matching your interest has been selected."]
-                    }
+def no_creator_response(user):
+    return {
+        "userId": user["userId"],
+        "message": {
+            "recommendation": {
+                "contentsId": None,
+                "creatorId": None,
+                "reason": {
+                    "title": "No creator found",
+                    "lines": [f"No creators match your category and country."]
                 }
             }
         }
+    }
 
-    else:
-        return {
-            "userId": user["userId"],
-            "message": {
-                "recommendation": {
-                    "contentsId": None,
-                    "creatorId": None,
-                    "reason": "Unknown needs type."
+
+def creator_response(user, selected, reason):
+    return {
+        "userId": user["userId"],
+        "message": {
+            "recommendation": {
+                "contentsId": None,
+                "creatorId": {
+                    "creatorId": selected["id"],
+                    "instruction": selected["introduction"],
+                    "youtube": selected["youtube"]
+                },
+                "reason": reason if reason else {
+                    "title": "Matched Creator",
+                    "lines": ["A creator matching your interest has been selected."]
                 }
             }
         }
+    }
+
+
+def unknown_needs_response(user):
+    return {
+        "userId": user["userId"],
+        "message": {
+            "recommendation": {
+                "contentsId": None,
+                "creatorId": None,
+                "reason": "Unknown needs type."
+            }
+        }
+    }
+
+
+def content_candidates(user, contents, similar_user_metadata, catalog=None, user_embedding=None) -> tuple:
+    """
+    (매칭된 콘텐츠, 정렬된 후보, 우선순위 순 여부). 유사도 계산이 있어 async 경로에서는 run_blocking 으로 호출
+    """
+    matched_contents = match_contents(user, contents, catalog)
+    if not matched_contents:
+        return [], [], False
+
+    content_index = catalog.content_index if catalog else None
+    sorted_contents, ranked = rank_candidates(
+        matched_contents, similar_user_metadata, "preferred_content_ids", content_index, user_embedding
+    )
+    return matched_contents, sorted_contents, ranked
+
+
+def pick_content(user, contents, similar_user_metadata, catalog=None, user_embedding=None):
+    """
+    후보를 매칭/정렬한 뒤 LLM 으로 하나를 고른다. (LLM 결과, 추천 콘텐츠) 반환, 매칭 후보가 없으면 None
+    """
+    matched_contents, sorted_contents, ranked = content_candidates(
+        user, contents, similar_user_metadata, catalog, user_embedding
+    )
+    if not matched_contents:
+        return None
+
+    llama_result = ask_llama_for_json(user, sorted_contents, "contents", ranked)
+
+    recommended = None
+    if llama_result:
+        recommended_content_id = llama_result.get("contentsId")
+        recommended = next((c for c in matched_contents if c["id"] == recommended_content_id), None)
+    return llama_result, recommended
+
+
+def pick_creator(user, creators, similar_user_metadata, catalog=None, user_embedding=None):
+    matched_creators = match_creators(user, creators, catalog)
+
+    # 사용자 벡터 유사도 + 유사 사용자들의 선호 크리에이터 우선 반영
+    creator_index = catalog.creator_index if catalog else None
+    sorted_creators, _ = rank_candidates(
+        matched_creators, similar_user_metadata, "preferred_creator_ids", creator_index, user_embedding
+    )
+    return sorted_creators[0] if sorted_creators else None
+
+
+def recommend_contents(user, contents, locations, similar_user_metadata, catalog=None, user_embedding=None):
+    picked = pick_content(user, contents, similar_user_metadata, catalog, user_embedding)
+
+    # 콘텐츠 없을 경우
+    if picked is None:
+        return no_contents_response(user)
+
+    llama_result, recommended = picked
+    if llama_result:
+        recommended_content_id = llama_result.get("contentsId")
+        reason_result = generate_place_reason(user, recommended) if recommended else None
+        nearest = find_nearest_location(user, locations, recommended_content_id, catalog)
+        content_info = build_content_info(recommended, recommended_content_id, nearest)
+    else:
+        content_info = None
+        reason_result = None
+
+    return contents_response(user, content_info, reason_result, llama_result)
+
+
+def recommend_creator(user, creators, similar_user_metadata, catalog=None, user_embedding=None):
+    selected = pick_creator(user, creators, similar_user_metadata, catalog, user_embedding)
+
+    # 크리에이터 없을 경우
+    if selected is None:
+        return no_creator_response(user)
+
+    # 배치로 미리 생성한 reason 을 우선 사용하고, 없을 때만 LLM 호출
+    reason = get_stored_creator_reason(selected, user) or generate_creator_reason(user, selected)
+    return creator_response(user, selected, reason)
+
+
+def generate_recommendation(user, contents, locations, creators, similar_user_metadata=None, catalog=None, user_embedding=None):
+    needs = user["needs"].lower()
+
+    if similar_user_metadata is None:
+        user_embedding, similar_user_metadata = find_user_signals(user["userId"])
+
+    if needs == "contents":
+        return recommend_contents(user, contents, locations, similar_user_metadata, catalog, user_embedding)
+    elif needs == "creator":
+        return recommend_creator(user, creators, similar_user_metadata, catalog, user_embedding)
+    else:
+        return unknown_needs_response(user)
+
+
+def start_speculative_insights(user, sorted_contents, fanout: int) -> dict:
+    tasks = {}
+    for content in sorted_contents[:max(fanout, 0)]:
+        task = asyncio.ensure_future(run_blocking(get_place_insight, place_query(user, content)))
+        # 버려지는 task 의 예외가 로그를 오염시키지 않도록 결과를 소비
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        tasks[content["id"]] = task
+    return tasks
+
+
+def discard_speculative_insights(tasks: dict):
+    # 이미 실행 중인 검색은 중단할 수 없으므로 결과만 버린다
+    for task in tasks.values():
+        task.cancel()
+    if tasks:
+        web_speculation_wasted_total.inc(len(tasks))
+
+
+async def generate_place_reason_async(user, recommended, place_insight_task=None):
+    place_insight = await place_insight_task if place_insight_task else None
+    return await run_blocking(generate_place_reason, user, recommended, place_insight)
+
+
+async def recommend_contents_async(user, contents, locations, similar_user_metadata, catalog=None, user_embedding=None):
+    # 매칭/정렬은 CPU 작업이라 이벤트 루프를 막지 않도록 스레드에서 실행
+    matched_contents, sorted_contents, ranked = await run_blocking(
+        content_candidates, user, contents, similar_user_metadata, catalog, user_embedding
+    )
+    if not matched_contents:
+        return no_contents_response(user)
+
+    # LLM 이 고르는 동안 상위 후보들의 웹 검색을 미리 시작
+    speculative = start_speculative_insights(user, sorted_contents, settings.WEB_SPECULATIVE_FANOUT)
+    try:
+        llama_result = await run_blocking(ask_llama_for_json, user, sorted_contents, "contents", ranked)
+    except BaseException:
+        discard_speculative_insights(speculative)
+        raise
+
+    if not llama_result:
+        discard_speculative_insights(speculative)
+        return contents_response(user, None, None, llama_result)
+
+    recommended_content_id = llama_result.get("contentsId")
+    recommended = next((c for c in matched_contents if c["id"] == recommended_content_id), None)
+
+    place_insight_task = speculative.pop(recommended_content_id, None) if recommended else None
+    if recommended and settings.WEB_SPECULATIVE_FANOUT > 0:
+        web_speculation_total.labels(outcome="hit" if place_insight_task else "miss").inc()
+    discard_speculative_insights(speculative)
+
+    # 웹 검색 + 감성 메시지 생성과 최근접 장소 계산은 서로 독립적
+    reason_task = (
+        generate_place_reason_async(user, recommended, place_insight_task) if recommended
+        else asyncio.sleep(0)
+    )
+    reason_result, nearest = await asyncio.gather(
+        reason_task,
+        run_blocking(find_nearest_location, user, locations, recommended_content_id, catalog)
+    )
+    content_info = build_content_info(recommended, recommended_content_id, nearest)
+    return contents_response(user, content_info, reason_result, llama_result)
+
+
+def generate_target_reason(user, target):
+    """
+    pick_recommendation_async 가 돌려준 reason 생성 대상으로 reason 생성
+    """
+    kind, item = target
+    if kind == "contents":
+        return generate_place_reason(user, item)
+    return generate_creator_reason(user, item)
+
+
+async def pick_recommendation_async(user, contents, locations, creators, similar_user_metadata, catalog=None,
+                                    user_embedding=None):
+    """
+    reason 생성 없이 아이템(+ 최근접 장소)만 고른다. (임시 reason 이 담긴 응답, reason 생성 대상) 반환.
+    대상은 ("contents", 콘텐츠) / ("creator", 크리에이터) 이고, 더 만들 reason 이 없으면 None
+    """
+    needs = user["needs"].lower()
+
+    if needs == "contents":
+        picked = await run_blocking(pick_content, user, contents, similar_user_metadata, catalog, user_embedding)
+        if picked is None:
+            return no_contents_response(user), None
+
+        llama_result, recommended = picked
+        content_info = None
+        if llama_result:
+            recommended_content_id = llama_result.get("contentsId")
+            nearest = await run_blocking(find_nearest_location, user, locations, recommended_content_id, catalog)
+            content_info = build_content_info(recommended, recommended_content_id, nearest)
+        result = contents_response(user, content_info, None, llama_result)
+        return result, ("contents", recommended) if recommended else None
+
+    elif needs == "creator":
+        selected = await run_blocking(pick_creator, user, creators, similar_user_metadata, catalog, user_embedding)
+        if selected is None:
+            return no_creator_response(user), None
+
+        stored_reason = await run_blocking(get_stored_creator_reason, selected, user)
+        return creator_response(user, selected, stored_reason), None if stored_reason else ("creator", selected)
+
+    return unknown_needs_response(user), None
+
+
+async def generate_recommendation_async(user, contents, locations, creators, similar_user_metadata, catalog=None, user_embedding=None):
+    """
+    generate_recommendation 의 asyncio 버전. 블로킹 단계는 전용 executor 에서 실행
+    """
+    needs = user["needs"].lower()
+
+    if needs == "contents":
+        return await recommend_contents_async(user, contents, locations, similar_user_metadata, catalog, user_embedding)
+    elif needs == "creator":
+        return await run_blocking(recommend_creator, user, creators, similar_user_metadata, catalog, user_embedding)
+    else:
+        return unknown_needs_response(user)
@@ -0,0 +1,18 @@
+import redis
+from app.core.config import settings
+
+# REDIS_* 설정 기반 공용 커넥션 풀
+pool = redis.ConnectionPool(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=settings.REDIS_DB,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    decode_responses=True
+)
+
+r = redis.Redis(connection_pool=pool)
+
+
+def get_redis() -> redis.Redis:
+    return r
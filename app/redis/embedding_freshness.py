@@ -0,0 +1,54 @@
+from datetime import datetime
+from app.redis.client import get_redis
+
+# 사용자별 "임베딩에 반영된 마지막 활동 시각" 과 갱신이 필요한 사용자 집합
+FRESHNESS_KEY = "embedding:freshness"
+DIRTY_KEY = "embedding:dirty"
+DIRTY_SCAN_KEY = "embedding:dirty_scan_at"
+
+
+def get_freshness(user_ids: list) -> dict:
+    """
+    HMGET 한 번으로 {user_id: 마지막으로 임베딩한 활동 시각} 조회 (기록 없는 사용자는 제외)
+    """
+    if not user_ids:
+        return {}
+    values = get_redis().hmget(FRESHNESS_KEY, [str(user_id) for user_id in user_ids])
+    return {
+        user_id: datetime.fromisoformat(value)
+        for user_id, value in zip(user_ids, values) if value
+    }
+
+
+def set_freshness(activity_times: dict):
+    """
+    임베딩 완료 후 {user_id: 활동 시각} 을 기록하고 dirty 목록에서 제거
+    """
+    if not activity_times:
+        return
+    pipe = get_redis().pipeline()
+    pipe.hset(FRESHNESS_KEY, mapping={str(k): v.isoformat() for k, v in activity_times.items()})
+    pipe.srem(DIRTY_KEY, *[str(k) for k in activity_times])
+    pipe.execute()
+
+
+def mark_users_dirty(user_ids: list):
+    if user_ids:
+        get_redis().sadd(DIRTY_KEY, *[str(user_id) for user_id in user_ids])
+
+
+def pop_dirty_users(count: int) -> list[int]:
+    return [int(user_id) for user_id in get_redis().spop(DIRTY_KEY, count) or []]
+
+
+def count_dirty_users() -> int:
+    return get_redis().scard(DIRTY_KEY)
+
+
+def get_last_dirty_scan():
+    value = get_redis().get(DIRTY_SCAN_KEY)
+    return datetime.fromisoformat(value) if value else None
+
+
+def set_last_dirty_scan(scanned_at: datetime):
+    get_redis().set(DIRTY_SCAN_KEY, scanned_at.isoformat())
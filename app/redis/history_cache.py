@@ -0,0 +1,32 @@
+import json
+from app.core.config import settings
+from app.redis.client import get_redis
+
+# 사용자별 이력 버전. 이력이 바뀌면 INCR 해서 이전 버전의 페이지 캐시를 한 번에 무효화한다
+HISTORY_VERSION_KEY = "history_version:{}"
+HISTORY_PAGE_KEY = "history_page:{}:{}:{}"
+
+
+def get_history_version(user_id: int) -> str:
+    # 조회할 때마다 TTL 을 연장해, 이 버전으로 캐시된 페이지보다 버전 key 가 먼저 만료되지 않도록 한다
+    return get_redis().getex(HISTORY_VERSION_KEY.format(user_id), ex=settings.HISTORY_VERSION_TTL_SECONDS) or "0"
+
+
+def get_history_page(user_id: int, version: str, page_key: str):
+    value = get_redis().get(HISTORY_PAGE_KEY.format(user_id, version, page_key))
+    return json.loads(value) if value else None
+
+
+def set_history_page(user_id: int, version: str, page_key: str, page: dict):
+    get_redis().set(
+        HISTORY_PAGE_KEY.format(user_id, version, page_key),
+        json.dumps(page),
+        ex=settings.HISTORY_CACHE_TTL_SECONDS
+    )
+
+
+def bump_history_version(user_id: int):
+    pipe = get_redis().pipeline()
+    pipe.incr(HISTORY_VERSION_KEY.format(user_id))
+    pipe.expire(HISTORY_VERSION_KEY.format(user_id), settings.HISTORY_VERSION_TTL_SECONDS)
+    pipe.execute()
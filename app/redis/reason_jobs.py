@@ -0,0 +1,19 @@
+import json
+from app.core.config import settings
+from app.redis.client import get_redis
+
+# 백그라운드 reason 생성 작업 상태 ({"status": "pending" | "done" | "failed", "userId", "reason"})
+REASON_JOB_KEY = "reason_job:{}"
+
+
+def get_reason_job(job_id: str):
+    value = get_redis().get(REASON_JOB_KEY.format(job_id))
+    return json.loads(value) if value else None
+
+
+def set_reason_job(job_id: str, user_id: int, status: str, reason=None):
+    get_redis().set(
+        REASON_JOB_KEY.format(job_id),
+        json.dumps({"status": status, "userId": user_id, "reason": reason}),
+        ex=settings.REASON_JOB_TTL_SECONDS
+    )
@@ -0,0 +1,67 @@
+import json
+from app.core.config import settings
+from app.redis.client import get_redis
+
+# 같은 추천 요청을 여러 인스턴스에 걸쳐 한 번만 처리하기 위한 lock / 결과 key
+FLIGHT_LOCK_KEY = "recommend:flight:{}:lock"
+FLIGHT_RESULT_KEY = "recommend:flight:{}:result"
+
+# 최근 결과가 있으면 반환하고, 없으면 lock 획득을 시도. 반환: {lock 획득 여부(1/0), 결과 또는 false}
+ENTER_SCRIPT = """
+local result = redis.call('GET', KEYS[2])
+if result then
+    return {0, result}
+end
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return {1, false}
+end
+return {0, false}
+"""
+
+# 자신이 잡은 lock 만 해제
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_scripts = {}
+
+
+def _script(name: str, source: str):
+    if name not in _scripts:
+        _scripts[name] = get_redis().register_script(source)
+    return _scripts[name]
+
+
+def enter_flight(flight_id: str, token: str):
+    """
+    (리더 여부, 이미 저장된 결과) 반환
+    """
+    leader, result = _script("enter", ENTER_SCRIPT)(
+        keys=[FLIGHT_LOCK_KEY.format(flight_id), FLIGHT_RESULT_KEY.format(flight_id)],
+        args=[token, int(settings.RECOMMEND_COALESCE_LOCK_TTL_SECONDS * 1000)]
+    )
+    return bool(leader), json.loads(result) if result else None
+
+
+def leave_flight(flight_id: str, token: str):
+    _script("release", RELEASE_SCRIPT)(keys=[FLIGHT_LOCK_KEY.format(flight_id)], args=[token])
+
+
+def get_flight_state(flight_id: str):
+    """
+    (저장된 결과, lock 이 아직 잡혀 있는지) 를 한 번의 왕복으로 조회
+    """
+    pipe = get_redis().pipeline()
+    pipe.get(FLIGHT_RESULT_KEY.format(flight_id))
+    pipe.exists(FLIGHT_LOCK_KEY.format(flight_id))
+    result, locked = pipe.execute()
+    return json.loads(result) if result else None, bool(locked)
+
+
+def set_flight_result(flight_id: str, result: dict):
+    get_redis().set(
+        FLIGHT_RESULT_KEY.format(flight_id), json.dumps(result), ex=settings.RECOMMEND_COALESCE_RESULT_TTL_SECONDS
+    )
@@ -1,29 +1,113 @@
-import redis
 from datetime import datetime
+from app.core.config import settings
+from app.redis.client import get_redis
+from app.monitoring.tracing import traced
+
+# 한도 확인 + 예약(INCR) + 잔여 횟수 계산을 한 번의 왕복으로 원자적으로 처리
+# KEYS[1] = usage key, ARGV[1] = 일일 한도, ARGV[2] = TTL(초)
+# 반환: {예약 성공 여부(1/0), 잔여 횟수}
+RESERVE_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if current >= limit then
+    return {0, math.max(limit - current, 0)}
+end
+current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return {1, limit - current}
+"""
+
+# 추천 실패 시 예약한 1회를 반환. 반환: 잔여 횟수
+RELEASE_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if current > 0 then
+    current = redis.call('DECR', KEYS[1])
+end
+return math.max(limit - current, 0)
+"""
+
+USAGE_TTL_SECONDS = 86400
+NEED_TYPES = ["contents", "creator"]
 
-# Redis 컨테이너 도커 서비스 이름 기준 (docker-compose 기준: redis)
-r = redis.Redis(host="redis", port=6379, db=0, decode_responses=True)
 
 def get_usage_key(user_id: int, needs: str) -> str:
     today = datetime.now().date().isoformat()
     return f"usage:{user_id}:{today}:{needs}"
 
-def get_remaining_usage(user_id: int, needs: str, max_per_day: int = 20) -> int:
-    key = get_usage_key(user_id, needs)
-    current = r.get(key)
-    return max_per_day - int(current or 0)
-
-def is_under_limit(user_id: int, needs: str, max_per_day: int = 20) -> bool:
-    return get_remaining_usage(user_id, needs, max_per_day) > 0
-
-def increment_usage(user_id: int, needs: str):
-    key = get_usage_key(user_id, needs)
-    new_count = r.incr(key)
-    if new_count == 1:
-        r.expire(key, 86400)
-
-def get_all_remaining_usage(user_id: int, need_types=["contents", "creator"], max_per_day: int = 20) -> dict:
-    return {
-        need: get_remaining_usage(user_id, need, max_per_day)
-        for need in need_types
-    }
+
+class UsageLimiter:
+    """
+    일일 사용량 제한. client 를 넘기면 해당 Redis 클라이언트(테스트용 로컬 Redis 등)를 사용하고,
+    없으면 공용 커넥션 풀 클라이언트를 사용한다.
+    """
+
+    def __init__(self, client=None, max_per_day: int = 20):
+        self._client = client
+        self.max_per_day = max_per_day
+        self._reserve = None
+        self._release = None
+
+    @property
+    def client(self):
+        return self._client or get_redis()
+
+    def _scripts(self):
+        # register_script 는 EVALSHA 로 실행하고, 스크립트가 없으면 EVAL 로 재시도한다
+        if self._reserve is None:
+            self._reserve = self.client.register_script(RESERVE_SCRIPT)
+            self._release = self.client.register_script(RELEASE_SCRIPT)
+        return self._reserve, self._release
+
+    def reserve(self, user_id: int, needs: str) -> tuple[bool, int, str]:
+        """
+        한도 안이면 1회를 예약한다. (예약 성공 여부, 예약 후 잔여 횟수, 예약한 usage key) 반환
+        """
+        reserve, _ = self._scripts()
+        usage_key = get_usage_key(user_id, needs)
+        allowed, remaining = reserve(
+            keys=[usage_key], args=[self.max_per_day, USAGE_TTL_SECONDS], client=self.client
+        )
+        return bool(allowed), int(remaining), usage_key
+
+    def release(self, usage_key: str) -> int:
+        """
+        reserve 로 예약한 1회를 반환하고 잔여 횟수 반환.
+        자정을 넘겨 반환해도 예약한 날짜의 카운터를 줄이도록 reserve 가 돌려준 key 를 그대로 사용한다
+        """
+        _, release = self._scripts()
+        return int(release(keys=[usage_key], args=[self.max_per_day], client=self.client))
+
+    def remaining(self, user_id: int, needs: str) -> int:
+        return self.remaining_all(user_id, [needs])[needs]
+
+    def remaining_all(self, user_id: int, need_types: list = None) -> dict:
+        # MGET 한 번으로 모든 needs 의 사용량 조회
+        need_types = need_types or NEED_TYPES
+        values = self.client.mget([get_usage_key(user_id, need) for need in need_types])
+        return {
+            need: max(self.max_per_day - int(value or 0), 0)
+            for need, value in zip(need_types, values)
+        }
+
+
+limiter = UsageLimiter(max_per_day=settings.USAGE_MAX_PER_DAY)
+
+
+@traced("usage")
+def reserve_usage(user_id: int, needs: str) -> tuple[bool, int, str]:
+    return limiter.reserve(user_id, needs)
+
+
+def release_usage(usage_key: str) -> int:
+    return limiter.release(usage_key)
+
+
+def get_remaining_usage(user_id: int, needs: str) -> int:
+    return limiter.remaining(user_id, needs)
+
+
+def get_all_remaining_usage(user_id: int, need_types: list = None) -> dict:
+    return limiter.remaining_all(user_id, need_types)
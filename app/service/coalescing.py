@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from fastapi.responses import Response
+from app.core.config import settings
+from app.core.executor import run_blocking
+from app.utils.cache import AsyncSingleFlight, TTLCache
+from app.redis.request_coalescing import enter_flight, leave_flight, get_flight_state, set_flight_result
+from app.service.user import handle_recommendation_async
+from app.monitoring.metrics import recommendation_coalesced_total
+from app.monitoring.tracing import annotate
+
+# 같은 프로세스 안에서 진행 중인 추천 요청
+inflight = AsyncSingleFlight()
+# 로컬 모드에서 방금 끝난 추천 응답 (Redis 모드의 결과 key 와 같은 역할)
+recent_results = TTLCache(settings.RECOMMEND_COALESCE_LOCAL_RESULTS_MAX, settings.RECOMMEND_COALESCE_RESULT_TTL_SECONDS)
+
+
+def recommendation_flight_key(user_id: int, needs: str, category: str, latitude: float, longitude: float,
+                              defer_reason: bool = False) -> str:
+    # 좌표는 반올림해 GPS 흔들림 정도의 차이는 같은 요청으로 본다
+    decimals = settings.RECOMMEND_COALESCE_COORD_DECIMALS
+    parts = [
+        user_id,
+        needs.strip().lower(),
+        category.strip().upper(),
+        round(float(latitude), decimals),
+        round(float(longitude), decimals),
+        bool(defer_reason),
+    ]
+    return hashlib.sha1(json.dumps(parts).encode()).hexdigest()
+
+
+def response_to_payload(response: Response) -> dict:
+    return {"status_code": response.status_code, "body": response.body.decode()}
+
+
+def payload_to_response(payload: dict) -> Response:
+    return Response(content=payload["body"], status_code=payload["status_code"], media_type="application/json")
+
+
+async def coalesce_across_instances(key: str, compute):
+    """
+    Redis lock 으로 인스턴스 간 중복 요청을 합친다. lock 을 잡은 인스턴스만 compute 를 실행하고,
+    나머지는 결과 key 가 생길 때까지 기다린다. Redis 장애나 대기 시간 초과 시에는 직접 실행한다.
+    """
+    token = uuid.uuid4().hex
+    try:
+        leader, payload = await run_blocking(enter_flight, key, token)
+    except Exception as e:
+        print("추천 요청 병합 lock 실패:", e)
+        return await compute()
+
+    if payload is not None:
+        recommendation_coalesced_total.labels(source="redis").inc()
+        annotate(coalesced="redis")
+        return payload_to_response(payload)
+
+    if leader:
+        try:
+            response = await compute()
+            if response.status_code == 200:
+                await run_blocking(set_flight_result, key, response_to_payload(response))
+            return response
+        finally:
+            try:
+                await run_blocking(leave_flight, key, token)
+            except Exception as e:
+                print("추천 요청 병합 lock 해제 실패:", e)
+
+    deadline = time.monotonic() + settings.RECOMMEND_COALESCE_LOCK_TTL_SECONDS
+    try:
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.RECOMMEND_COALESCE_POLL_INTERVAL_SECONDS)
+            payload, locked = await run_blocking(get_flight_state, key)
+            if payload is not None:
+                recommendation_coalesced_total.labels(source="redis").inc()
+                annotate(coalesced="redis")
+                return payload_to_response(payload)
+            # 리더가 결과 없이 끝났으면(실패/한도 초과 등) 직접 처리
+            if not locked:
+                break
+    except Exception as e:
+        print("추천 요청 병합 결과 조회 실패:", e)
+    return await compute()
+
+
+async def coalesce_recommendation(key: str, compute):
+    if not settings.RECOMMEND_COALESCE_ENABLED:
+        return await compute()
+
+    if not settings.RECOMMEND_COALESCE_REDIS:
+        # 리더가 끝난 직후에 들어온 중복 요청도 결과 TTL 동안은 같은 응답을 받는다
+        payload = recent_results.get(key)
+        if payload is not None:
+            recommendation_coalesced_total.labels(source="local").inc()
+            annotate(coalesced="local")
+            return payload_to_response(payload)
+
+    async def run():
+        if settings.RECOMMEND_COALESCE_REDIS:
+            return await coalesce_across_instances(key, compute)
+        response = await compute()
+        if response.status_code == 200:
+            recent_results.set(key, response_to_payload(response))
+        return response
+
+    response, shared = await inflight.do(key, run)
+    if shared:
+        recommendation_coalesced_total.labels(source="local").inc()
+        annotate(coalesced="local")
+    return response
+
+
+async def handle_recommendation_coalesced(user: dict, needs: str, category: str, latitude: float, longitude: float,
+                                          defer_reason: bool = False):
+    """
+    handle_recommendation_async 앞단에서 같은 사용자의 중복 요청(연타, 재시도)을 하나로 합친다.
+    합쳐진 요청은 사용량을 추가로 차감하지 않고 먼저 들어온 요청의 응답을 그대로 받는다.
+    """
+    key = recommendation_flight_key(user["userId"], needs, category, latitude, longitude, defer_reason)
+    return await coalesce_recommendation(
+        key, lambda: handle_recommendation_async(user, needs, category, latitude, longitude, defer_reason)
+    )
@@ -0,0 +1,95 @@
+import base64
+import json
+from datetime import datetime
+from app.core.config import settings
+from app.database.postgres import get_recommendations_by_user
+from app.redis.history_cache import get_history_version, get_history_page, set_history_page, bump_history_version
+from app.monitoring.metrics import history_cache_requests_total
+
+
+def encode_history_cursor(item: dict) -> str:
+    raw = json.dumps([item["createdAt"], item["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> tuple:
+    """
+    커서 → (created_at, id). 형식이 잘못되면 ValueError
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, history_id = json.loads(raw)
+        datetime.fromisoformat(created_at)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(history_id, int):
+        raise ValueError("Invalid cursor")
+    return created_at, history_id
+
+
+def clamp_history_limit(limit: int = None) -> int:
+    return max(1, min(limit or settings.HISTORY_PAGE_SIZE, settings.HISTORY_MAX_PAGE_SIZE))
+
+
+def resume_cursor(items: list, kept: int):
+    """
+    DB 이력 items 중 앞의 kept 개만 응답했을 때 나머지부터 이어 읽는 커서
+    """
+    if kept > 0:
+        return encode_history_cursor(items[kept - 1])
+    if items:
+        # 첫 항목부터 다시 읽도록 created_at 이 같고 id 만 하나 큰 위치를 가리킨다
+        return encode_history_cursor({"createdAt": items[0]["createdAt"], "id": items[0]["id"] + 1})
+    return None
+
+
+def fetch_history_page(user_id: int, cursor: str, limit: int, compact: bool) -> dict:
+    # 한 개 더 읽어서 다음 페이지 존재 여부 확인
+    before = decode_history_cursor(cursor) if cursor else None
+    items = get_recommendations_by_user(user_id, limit + 1, before, compact)
+    next_cursor = encode_history_cursor(items[limit - 1]) if len(items) > limit else None
+    return {"history": items[:limit], "nextCursor": next_cursor}
+
+
+def load_history_page(user_id: int, cursor: str = None, limit: int = None, compact: bool = False) -> dict:
+    """
+    {"history": [...], "nextCursor": str | None}. 잘못된 커서면 ValueError.
+    사용자 이력 버전별로 페이지를 캐시하고, Redis 장애 시에는 DB 에서 바로 읽는다
+    """
+    limit = clamp_history_limit(limit)
+    if not settings.HISTORY_CACHE_ENABLED:
+        return fetch_history_page(user_id, cursor, limit, compact)
+
+    page_key = f"{limit}:{int(compact)}:{cursor or ''}"
+    try:
+        # 버전을 먼저 읽어야 DB 조회 도중 저장된 이력이 이전 버전 캐시로만 남는다
+        version = get_history_version(user_id)
+        page = get_history_page(user_id, version, page_key)
+    except Exception as e:
+        print("추천 이력 캐시 조회 실패:", e)
+        history_cache_requests_total.labels(result="error").inc()
+        return fetch_history_page(user_id, cursor, limit, compact)
+
+    if page is not None:
+        history_cache_requests_total.labels(result="hit").inc()
+        return page
+
+    history_cache_requests_total.labels(result="miss").inc()
+    page = fetch_history_page(user_id, cursor, limit, compact)
+    try:
+        set_history_page(user_id, version, page_key, page)
+    except Exception as e:
+        print("추천 이력 캐시 저장 실패:", e)
+    return page
+
+
+def invalidate_history(user_id: int):
+    """
+    추천 이력 저장/수정 후 호출. 실패해도 캐시 TTL 이 지나면 반영된다
+    """
+    if not settings.HISTORY_CACHE_ENABLED:
+        return
+    try:
+        bump_history_version(user_id)
+    except Exception as e:
+        print("추천 이력 캐시 무효화 실패:", e)
@@ -0,0 +1,287 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from app.core.config import settings
+from app.database.postgres import (
+    save_recommendation_to_db,
+    reserve_recommendation_ids,
+    save_recommendations_to_db,
+    update_recommendation_reason,
+)
+from app.service.history import invalidate_history
+from app.monitoring.metrics import (
+    history_write_queue_depth,
+    history_flush_duration_seconds,
+    history_flush_batch_size,
+    history_records_written_total,
+    history_records_dropped_total,
+)
+
+
+class HistoryRecord:
+    """
+    저장 요청된 추천 이력 한 건. pending → flushing → written 또는 dropped.
+    history_id 는 INSERT 전에 시퀀스에서 받아 채운다 (written 전에도 값이 있을 수 있음)
+    """
+
+    def __init__(self, data: dict):
+        self.data = data
+        # DB 의 created_at 과 같은 UTC 기준
+        self.created_at = datetime.utcnow().isoformat()
+        self.enqueued_at = time.monotonic()
+        self.history_id = None
+        self.state = "pending"
+        self.attempts = 0
+        self.done = threading.Event()
+
+    @property
+    def user_id(self) -> int:
+        return self.data["user_id"]
+
+
+class HistoryWriter:
+    """
+    추천 이력 write-behind 버퍼.
+
+    요청은 메모리 버퍼에 넣고 바로 반환하고, 백그라운드 스레드가 batch_size 개가 모이거나
+    가장 오래된 레코드가 flush_interval 만큼 기다리면 multi-row INSERT 로 저장한다.
+    배치 INSERT 가 실패하면 한 건씩 다시 저장하고, 실패한 레코드만 max_retries 번까지 다시 시도한 뒤 버린다. 버퍼가 가득 차거나 비활성화면 요청 스레드에서 바로 저장한다.
+    아직 저장되지 않은 레코드는 pending_for_user 로 조회해 이력 응답에 합친다 (같은 인스턴스 기준 read-your-writes).
+    """
+
+    def __init__(self, enabled: bool, batch_size: int, flush_interval: float, max_buffered: int, max_retries: int):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.max_retries = max_retries
+        self._pending = deque()
+        self._by_user = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closing = False
+
+    def start(self):
+        with self._cond:
+            if self._thread is None and not self._closing:
+                self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+                self._thread.start()
+
+    def save(self, data: dict) -> HistoryRecord:
+        record = HistoryRecord(data)
+        if self.enabled:
+            self.start()
+            with self._cond:
+                if not self._closing and len(self._pending) < self.max_buffered:
+                    self._pending.append(record)
+                    self._by_user.setdefault(record.user_id, []).append(record)
+                    history_write_queue_depth.set(len(self._pending))
+                    self._cond.notify()
+                    return record
+
+        record.history_id = save_recommendation_to_db(data)
+        record.state = "written"
+        record.done.set()
+        history_records_written_total.labels(mode="inline").inc()
+        invalidate_history(record.user_id)
+        return record
+
+    def update_reason(self, record: HistoryRecord, reason, timeout: float = None):
+        """
+        아직 버퍼에 있으면 INSERT 될 값만 바꾸고, 이미 저장 중/저장됐으면 끝나길 기다렸다가 UPDATE
+        """
+        with self._cond:
+            if record.state == "pending":
+                record.data["reason"] = reason
+                return
+
+        if not record.done.wait(settings.HISTORY_REASON_WAIT_SECONDS if timeout is None else timeout):
+            print(f"추천 이력 reason 갱신 생략 (저장 대기 시간 초과): user={record.user_id}")
+            return
+        if record.state != "written":
+            return
+        update_recommendation_reason(record.history_id, reason)
+        invalidate_history(record.user_id)
+
+    def pending_for_user(self, user_id: int) -> list:
+        """
+        아직 DB 조회에 반영되지 않았을 수 있는 이 사용자의 레코드 (최신순)
+        """
+        with self._cond:
+            return list(reversed(self._by_user.get(user_id, [])))
+
+    def _ready(self) -> bool:
+        if not self._pending:
+            return False
+        if self._closing or len(self._pending) >= self.batch_size:
+            return True
+        return time.monotonic() - self._pending[0].enqueued_at >= self.flush_interval
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._ready():
+                    if self._closing and not self._pending:
+                        return
+                    wait = self.flush_interval - (time.monotonic() - self._pending[0].enqueued_at) if self._pending else None
+                    self._cond.wait(wait)
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                for record in batch:
+                    record.state = "flushing"
+                history_write_queue_depth.set(len(self._pending))
+
+            if not self._flush(batch) and not self._closing:
+                # DB 장애 중에 재시도가 몰리지 않도록 잠시 쉰다
+                time.sleep(self.flush_interval)
+
+    def _flush(self, batch: list) -> bool:
+        started = time.perf_counter()
+        try:
+            self._reserve_ids(batch)
+            save_recommendations_to_db([record.data for record in batch], [record.history_id for record in batch])
+            written, failed = batch, []
+        except Exception as e:
+            print(f"❌ 추천 이력 {len(batch)}건 저장 실패: {e}")
+            if len(batch) > 1 and all(record.history_id is not None for record in batch):
+                written, failed = self._flush_each(batch)
+            else:
+                written, failed = [], batch
+
+        if written:
+            history_flush_duration_seconds.observe(time.perf_counter() - started)
+            history_flush_batch_size.observe(len(written))
+            history_records_written_total.labels(mode="batch").inc(len(written))
+            self._mark_written(written)
+        if failed:
+            self._retry_or_drop(failed)
+        return not failed
+
+    def _reserve_ids(self, batch: list):
+        # INSERT 전에 id 를 정해 두어야 커밋 직후의 조회에서도 DB 행과 버퍼 레코드가 같은 id 로 중복 제외된다
+        missing = [record for record in batch if record.history_id is None]
+        if not missing:
+            return
+        ids = reserve_recommendation_ids(len(missing))
+        with self._cond:
+            for record, history_id in zip(missing, ids):
+                record.history_id = history_id
+
+    def _flush_each(self, batch: list) -> tuple:
+        """
+        배치 실패 시 한 건씩 저장해, 문제가 있는 레코드(FK 위반 등) 때문에 나머지가 재시도/폐기되지 않도록 한다
+        """
+        written, failed = [], []
+        for record in batch:
+            try:
+                save_recommendations_to_db([record.data], [record.history_id])
+                written.append(record)
+            except Exception as e:
+                print(f"❌ 추천 이력 저장 실패: id={record.history_id}, user={record.user_id}: {e}")
+                failed.append(record)
+        return written, failed
+
+    def _mark_written(self, records: list):
+        with self._cond:
+            for record in records:
+                record.state = "written"
+        # 캐시를 무효화한 뒤에 pending 목록에서 빼야 그 사이 조회가 이전 캐시만 보고 레코드를 놓치지 않는다
+        for user_id in {record.user_id for record in records}:
+            invalidate_history(user_id)
+        with self._cond:
+            for record in records:
+                self._forget(record)
+        for record in records:
+            record.done.set()
+
+    def _retry_or_drop(self, batch: list):
+        with self._cond:
+            retry = []
+            for record in batch:
+                record.attempts += 1
+                if record.attempts < self.max_retries:
+                    record.state = "pending"
+                    retry.append(record)
+                else:
+                    self._drop(record, "flush_failed")
+            # 원래 순서를 유지하도록 앞쪽에 다시 넣는다
+            self._pending.extendleft(reversed(retry))
+            history_write_queue_depth.set(len(self._pending))
+
+    def _drop(self, record: HistoryRecord, reason: str):
+        record.state = "dropped"
+        self._forget(record)
+        record.done.set()
+        history_records_dropped_total.labels(reason=reason).inc()
+
+    def _forget(self, record: HistoryRecord):
+        records = self._by_user.get(record.user_id)
+        if records and record in records:
+            records.remove(record)
+            if not records:
+                del self._by_user[record.user_id]
+
+    def close(self, timeout: float):
+        """
+        새 레코드는 바로 저장하도록 막고, 버퍼에 남은 레코드를 timeout 까지 flush 한다
+        """
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+        with self._cond:
+            remaining = list(self._pending)
+            self._pending.clear()
+            for record in remaining:
+                self._drop(record, "shutdown")
+            history_write_queue_depth.set(0)
+        if remaining:
+            print(f"❌ 종료 시 저장하지 못한 추천 이력 {len(remaining)}건")
+
+
+history_writer = HistoryWriter(
+    settings.HISTORY_WRITE_BEHIND_ENABLED,
+    settings.HISTORY_FLUSH_BATCH_SIZE,
+    settings.HISTORY_FLUSH_INTERVAL_SECONDS,
+    settings.HISTORY_BUFFER_MAX,
+    settings.HISTORY_FLUSH_MAX_RETRIES,
+)
+
+
+def pending_history_items(records: list, exclude_ids: set, compact: bool = False) -> list:
+    """
+    버퍼에 있던 레코드를 이력 응답 항목으로 변환 (DB 조회 결과에 이미 있는 id 는 제외)
+    """
+    from app.database.catalog import get_catalog
+
+    records = [r for r in records if r.state != "dropped" and r.history_id not in exclude_ids]
+    if not records:
+        return []
+
+    catalog = get_catalog()
+    items = []
+    for record in records:
+        data = record.data
+        contents_id = None if isinstance(data.get("contents_id"), dict) else data.get("contents_id")
+        creator_id = None if isinstance(data.get("creator_id"), dict) else data.get("creator_id")
+        content = catalog.contents_by_id.get(contents_id) or {}
+        creator = catalog.creators_by_id.get(creator_id) or {}
+        item = {
+            "id": record.history_id,
+            "needs": data["needs"],
+            "category": data["category"],
+            "contentsId": contents_id,
+            "creatorId": creator_id,
+            "createdAt": record.created_at,
+            "contentsTitle": content.get("title"),
+            "thumbnail": content.get("thumbnail"),
+            "creatorName": creator.get("name"),
+            "pending": record.state != "written"
+        }
+        if not compact:
+            item["reason"] = data["reason"]
+        items.append(item)
+    return items
@@ -0,0 +1,187 @@
+import asyncio
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+from app.core.executor import run_blocking
+from app.redis.reason_jobs import get_reason_job, set_reason_job
+from app.service.history_writer import history_writer, HistoryRecord
+from app.recommender.recommender import generate_target_reason
+from app.monitoring.metrics import reason_jobs_total, reason_queue_depth, reason_job_duration_seconds
+
+
+@dataclass
+class ReasonJob:
+    job_id: str
+    user: dict
+    target: tuple
+    history: HistoryRecord = None
+
+
+def run_reason_job(job: ReasonJob, tracked: bool = True):
+    """
+    reason 생성 → Redis 에 결과 기록 → 추천 이력의 reason 갱신. 생성된 reason (실패 시 None) 반환.
+    tracked=False 면 Redis 작업 상태는 기록하지 않는다 (응답에 reason 을 바로 채우는 경우)
+    """
+    started = time.perf_counter()
+    try:
+        reason = generate_target_reason(job.user, job.target)
+    except Exception as e:
+        print(f"❌ reason 생성 실패 (job={job.job_id}): {e}")
+        reason = None
+    reason_job_duration_seconds.observe(time.perf_counter() - started)
+
+    if not reason:
+        reason_jobs_total.labels(outcome="failed").inc()
+        if tracked:
+            mark_reason_job(job, "failed")
+        return None
+
+    if tracked:
+        mark_reason_job(job, "done", reason)
+    if job.history is not None:
+        try:
+            history_writer.update_reason(job.history, reason)
+        except Exception as e:
+            print(f"❌ 추천 이력 reason 갱신 실패 (job={job.job_id}): {e}")
+    reason_jobs_total.labels(outcome="done").inc()
+    return reason
+
+
+def mark_reason_job(job: ReasonJob, status: str, reason=None):
+    # 상태 기록 실패는 로그만 남긴다 (기록되지 않은 작업은 pending 으로 남았다가 TTL 로 정리)
+    try:
+        set_reason_job(job.job_id, job.user["userId"], status, reason)
+    except Exception as e:
+        print(f"❌ reason 작업 상태 기록 실패 (job={job.job_id}, status={status}): {e}")
+
+
+class ReasonWorkerPool:
+    """
+    고정 개수 워커 스레드 + 크기 제한 큐. 큐가 가득 차면 submit 이 False 를 반환해 호출 측이 직접 처리한다.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        # 처음 호출 시 워커를 띄우고, 이후에는 종료된 워커만 다시 띄운다
+        with self._lock:
+            for i in range(self.workers):
+                thread = self._threads.get(i)
+                if thread is not None and thread.is_alive():
+                    continue
+                thread = threading.Thread(target=self._run, name=f"reason-worker-{i}", daemon=True)
+                thread.start()
+                self._threads[i] = thread
+
+    def submit(self, job: ReasonJob) -> bool:
+        self.start()
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            return False
+        reason_queue_depth.set(self.queue.qsize())
+        return True
+
+    def drain(self, timeout: float):
+        # 종료 시 남은 작업을 timeout 까지만 기다린다 (나머지는 Redis TTL 만료로 정리)
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            reason_queue_depth.set(self.queue.qsize())
+            try:
+                run_reason_job(job)
+            except Exception as e:
+                # 작업 하나가 실패해도 워커 스레드는 계속 돈다
+                print(f"❌ reason 작업 실패 (job={job.job_id}): {e}")
+                reason_jobs_total.labels(outcome="failed").inc()
+                mark_reason_job(job, "failed")
+            finally:
+                self.queue.task_done()
+
+
+reason_pool = ReasonWorkerPool(settings.REASON_WORKERS, settings.REASON_QUEUE_SIZE)
+
+
+def enqueue_reason(user: dict, target: tuple, history: HistoryRecord, recommendation: dict):
+    """
+    reason 생성을 백그라운드 큐에 넣고 응답에 reasonJobId 를 붙인다.
+    큐가 가득 차거나 Redis 에 작업을 기록할 수 없으면 현재 스레드에서 바로 생성해 응답의 reason 을 채운다.
+    이력은 이미 저장됐으므로 여기서 난 오류로 추천 응답을 실패시키지 않는다.
+    """
+    job = ReasonJob(uuid.uuid4().hex, user, target, history)
+    try:
+        set_reason_job(job.job_id, user["userId"], "pending")
+        tracked = True
+    except Exception as e:
+        print(f"❌ reason 작업 등록 실패, 바로 생성 (job={job.job_id}): {e}")
+        tracked = False
+
+    if tracked and reason_pool.submit(job):
+        reason_jobs_total.labels(outcome="queued").inc()
+        recommendation["reasonJobId"] = job.job_id
+        recommendation["reasonStatus"] = "pending"
+        return
+
+    reason_jobs_total.labels(outcome="rejected").inc()
+    reason = run_reason_job(job, tracked)
+    if reason:
+        recommendation["reason"] = reason
+
+
+def reason_job_response(job_id: str, job):
+    return JSONResponse(
+        status_code=200,
+        content={
+            "code": "SUCCESS",
+            "message": "Fetched reason job successfully.",
+            "data": {
+                "jobId": job_id,
+                "status": job["status"],
+                "reason": job["reason"]
+            }
+        }
+    )
+
+
+async def get_user_reason_job(user_id: int, job_id: str, wait: float = 0):
+    """
+    reason 작업 상태 조회. wait > 0 이면 완료되거나 wait 초가 지날 때까지 기다린다 (long-poll)
+    """
+    try:
+        deadline = time.monotonic() + min(max(wait, 0), settings.REASON_POLL_MAX_WAIT_SECONDS)
+        while True:
+            job = await run_blocking(get_reason_job, job_id)
+            if job is None or job["userId"] != user_id:
+                return JSONResponse(
+                    status_code=404,
+                    content={
+                        "code": "NOT_FOUND",
+                        "message": "Reason job not found or expired.",
+                        "data": {}
+                    }
+                )
+            if job["status"] != "pending" or time.monotonic() >= deadline:
+                return reason_job_response(job_id, job)
+            await asyncio.sleep(settings.REASON_POLL_INTERVAL_SECONDS)
+
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={
+                "code": "ERROR",
+                "message": f"Failed to fetch reason job: {str(e)}",
+                "data": {}
+            }
+        )
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import time
+from fastapi.responses import StreamingResponse
+from app.database.catalog import get_catalog
+from app.database.postgres import fetch_user_country
+from app.redis.usage import reserve_usage, release_usage
+from app.llm.bedrock import stream_reason_emotional, stream_creator_reason
+from app.utils.websearch import get_place_insight
+from app.recommender.recommender import find_user_signals, pick_recommendation_async, place_query
+from app.service.user import limit_exceeded_response, apply_request_context, record_recommendation
+from app.core.executor import run_blocking, iterate_blocking
+from app.monitoring.metrics import recommendation_failures_total, recommendation_stream_ttfb_seconds
+from app.monitoring.tracing import stage, annotate
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def pick_event(result: dict) -> dict:
+    recommendation = result["message"]["recommendation"]
+    return {
+        "userId": result["userId"],
+        "contentsId": recommendation["contentsId"],
+        "creatorId": recommendation["creatorId"],
+    }
+
+
+async def stream_target_reason(user, target):
+    """
+    reason 생성 대상의 reason 을 ("reason_delta", 조각) 으로 흘려보내고, 마지막 reason 은 ("reason_result", reason) 으로 전달
+    """
+    kind, item = target
+    if kind == "contents":
+        place_facts, keywords = await run_blocking(get_place_insight, place_query(user, item))
+        events = iterate_blocking(stream_reason_emotional, user, item["title"], item["category"], place_facts, keywords)
+    else:
+        events = iterate_blocking(stream_creator_reason, user, item)
+
+    with stage("llm_reason_stream"):
+        async for event in events:
+            if event["type"] == "delta":
+                yield "reason_delta", {k: v for k, v in event.items() if k != "type"}
+            else:
+                yield "reason_result", event["reason"]
+
+
+async def recommendation_events(user: dict, needs: str, category: str, latitude: float, longitude: float,
+                                remaining_count: int, usage_key: str):
+    """
+    recommendation(선택 결과) → reason_delta(토큰 단위) → reason(최종 reason) → done(잔여 횟수) 순서의 이벤트
+    """
+    settled = False
+    try:
+        user_country, catalog, (user_embedding, similar_user_metadata) = await asyncio.gather(
+            run_blocking(fetch_user_country, user["userId"]),
+            run_blocking(get_catalog),
+            run_blocking(find_user_signals, user["userId"]),
+        )
+        apply_request_context(user, user_country, needs, category, latitude, longitude)
+
+        result, target = await pick_recommendation_async(
+            user, catalog.contents, catalog.locations, catalog.creators, similar_user_metadata, catalog, user_embedding
+        )
+
+        # 고른 아이템(콘텐츠는 최근접 장소 포함)을 reason 보다 먼저 전송
+        yield "recommendation", pick_event(result)
+
+        if target:
+            async for event, data in stream_target_reason(user, target):
+                if event == "reason_result":
+                    if data:
+                        result["message"]["recommendation"]["reason"] = data
+                else:
+                    yield event, data
+
+        recommendation = result["message"]["recommendation"]
+        yield "reason", {"userId": user["userId"], "reason": recommendation["reason"]}
+
+        history = await run_blocking(record_recommendation, user, needs, category, result)
+        settled = True
+        if history is None:
+            remaining_count = await run_blocking(release_usage, usage_key)
+        yield "done", {
+            "userId": user["userId"],
+            "recommendation": recommendation,
+            "remaining": {
+                needs: remaining_count
+            }
+        }
+
+    except Exception as e:
+        recommendation_failures_total.inc()
+        if not settled:
+            settled = True
+            await run_blocking(release_usage, usage_key)
+        yield "error", {
+            "code": "ERROR",
+            "message": f"An error occurred while processing the recommendation.: {str(e)}",
+        }
+
+    finally:
+        # 클라이언트가 중간에 연결을 끊으면 예약한 사용량을 돌려준다
+        if not settled:
+            await run_blocking(release_usage, usage_key)
+
+
+async def stream_recommendation_events(user: dict, needs: str, category: str, latitude: float, longitude: float,
+                                       remaining_count: int, usage_key: str, started: float):
+    first = True
+    async for event, data in recommendation_events(
+        user, needs, category, latitude, longitude, remaining_count, usage_key
+    ):
+        chunk = sse_event(event, data)
+        if first:
+            recommendation_stream_ttfb_seconds.labels(needs=needs).observe(time.perf_counter() - started)
+            first = False
+        yield chunk
+
+
+async def handle_recommendation_stream(user: dict, needs: str, category: str, latitude: float, longitude: float):
+    """
+    handle_recommendation_async 의 SSE 버전. 한도 초과는 스트림을 열지 않고 429 JSON 으로 응답
+    """
+    started = time.perf_counter()
+    annotate(userId=user["userId"], stream=True)
+    reserved, remaining_count, usage_key = await run_blocking(reserve_usage, user["userId"], needs)
+    if not reserved:
+        return limit_exceeded_response(user, needs)
+
+    return StreamingResponse(
+        stream_recommendation_events(user, needs, category, latitude, longitude, remaining_count, usage_key, started),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
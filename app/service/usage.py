@@ -1,17 +1,40 @@
 from fastapi.responses import JSONResponse
-from app.database.postgres import get_recommendations_by_user
+from app.service.history import load_history_page, clamp_history_limit, resume_cursor
+from app.service.history_writer import history_writer, pending_history_items
 from app.redis.usage import get_all_remaining_usage
 
 
-def get_user_recommendation_history(user_id: int):
+def get_user_recommendation_history(user_id: int, cursor: str = None, limit: int = None, compact: bool = False):
     try:
-        history = get_recommendations_by_user(user_id)
+        # 아직 flush 되지 않은 이력은 첫 페이지 앞에 붙인다 (DB 조회 전에 확보해야 중간에 flush 돼도 빠지지 않음)
+        pending = history_writer.pending_for_user(user_id) if not cursor else []
+        limit = clamp_history_limit(limit)
+        page = load_history_page(user_id, cursor, limit, compact)
+        if pending:
+            exclude_ids = {item["id"] for item in page["history"]}
+            pending_items = pending_history_items(pending, exclude_ids, compact)
+            history = pending_items + page["history"]
+            if len(history) > limit:
+                # 합친 결과도 limit 개까지만 응답하고, 잘린 DB 이력부터 다음 페이지로 이어 읽는다
+                kept = max(limit - len(pending_items), 0)
+                page = {"history": history[:limit], "nextCursor": resume_cursor(page["history"], kept)}
+            else:
+                page = {**page, "history": history}
         return JSONResponse(
             status_code=200,
             content={
                 "code": "SUCCESS",
                 "message": "Fetched recommendation history successfully.",
-                "data": history
+                "data": page
+            }
+        )
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "code": "INVALID_CURSOR",
+                "message": str(e),
+                "data": {"history": [], "nextCursor": None}
             }
         )
     except Exception as e:
@@ -20,7 +43,7 @@ def get_user_recommendation_history(user_id: int):
             content={
                 "code": "ERROR",
                 "message": f"Failed to fetch recommendation history: {str(e)}",
-                "data": []
+                "data": {"history": [], "nextCursor": None}
             }
         )
 
@@ -1,113 +1,189 @@
+import asyncio
 from fastapi.responses import JSONResponse
-from app.database.postgres import (
-    load_documents_from_postgres,
-    save_recommendation_to_db,
+from app.service.history_writer import history_writer
+from app.database.catalog import get_catalog
+from app.redis.usage import reserve_usage, release_usage
+from app.recommender.recommender import (
+    generate_recommendation,
+    generate_recommendation_async,
+    pick_recommendation_async,
+    find_user_signals,
 )
-from app.redis.usage import (
-    is_under_limit,
-    increment_usage,
-    get_remaining_usage,
-)
-from app.recommender.recommender import generate_recommendation
+from app.service.reason_jobs import enqueue_reason
 from prometheus_client import Counter
 from app.database.postgres import fetch_user_country
 from app.monitoring.metrics import recommendation_failures_total
+from app.core.executor import run_blocking
+from app.monitoring.tracing import traced, annotate
 
-def handle_recommendation(user: dict, needs: str, category: str, latitude: float, longitude: float):
-    if not is_under_limit(user["userId"], needs):
-        return JSONResponse(
-            status_code=429,
-            content={
-                "code": "TOO_MANY_REQUESTS",
-                "message": f"The daily free trial opportunity for {needs} has been used up.",
-                "data": {
-                    "userId": user["userId"],
-                    "remaining": 0,
-                    "message": {
-                        "recommendation": {
-                            "contentsId": None,
-                            "creatorId": None,
-                            "reason": f"The daily free trial opportunity for {needs} has been used up."
-                        }
+
+def limit_exceeded_response(user: dict, needs: str):
+    return JSONResponse(
+        status_code=429,
+        content={
+            "code": "TOO_MANY_REQUESTS",
+            "message": f"The daily free trial opportunity for {needs} has been used up.",
+            "data": {
+                "userId": user["userId"],
+                "remaining": 0,
+                "message": {
+                    "recommendation": {
+                        "contentsId": None,
+                        "creatorId": None,
+                        "reason": f"The daily free trial opportunity for {needs} has been used up."
                     }
                 }
             }
-        )
+        }
+    )
 
-    try:
-        user_country = fetch_user_country(user["userId"])
-        user.update({
-            "country": user_country,
-            "needs": needs,
-            "category": category,
-            "latitude": latitude,
-            "longitude": longitude
-        })
-
-        contents, locations, creators = load_documents_from_postgres()
-        result = generate_recommendation(user, contents, locations, creators)
-
-        recommendation = result["message"]["recommendation"]
-        success = (
-            (needs == "contents" and recommendation["contentsId"] is not None) or
-            (needs == "creator" and recommendation["creatorId"] is not None)
-        )
 
-        if success:
-            increment_usage(user["userId"], needs)
-
-            save_recommendation_to_db({
-                "user_id": user["userId"],
-                "needs": needs,
-                "category": category,
-                "contents_id": (
-                    recommendation.get("contentsId", {}).get("contentsId")
-                    if isinstance(recommendation.get("contentsId"), dict)
-                    else recommendation.get("contentsId")
-                ),
-                "creator_id": (
-                    recommendation.get("creatorId", {}).get("creatorId")
-                    if isinstance(recommendation.get("creatorId"), dict)
-                    else recommendation.get("creatorId")
-                ),
-                "reason": recommendation.get("reason")
-            })
-        else:
-            recommendation_failures_total.inc()
-
-        remaining_count = get_remaining_usage(user["userId"], needs)
-
-        return JSONResponse(
-            status_code=200,
-            content={
-                "code": "SUCCESS",
-                "message": "Success!",
-                "data": {
-                    **result,
-                    "remaining": {
-                        needs: remaining_count
+def error_response(user: dict, needs: str, usage_key: str, e: Exception):
+    recommendation_failures_total.inc()
+    # 처리 중 실패하면 예약한 사용량을 돌려준다
+    remaining_count = release_usage(usage_key)
+    return JSONResponse(
+        status_code=500,
+        content={
+            "code": "ERROR",
+            "message": f"An error occurred while processing the recommendation.: {str(e)}",
+            "data": {
+                "userId": user["userId"],
+                "remaining": remaining_count,
+                "message": {
+                    "recommendation": {
+                        "contentsId": None,
+                        "creatorId": None,
+                        "reason": f"Server error: {str(e)}"
                     }
                 }
             }
-        )
+        }
+    )
 
-    except Exception as e:
+
+def apply_request_context(user: dict, user_country, needs: str, category: str, latitude: float, longitude: float):
+    user.update({
+        "country": user_country,
+        "needs": needs,
+        "category": category,
+        "latitude": latitude,
+        "longitude": longitude
+    })
+
+
+@traced("record")
+def record_recommendation(user: dict, needs: str, category: str, result: dict):
+    """
+    성공한 추천이면 이력을 write-behind 버퍼에 넣고 HistoryRecord 반환, 실패면 실패 metric 증가 후 None 반환
+    (사용량은 요청 시작 시 reserve_usage 로 이미 차감됨)
+    """
+    recommendation = result["message"]["recommendation"]
+    success = (
+        (needs == "contents" and recommendation["contentsId"] is not None) or
+        (needs == "creator" and recommendation["creatorId"] is not None)
+    )
+
+    if not success:
         recommendation_failures_total.inc()
-        return JSONResponse(
-            status_code=500,
-            content={
-                "code": "ERROR",
-                "message": f"An error occurred while processing the recommendation.: {str(e)}",
-                "data": {
-                    "userId": user["userId"],
-                    "remaining": get_remaining_usage(user["userId"], needs),
-                    "message": {
-                        "recommendation": {
-                            "contentsId": None,
-                            "creatorId": None,
-                            "reason": f"Server error: {str(e)}"
-                        }
-                    }
+        return None
+
+    return history_writer.save({
+        "user_id": user["userId"],
+        "needs": needs,
+        "category": category,
+        "contents_id": (
+            recommendation.get("contentsId", {}).get("contentsId")
+            if isinstance(recommendation.get("contentsId"), dict)
+            else recommendation.get("contentsId")
+        ),
+        "creator_id": (
+            recommendation.get("creatorId", {}).get("creatorId")
+            if isinstance(recommendation.get("creatorId"), dict)
+            else recommendation.get("creatorId")
+        ),
+        "reason": recommendation.get("reason")
+    })
+
+
+def complete_recommendation(user: dict, needs: str, category: str, result: dict, remaining_count: int,
+                            usage_key: str, reason_target=None):
+    history = record_recommendation(user, needs, category, result)
+
+    if history is None:
+        # 실패한 추천은 예약한 사용량을 돌려준다
+        remaining_count = release_usage(usage_key)
+    elif reason_target:
+        # 2단계 모드: 저장된 이력에 대해 reason 을 백그라운드에서 생성
+        enqueue_reason(user, reason_target, history, result["message"]["recommendation"])
+
+    return JSONResponse(
+        status_code=200,
+        content={
+            "code": "SUCCESS",
+            "message": "Success!",
+            "data": {
+                **result,
+                "remaining": {
+                    needs: remaining_count
                 }
             }
+        }
+    )
+
+
+def handle_recommendation(user: dict, needs: str, category: str, latitude: float, longitude: float):
+    annotate(userId=user["userId"])
+    reserved, remaining_count, usage_key = reserve_usage(user["userId"], needs)
+    if not reserved:
+        return limit_exceeded_response(user, needs)
+
+    try:
+        user_country = fetch_user_country(user["userId"])
+        apply_request_context(user, user_country, needs, category, latitude, longitude)
+
+        catalog = get_catalog()
+        result = generate_recommendation(
+            user, catalog.contents, catalog.locations, catalog.creators, catalog=catalog
         )
+        return complete_recommendation(user, needs, category, result, remaining_count, usage_key)
+
+    except Exception as e:
+        return error_response(user, needs, usage_key, e)
+
+
+async def handle_recommendation_async(user: dict, needs: str, category: str, latitude: float, longitude: float,
+                                      defer_reason: bool = False):
+    """
+    handle_recommendation 의 asyncio 버전.
+    국가 조회 / 카탈로그 / 유사 사용자 검색을 동시에 실행해 지연 시간을 임계 경로 수준으로 줄인다.
+    defer_reason=True 이면 아이템만 고른 뒤 바로 응답하고 reason 은 백그라운드에서 생성 (reasonJobId 로 조회)
+    """
+    annotate(userId=user["userId"], deferReason=defer_reason)
+    reserved, remaining_count, usage_key = await run_blocking(reserve_usage, user["userId"], needs)
+    if not reserved:
+        return limit_exceeded_response(user, needs)
+
+    try:
+        user_country, catalog, (user_embedding, similar_user_metadata) = await asyncio.gather(
+            run_blocking(fetch_user_country, user["userId"]),
+            run_blocking(get_catalog),
+            run_blocking(find_user_signals, user["userId"]),
+        )
+        apply_request_context(user, user_country, needs, category, latitude, longitude)
+
+        if defer_reason:
+            result, reason_target = await pick_recommendation_async(
+                user, catalog.contents, catalog.locations, catalog.creators, similar_user_metadata, catalog, user_embedding
+            )
+            return await run_blocking(
+                complete_recommendation, user, needs, category, result, remaining_count, usage_key, reason_target
+            )
+
+        result = await generate_recommendation_async(
+            user, catalog.contents, catalog.locations, catalog.creators, similar_user_metadata, catalog, user_embedding
+        )
+        return await run_blocking(complete_recommendation, user, needs, category, result, remaining_count, usage_key)
+
+    except Exception as e:
+        return await run_blocking(error_response, user, needs, usage_key, e)
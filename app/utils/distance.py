@@ -11,3 +11,17 @@ def calculate_distance(lat1, lon1, lat2, lon2):
 
     a = math.sin(dphi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda/2)**2
     return R * (2 * math.atan2(math.sqrt(a), math.sqrt(1 - a)))
+
+def calculate_distances(lat, lon, lats, lons):
+    """
+    calculate_distance 의 NumPy 벡터화 버전 (배열 입력, 브로드캐스팅 지원, km 배열 반환)
+    """
+    import numpy as np
+
+    R = 6371  # 지구 반지름 (km)
+    phi1, phi2 = np.radians(lat), np.radians(lats)
+    dphi = np.radians(np.subtract(lats, lat))
+    dlambda = np.radians(np.subtract(lons, lon))
+
+    a = np.sin(dphi/2)**2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda/2)**2
+    return R * (2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)))
@@ -0,0 +1,119 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from app.core.config import settings
+from app.monitoring.metrics import hedges_fired_total, hedges_won_total, hedges_suppressed_total, hedge_delay_seconds
+
+# hedge 대상 호출(원 요청 + 중복 요청)을 실행하는 전용 스레드 풀
+hedge_executor = ThreadPoolExecutor(max_workers=settings.HEDGE_WORKERS, thread_name_prefix="hedge")
+
+
+class LatencyWindow:
+    """
+    최근 N개 호출 지연 시간으로 분위수를 계산
+    """
+
+    def __init__(self, size: int):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int):
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class Hedger:
+    """
+    지연 시간 꼬리를 줄이는 hedged request.
+
+    원 요청이 delay(최근 지연 시간의 quantile 분위수) 안에 끝나지 않으면 같은 요청을 한 번 더 보내고
+    먼저 성공한 응답을 사용한다 (늦은 쪽 결과는 버림). hedge 는 호출마다 max_rate 만큼 쌓이는 예산 안에서만
+    보내므로 전체 호출 대비 hedge 비율이 max_rate 를 넘지 않는다.
+    """
+
+    def __init__(self, name: str, default_delay: float, quantile: float = 0.9, max_rate: float = 0.1,
+                 window: int = 200, min_samples: int = 20, min_delay: float = 0.05, burst: float = 5.0):
+        self.name = name
+        self.default_delay = default_delay
+        self.quantile = quantile
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.burst = burst
+        self.latencies = LatencyWindow(window)
+        self._budget = 0.0
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        observed = self.latencies.quantile(self.quantile, self.min_samples)
+        delay = max(observed if observed is not None else self.default_delay, self.min_delay)
+        hedge_delay_seconds.labels(call=self.name).set(delay)
+        return delay
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self._budget >= 1.0:
+                self._budget -= 1.0
+                return True
+            return False
+
+    def _add_budget(self):
+        with self._lock:
+            self._budget = min(self._budget + self.max_rate, self.burst)
+
+    def _submit(self, func, args, kwargs):
+        started = time.perf_counter()
+        ctx = contextvars.copy_context()
+        future = hedge_executor.submit(ctx.run, func, *args, **kwargs)
+
+        def record(f):
+            if not f.cancelled() and f.exception() is None:
+                self.latencies.record(time.perf_counter() - started)
+
+        future.add_done_callback(record)
+        return future
+
+    def call(self, func, *args, **kwargs):
+        self._add_budget()
+        primary = self._submit(func, args, kwargs)
+
+        done, _ = wait([primary], timeout=self.delay())
+        if done:
+            return primary.result()
+
+        if not self._take_budget():
+            hedges_suppressed_total.labels(call=self.name).inc()
+            return primary.result()
+
+        hedges_fired_total.labels(call=self.name).inc()
+        hedge = self._submit(func, args, kwargs)
+
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        hedges_won_total.labels(call=self.name).inc()
+                    return future.result()
+
+        # 둘 다 실패하면 원 요청의 예외를 그대로 전달
+        return primary.result()
+
+
+def hedged(hedger: Hedger, enabled: bool, func, *args, **kwargs):
+    """
+    enabled 이면 hedger 를 거쳐, 아니면 바로 호출
+    """
+    if not enabled:
+        return func(*args, **kwargs)
+    return hedger.call(func, *args, **kwargs)
@@ -0,0 +1,76 @@
+from collections import defaultdict
+import numpy as np
+from app.utils.distance import calculate_distances
+
+KM_PER_DEGREE_LAT = 111.0
+
+
+class LocationIndex:
+    """
+    카탈로그 장소 공간 인덱스.
+
+    contents_id 별로 좌표 배열을 미리 묶어 두고 벡터화 haversine 으로 최근접/반경 검색을 한다.
+    contents_id 없이 반경 검색할 때는 위도 정렬 배열에서 searchsorted 로 위도 대역만 잘라 계산한다.
+    """
+
+    def __init__(self, locations: list):
+        self.locations = locations
+
+        groups = defaultdict(list)
+        for i, loc in enumerate(locations):
+            groups[loc["contents_id"]].append(i)
+        self.groups = {
+            contents_id: np.asarray(indices, dtype=np.int64)
+            for contents_id, indices in groups.items()
+        }
+
+        self.lats = np.asarray([loc["latitude"] for loc in locations], dtype=np.float64)
+        self.lons = np.asarray([loc["longitude"] for loc in locations], dtype=np.float64)
+        self.lat_order = np.argsort(self.lats)
+        self.sorted_lats = self.lats[self.lat_order]
+
+    def _candidates(self, contents_id):
+        if contents_id is None:
+            return np.arange(len(self.locations))
+        return self.groups.get(contents_id, np.empty(0, dtype=np.int64))
+
+    def nearest(self, contents_id, lat: float, lon: float):
+        candidates = self._candidates(contents_id)
+        if not len(candidates):
+            return None
+        distances = calculate_distances(lat, lon, self.lats[candidates], self.lons[candidates])
+        return self.locations[candidates[int(np.argmin(distances))]]
+
+    def nearest_many(self, contents_id, lats, lons) -> list:
+        """
+        여러 지점(lats, lons 배열)에 대해 각각의 최근접 장소를 반환
+        """
+        candidates = self._candidates(contents_id)
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if not len(candidates):
+            return [None] * len(lats)
+
+        # (지점 수, 후보 수) 거리 행렬
+        distances = calculate_distances(
+            lats[:, None], lons[:, None], self.lats[candidates][None, :], self.lons[candidates][None, :]
+        )
+        return [self.locations[candidates[i]] for i in np.argmin(distances, axis=1)]
+
+    def within_radius(self, lat: float, lon: float, radius_km: float, contents_id=None) -> list:
+        """
+        반경 radius_km 이내 장소를 가까운 순으로 반환
+        """
+        if contents_id is None:
+            delta = radius_km / KM_PER_DEGREE_LAT
+            lo, hi = np.searchsorted(self.sorted_lats, [lat - delta, lat + delta], side="left")
+            candidates = self.lat_order[lo:hi]
+        else:
+            candidates = self._candidates(contents_id)
+        if not len(candidates):
+            return []
+
+        distances = calculate_distances(lat, lon, self.lats[candidates], self.lons[candidates])
+        inside = distances <= radius_km
+        order = np.argsort(distances[inside])
+        return [self.locations[i] for i in candidates[inside][order]]
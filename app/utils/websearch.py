@@ -1,12 +1,90 @@
 from duckduckgo_search import DDGS
-from typing import List
+from typing import List, Tuple
 from collections import Counter
+import hashlib
+import json
 import re
+from app.core.config import settings
+from app.redis.client import get_redis
+from app.utils.cache import TTLCache, SingleFlight
+from app.utils.hedging import Hedger, hedged
+from app.monitoring.metrics import websearch_cache_requests_total, websearch_latency_seconds
+from app.monitoring.tracing import traced
 
-def search_web(query: str, max_results: int = 5) -> List[dict]:
+# 로컬 LRU (1차) → Redis (2차) → DuckDuckGo 순으로 조회
+local_cache = TTLCache(settings.WEB_CACHE_LOCAL_MAXSIZE, settings.WEB_CACHE_TTL_SECONDS)
+inflight = SingleFlight()
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def cached(kind: str, key_text: str, compute):
     """
-    DuckDuckGo 검색을 통해 쿼리에 대한 웹 결과 반환
+    2단계 캐시 조회. 동시에 들어온 같은 key 의 miss 는 한 번만 계산한다
     """
+    key = f"websearch:{kind}:{hashlib.sha1(key_text.encode()).hexdigest()}"
+
+    value = local_cache.get(key)
+    if value is not None:
+        websearch_cache_requests_total.labels(kind=kind, result="local_hit").inc()
+        return value
+
+    def load():
+        value = redis_get(key)
+        if value is not None:
+            websearch_cache_requests_total.labels(kind=kind, result="redis_hit").inc()
+        else:
+            websearch_cache_requests_total.labels(kind=kind, result="miss").inc()
+            value = compute()
+            redis_set(key, value)
+        local_cache.set(key, value)
+        return value
+
+    value, shared = inflight.do(key, load)
+    if shared:
+        websearch_cache_requests_total.labels(kind=kind, result="coalesced").inc()
+    return value
+
+
+def redis_get(key: str):
+    if not settings.WEB_CACHE_REDIS_ENABLED:
+        return None
+    try:
+        raw = get_redis().get(key)
+        return json.loads(raw) if raw else None
+    except Exception as e:
+        # 캐시 장애가 추천 요청을 실패시키지 않도록 miss 로 처리
+        print("웹 검색 캐시 조회 실패:", e)
+        return None
+
+
+def redis_set(key: str, value):
+    if not settings.WEB_CACHE_REDIS_ENABLED:
+        return
+    try:
+        get_redis().set(key, json.dumps(value), ex=settings.WEB_CACHE_TTL_SECONDS)
+    except Exception as e:
+        print("웹 검색 캐시 저장 실패:", e)
+
+
+# 느린 DuckDuckGo 응답은 p90 이후 한 번 더 요청 (HEDGE_WEBSEARCH_ENABLED)
+search_hedger = Hedger(
+    "websearch",
+    default_delay=settings.HEDGE_WEBSEARCH_DEFAULT_DELAY_SECONDS,
+    quantile=settings.HEDGE_QUANTILE,
+    max_rate=settings.HEDGE_MAX_RATE,
+    window=settings.HEDGE_WINDOW,
+)
+
+
+@websearch_latency_seconds.time()
+def search_web_live(query: str, max_results: int = 5) -> List[dict]:
+    return hedged(search_hedger, settings.HEDGE_WEBSEARCH_ENABLED, search_web_once, query, max_results)
+
+
+def search_web_once(query: str, max_results: int = 5) -> List[dict]:
     with DDGS() as ddgs:
         results = ddgs.text(query)
         return [
@@ -14,6 +92,14 @@ def search_web(query: str, max_results: int = 5) -> List[dict]:
             for r in results[:max_results]
         ]
 
+
+def search_web(query: str, max_results: int = 5) -> List[dict]:
+    """
+    DuckDuckGo 검색을 통해 쿼리에 대한 웹 결과 반환
+    """
+    normalized = normalize_query(query)
+    return cached("results", f"{max_results}:{normalized}", lambda: search_web_live(normalized, max_results))
+
 def summarize_place_facts(results: List[dict]) -> str:
     """
     검색 결과를 간단한 리스트 형식으로 요약
@@ -34,3 +120,15 @@ def extract_top_keywords(results: List[dict]) -> List[str]:
     filtered = [w for w in words if w not in stopwords]
     top = Counter(filtered).most_common(3)
     return [w[0] for w in top]
+
+@traced("web_search")
+def get_place_insight(query: str) -> Tuple[str, List[str]]:
+    """
+    검색 후 요약(place_facts)과 키워드를 함께 반환 (결과 캐시)
+    """
+    def compute():
+        web_results = search_web(query)
+        return [summarize_place_facts(web_results), extract_top_keywords(web_results)]
+
+    place_facts, keywords = cached("insight", normalize_query(query), compute)
+    return place_facts, keywords
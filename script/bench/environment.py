@@ -0,0 +1,36 @@
+"""
+벤치마크용 환경 변수. app 모듈을 import 하기 전에 prepare_environment() 를 호출해야 한다
+(settings / Bedrock 클라이언트 / 벡터 저장소 / 임베딩 백엔드가 import 시점에 만들어지기 때문).
+"""
+import os
+import tempfile
+
+BENCH_JWT_SECRET = "bench-secret"
+
+
+def prepare_environment(real_embedding: bool = False) -> str:
+    """
+    외부 서비스 없이 app 을 import 할 수 있도록 기본값을 채운다. 이미 설정된 값은 그대로 둔다.
+    벡터 인덱스용 임시 디렉터리 경로 반환
+    """
+    index_path = tempfile.mkdtemp(prefix="bench-vectors-")
+    defaults = {
+        "DB_NAME": "bench",
+        "DB_USER": "bench",
+        "DB_PASSWORD": "bench",
+        "DB_HOST": "localhost",
+        "DB_PORT": "5432",
+        "JWT_SECRET": BENCH_JWT_SECRET,
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "DEEPL_API_KEY": "bench",
+        "VECTOR_BACKEND": "local",
+        "LOCAL_VECTOR_INDEX_PATH": index_path,
+        "CATALOG_INCREMENTAL": "false",
+        "USAGE_MAX_PER_DAY": "1000000000",
+    }
+    if not real_embedding:
+        defaults["EMBEDDING_BACKEND"] = "hash"
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+    return index_path
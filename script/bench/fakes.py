@@ -0,0 +1,376 @@
+"""
+외부 백엔드(Bedrock, 벡터 인덱스, DuckDuckGo, DeepL, PostgreSQL)의 인프로세스 대역.
+
+각 대역은 Profile 로 지연 시간 분포(중앙값 + 로그정규 편차)와 오류/throttle 비율을 조절한다.
+install_fakes() 는 app 모듈의 클라이언트/함수를 대역으로 교체하므로, prepare_environment() 이후에 호출한다.
+"""
+import asyncio
+import hashlib
+import io
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from botocore.exceptions import ClientError
+from script.fake_bedrock import fake_completion
+
+
+@dataclass
+class Profile:
+    latency: float = 0.0
+    sigma: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Profile":
+        """
+        "latency=0.8,sigma=0.4,error=0.01,throttle=0.02" 형식
+        """
+        names = {"latency": "latency", "sigma": "sigma", "error": "error_rate", "throttle": "throttle_rate"}
+        values = {}
+        for part in filter(None, (p.strip() for p in (spec or "").split(","))):
+            key, _, value = part.partition("=")
+            if key not in names:
+                raise ValueError(f"Unknown profile key: {key}")
+            values[names[key]] = float(value)
+        return cls(**values)
+
+    def sample_latency(self) -> float:
+        if self.latency <= 0:
+            return 0.0
+        return self.latency * (random.lognormvariate(0.0, self.sigma) if self.sigma > 0 else 1.0)
+
+    def roll(self):
+        """
+        "throttle" / "error" / None
+        """
+        roll = random.random()
+        if roll < self.throttle_rate:
+            return "throttle"
+        if roll < self.throttle_rate + self.error_rate:
+            return "error"
+        return None
+
+
+DEFAULT_PROFILES = {
+    "bedrock": "latency=0.8,sigma=0.4",
+    "vector": "latency=0.03,sigma=0.3",
+    "ddgs": "latency=0.6,sigma=0.5",
+    "deepl": "latency=0.15,sigma=0.3",
+    "postgres": "latency=0.002,sigma=0.5",
+}
+
+
+def bedrock_error(kind: str, operation: str) -> ClientError:
+    code, status = ("ThrottlingException", 429) if kind == "throttle" else ("ServiceUnavailableException", 503)
+    return ClientError(
+        {"Error": {"Code": code, "Message": "Injected by benchmark"}, "ResponseMetadata": {"HTTPStatusCode": status}},
+        operation,
+    )
+
+
+class FakeBedrockClient:
+    """
+    bedrock-runtime 클라이언트 대역 (invoke_model / invoke_model_with_response_stream)
+    """
+
+    def __init__(self, profile: Profile):
+        self.profile = profile
+
+    def _prompt(self, body: str) -> str:
+        return json.loads(body).get("messages", [{}])[0].get("content", "")
+
+    def invoke_model(self, modelId: str, body: str, **kwargs):
+        outcome = self.profile.roll()
+        time.sleep(self.profile.sample_latency())
+        if outcome:
+            raise bedrock_error(outcome, "InvokeModel")
+        text = fake_completion(self._prompt(body))
+        payload = {"id": "msg_fake", "type": "message", "content": [{"type": "text", "text": text}]}
+        return {"body": io.BytesIO(json.dumps(payload).encode())}
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs):
+        outcome = self.profile.roll()
+        if outcome:
+            time.sleep(self.profile.sample_latency())
+            raise bedrock_error(outcome, "InvokeModelWithResponseStream")
+
+        text = fake_completion(self._prompt(body))
+        pieces = re.findall(r"\S+\s*|\s+", text)
+        total = self.profile.sample_latency()
+
+        def events():
+            for piece in pieces:
+                time.sleep(total / max(len(pieces), 1))
+                delta = {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}}
+                yield {"chunk": {"bytes": json.dumps(delta).encode()}}
+
+        return {"body": events()}
+
+
+class FakeVectorIndex:
+    """
+    벡터 저장소(Pinecone index) 대역. 실제 검색은 LocalVectorStore 에 맡기고 지연/오류만 주입한다
+    """
+
+    def __init__(self, store, profile: Profile):
+        self.store = store
+        self.profile = profile
+
+    def _call(self, method, *args):
+        outcome = self.profile.roll()
+        time.sleep(self.profile.sample_latency())
+        if outcome:
+            raise RuntimeError(f"Injected vector index {outcome}")
+        return method(*args)
+
+    def upsert(self, vectors: list, batch_size: int = 100):
+        # 데이터 적재는 지연 없이
+        return self.store.upsert(vectors, batch_size)
+
+    def query(self, vector: list, top_k: int):
+        return self._call(self.store.query, vector, top_k)
+
+    def fetch(self, ids: list, batch_size: int = 500) -> dict:
+        return self._call(self.store.fetch, ids, batch_size)
+
+    def describe(self) -> dict:
+        return self.store.describe()
+
+
+class FakeDDGS:
+    """
+    duckduckgo_search.DDGS 대역 (with DDGS() as ddgs: ddgs.text(query))
+    """
+
+    profile = Profile()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def text(self, query: str, *args, **kwargs) -> list:
+        outcome = self.profile.roll()
+        time.sleep(self.profile.sample_latency())
+        if outcome:
+            raise RuntimeError(f"Injected web search {outcome}")
+
+        rng = random.Random(hashlib.sha1(query.encode()).hexdigest())
+        words = query.split() or ["travel"]
+        return [
+            {
+                "title": f"{query} guide #{i + 1}",
+                "body": " ".join(rng.choice(words + ["famous", "local", "scenic", "popular", "quiet"]) for _ in range(20)),
+                "href": f"https://example.com/{i + 1}",
+            }
+            for i in range(8)
+        ]
+
+
+def fake_translate(profile: Profile):
+    """
+    app.translate.deepl_service.translate_text 와 같은 시그니처의 비동기 대역
+    """
+    async def translate_text(text: str, target_lang: str = "KO") -> str:
+        outcome = profile.roll()
+        await asyncio.sleep(profile.sample_latency())
+        if outcome:
+            raise RuntimeError(f"Injected DeepL {outcome}")
+        return f"[{target_lang}] {text}"
+
+    return translate_text
+
+
+class FakeDatabase:
+    """
+    추천 서비스가 사용하는 PostgreSQL 조회/저장 함수의 대역 (합성 데이터 기반)
+    """
+
+    def __init__(self, data, profile: Profile):
+        self.data = data
+        self.profile = profile
+        self.contents_by_id = {c["id"]: c for c in data.contents}
+        self.countries = {u["id"]: u["country"] for u in data.users}
+        self.history = {row["id"]: dict(row) for row in data.history}
+        self.next_history_id = max(self.history, default=0) + 1
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        outcome = self.profile.roll()
+        time.sleep(self.profile.sample_latency())
+        if outcome:
+            raise RuntimeError(f"Injected PostgreSQL {outcome}")
+
+    def load_documents(self):
+        contents = [{k: v for k, v in c.items() if k != "creator_id"} for c in self.data.contents]
+        return contents, list(self.data.locations), list(self.data.creators)
+
+    def behavior_rows(self, user_id: int) -> list:
+        rows = []
+        for contents_id in self.data.activity.get(user_id, []):
+            c = self.contents_by_id[contents_id]
+            rows.append((c["id"], c["title"], c["desc"], c["category"], f"creator{c['creator_id']}",
+                         c["creator_id"], c["hashtags"]))
+        return rows
+
+    def fetch_user_behavior_text(self, user_id: int) -> str:
+        from app.behavior.user_behavior import behavior_text_from_rows
+
+        self._wait()
+        return behavior_text_from_rows(self.behavior_rows(user_id))
+
+    def fetch_user_country(self, user_id: int) -> str:
+        self._wait()
+        return self.countries.get(user_id)
+
+    def save_recommendation_to_db(self, data: dict) -> int:
+        self._wait()
+        with self._lock:
+            history_id = self.next_history_id
+            self.next_history_id += 1
+            self._insert_history(history_id, data)
+        return history_id
+
+    def reserve_recommendation_ids(self, count: int) -> list:
+        self._wait()
+        with self._lock:
+            ids = list(range(self.next_history_id, self.next_history_id + count))
+            self.next_history_id += count
+        return ids
+
+    def save_recommendations_to_db(self, records: list, ids: list):
+        self._wait()
+        with self._lock:
+            for history_id, data in zip(ids, records):
+                self._insert_history(history_id, data)
+
+    def _insert_history(self, history_id: int, data: dict):
+        self.history[history_id] = {
+            "id": history_id,
+            "user_id": data["user_id"],
+            "needs": data["needs"],
+            "category": data["category"],
+            "contents_id": data.get("contents_id") if not isinstance(data.get("contents_id"), dict) else None,
+            "creator_id": data.get("creator_id") if not isinstance(data.get("creator_id"), dict) else None,
+            "reason": data["reason"],
+            "created_at": datetime.utcnow().isoformat(),
+        }
+
+    def update_recommendation_reason(self, history_id: int, reason):
+        self._wait()
+        with self._lock:
+            if history_id in self.history:
+                self.history[history_id]["reason"] = reason
+
+    def get_recommendations_by_user(self, user_id: int, limit: int, before: tuple = None,
+                                    compact: bool = False) -> list:
+        self._wait()
+        with self._lock:
+            rows = [row for row in self.history.values() if row["user_id"] == user_id]
+        rows.sort(key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        if before:
+            rows = [row for row in rows if (row["created_at"], row["id"]) < tuple(before)]
+
+        items = []
+        for row in rows[:limit]:
+            content = self.contents_by_id.get(row["contents_id"]) or {}
+            item = {
+                "id": row["id"],
+                "needs": row["needs"],
+                "category": row["category"],
+                "contentsId": row["contents_id"],
+                "creatorId": row["creator_id"],
+                "createdAt": row["created_at"],
+                "contentsTitle": content.get("title"),
+                "thumbnail": content.get("thumbnail"),
+                "creatorName": f"creator{row['creator_id']}" if row["creator_id"] else None,
+            }
+            if not compact:
+                item["reason"] = row["reason"]
+            items.append(item)
+        return items
+
+
+def seed_user_vectors(data, store):
+    """
+    사용자 활동 텍스트를 현재 임베딩 백엔드로 인코딩해 벡터 저장소에 적재
+    """
+    from app.recommender.embedding import get_embeddings
+    from app.behavior.user_behavior import behavior_text_from_rows
+
+    db = FakeDatabase(data, Profile())
+    user_ids = [u["id"] for u in data.users if data.activity.get(u["id"])]
+    texts = [behavior_text_from_rows(db.behavior_rows(user_id)) for user_id in user_ids]
+    now = datetime.utcnow().isoformat()
+
+    vectors = []
+    for user_id, embedding in zip(user_ids, get_embeddings(texts)):
+        rows = db.behavior_rows(user_id)
+        vectors.append((f"user-{user_id}", embedding, {
+            "source": "user_behavior",
+            "preferred_content_ids": [str(row[0]) for row in rows],
+            "preferred_creator_ids": [str(row[5]) for row in rows if row[5]],
+            "last_updated_at": now,
+        }))
+    store.upsert(vectors, 500)
+
+
+def install_fakes(data, profiles: dict, fake_redis: bool = False) -> FakeDatabase:
+    """
+    app 의 외부 백엔드를 대역으로 교체하고 합성 데이터를 적재한다. profiles 는 {백엔드 이름: Profile}.
+
+    Redis 는 기본적으로 REDIS_HOST 의 로컬 Redis 를 그대로 사용한다 (사용량/요청 병합이 Lua 스크립트 기반).
+    fake_redis=True 면 fakeredis(+ lupa) 로 대체한다.
+    """
+    from app.monitoring.tracing import traced
+    import app.llm.bedrock as bedrock
+    import app.database.pinecone_client as pinecone_client
+    import app.utils.websearch as websearch
+    import app.translate.router as translate_router
+    import app.service.translate_service as translate_service
+    import app.database.catalog as catalog
+    import app.service.user as user_service
+    import app.service.history_writer as history_writer
+    import app.service.recommend_stream as recommend_stream
+    import app.service.history as history_service
+    import app.recommender.recommender as recommender
+
+    if fake_redis:
+        import fakeredis
+        import app.redis.client as redis_client
+
+        redis_client.r = fakeredis.FakeRedis(decode_responses=True)
+
+    bedrock.bedrock = FakeBedrockClient(profiles["bedrock"])
+
+    FakeDDGS.profile = profiles["ddgs"]
+    websearch.DDGS = FakeDDGS
+
+    translate = fake_translate(profiles["deepl"])
+    translate_router.translate_text = translate
+    translate_service.translate_text = translate
+
+    db = FakeDatabase(data, profiles["postgres"])
+    catalog.load_documents_from_postgres = db.load_documents
+    history_writer.save_recommendation_to_db = db.save_recommendation_to_db
+    history_writer.reserve_recommendation_ids = db.reserve_recommendation_ids
+    history_writer.save_recommendations_to_db = db.save_recommendations_to_db
+    history_writer.update_recommendation_reason = db.update_recommendation_reason
+    user_service.fetch_user_country = traced("user_country")(db.fetch_user_country)
+    recommend_stream.fetch_user_country = traced("user_country")(db.fetch_user_country)
+    history_service.get_recommendations_by_user = db.get_recommendations_by_user
+    recommender.fetch_user_behavior_text = traced("behavior_query")(db.fetch_user_behavior_text)
+
+    seed_user_vectors(data, pinecone_client.store)
+    pinecone_client.store = FakeVectorIndex(pinecone_client.store, profiles["vector"])
+
+    # 첫 요청에 전체 로드/인덱스 생성 시간이 섞이지 않도록 미리 로드
+    catalog.catalog.refresh(full=True)
+    catalog.catalog.wait_for_index()
+    return db
@@ -0,0 +1,176 @@
+"""
+추천 API 부하 테스트. 엔드포인트별 RPS 와 p50/p95/p99 를 출력한다.
+
+기본은 외부 백엔드를 대역으로 바꾼 app 을 프로세스 안(ASGI)에서 바로 호출한다.
+--url 을 주면 실행 중인 서버를 호출한다 (토큰은 --jwt-secret 또는 JWT_SECRET 으로 서명).
+
+    PYTHONPATH=. python -m script.bench.load --duration 30 --concurrency 32
+    PYTHONPATH=. python -m script.bench.load --bedrock "latency=1.2,sigma=0.5,throttle=0.05" --json report.json
+    PYTHONPATH=. python -m script.bench.load --url http://localhost:8000 --mix recommend=1,usage=1
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections import defaultdict, Counter
+from script.bench import synthetic
+from script.bench.environment import prepare_environment
+from script.bench.fakes import Profile, DEFAULT_PROFILES
+from script.bench.stats import summarize, print_table, write_json
+
+DEFAULT_MIX = "recommend=6,history=3,usage=1"
+ENDPOINTS = ["recommend", "stream", "history", "usage", "translate"]
+
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint: {name} (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def make_token(secret: str, user: dict) -> str:
+    import jwt
+
+    return jwt.encode({"userIdentity": user["id"], "userId": user["name"]}, secret, algorithm="HS256")
+
+
+def recommend_params(rng: random.Random, needs: str = None) -> dict:
+    lat, lon = rng.choice(synthetic.CITIES)
+    return {
+        "needs": needs or rng.choice(synthetic.NEEDS),
+        "category": rng.choice(synthetic.CATEGORIES),
+        "latitude": round(lat + rng.uniform(-0.1, 0.1), 5),
+        "longitude": round(lon + rng.uniform(-0.1, 0.1), 5),
+    }
+
+
+def build_request(name: str, rng: random.Random, args) -> tuple:
+    """
+    (method, path, params, json) 반환
+    """
+    if name == "recommend":
+        params = recommend_params(rng)
+        if args.defer_reason:
+            params["defer_reason"] = "true"
+        return "GET", "/api/v1/users/recommend", params, None
+    if name == "stream":
+        return "GET", "/api/v1/users/recommend/stream", recommend_params(rng), None
+    if name == "history":
+        return "GET", "/api/v1/users/recommend/history", None, None
+    if name == "usage":
+        return "GET", "/api/v1/users/usage", None, None
+    return "POST", "/api/v1/translate", None, {"text": "A quiet harbor at sunset.", "target_lang": "KO"}
+
+
+async def worker(client, tokens: list, mix: dict, args, deadline: float, measure_from: float, results: dict,
+                 statuses: dict, seed: int):
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        method, path, params, body = build_request(name, rng, args)
+        headers = {"Authorization": f"Bearer {rng.choice(tokens)}"}
+
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, params=params, json=body, headers=headers)
+            status = str(response.status_code)
+        except Exception as e:
+            status = type(e).__name__
+        finished = time.perf_counter()
+
+        if started >= measure_from:
+            results[name].append(finished - started)
+            statuses[name][status] += 1
+
+
+async def run_load(client, tokens: list, mix: dict, args) -> dict:
+    results, statuses = defaultdict(list), defaultdict(Counter)
+    started = time.perf_counter()
+    measure_from = started + args.warmup
+    deadline = measure_from + args.duration
+
+    await asyncio.gather(*(
+        worker(client, tokens, mix, args, deadline, measure_from, results, statuses, args.seed + i)
+        for i in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - measure_from
+
+    report = {}
+    for name in mix:
+        summary = summarize(results[name], elapsed)
+        codes = statuses[name]
+        summary["errors"] = sum(count for status, count in codes.items() if not status.startswith("2"))
+        summary["statuses"] = dict(codes)
+        report[name] = summary
+    report["all"] = summarize([s for samples in results.values() for s in samples], elapsed)
+    report["all"]["errors"] = sum(report[name]["errors"] for name in mix)
+    return report
+
+
+def build_client(args, data):
+    import httpx
+
+    timeout = httpx.Timeout(args.timeout)
+    if args.url:
+        return httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=httpx.Limits(max_connections=args.concurrency))
+
+    from script.bench.fakes import install_fakes
+
+    profiles = {name: Profile.parse(getattr(args, name)) for name in DEFAULT_PROFILES}
+    install_fakes(data, profiles, fake_redis=args.fake_redis)
+
+    from app.main import app
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=timeout)
+
+
+async def main(args):
+    data = synthetic.from_arguments(args)
+    if not args.url:
+        prepare_environment(real_embedding=args.real_embedding)
+
+    secret = args.jwt_secret or os.environ.get("JWT_SECRET")
+    if not secret:
+        raise SystemExit("--jwt-secret or JWT_SECRET is required")
+    rng = random.Random(args.seed)
+    users = rng.sample(data.users, min(args.active_users, len(data.users)))
+    tokens = [make_token(secret, user) for user in users]
+    mix = parse_mix(args.mix)
+
+    async with build_client(args, data) as client:
+        print(f"🚀 {args.concurrency} workers, {args.duration}s (+{args.warmup}s warmup), mix={mix}, "
+              f"target={args.url or 'in-process'}")
+        report = await run_load(client, tokens, mix, args)
+
+    print_table("Load test", {name: s for name, s in report.items()},
+                ["count", "rps", "errors", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+    for name in mix:
+        print(f"  {name} statuses: {report[name]['statuses']}")
+    if args.json:
+        write_json(args.json, {"args": vars(args), "results": report})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the recommendation API")
+    parser.add_argument("--url", help="실행 중인 서버 주소 (없으면 대역을 붙인 app 을 프로세스 안에서 호출)")
+    parser.add_argument("--jwt-secret")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"endpoint=weight 목록 ({', '.join(ENDPOINTS)})")
+    parser.add_argument("--active-users", type=int, default=200, help="요청을 보낼 사용자 수")
+    parser.add_argument("--defer-reason", action="store_true")
+    parser.add_argument("--real-embedding", action="store_true", help="hash 대신 EMBEDDING_BACKEND 모델 사용")
+    parser.add_argument("--fake-redis", action="store_true", help="로컬 Redis 대신 fakeredis 사용")
+    parser.add_argument("--json", help="결과를 JSON 으로 저장할 경로")
+    for name, default in DEFAULT_PROFILES.items():
+        parser.add_argument(f"--{name}", default=default, help=f"{name} 대역 프로필 (latency=,sigma=,error=,throttle=)")
+    synthetic.add_scale_arguments(parser)
+    asyncio.run(main(parser.parse_args()))
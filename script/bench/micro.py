@@ -0,0 +1,131 @@
+"""
+핫 경로 micro-benchmark (임베딩, 후보 필터링/정렬, 거리 계산). 호출당 p50/p95/p99 와 ops/s 를 출력한다.
+
+    PYTHONPATH=. python -m script.bench.micro
+    PYTHONPATH=. python -m script.bench.micro --real-embedding --only embedding --json micro.json
+"""
+import argparse
+import random
+import time
+from script.bench import synthetic
+from script.bench.environment import prepare_environment
+from script.bench.stats import summarize, print_table, write_json
+
+GROUPS = ["embedding", "filtering", "distance"]
+
+
+def measure(func, repeat: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    summary = summarize(samples)
+    summary["ops_per_s"] = round(len(samples) / sum(samples), 1) if sum(samples) else 0.0
+    return summary
+
+
+def embedding_cases(data, rng: random.Random) -> dict:
+    from app.recommender.embedding import get_embedding, get_embeddings
+    from app.recommender.item_index import content_text
+
+    texts = [content_text(c) for c in data.contents[:256]]
+    return {
+        "get_embedding": lambda: get_embedding(rng.choice(texts)),
+        "get_embeddings[32]": lambda: get_embeddings(rng.sample(texts, min(32, len(texts)))),
+    }
+
+
+def filtering_cases(data, rng: random.Random) -> dict:
+    from app.database.catalog import build_snapshot
+    from app.recommender.item_index import attach_item_indexes
+    from app.recommender.embedding import get_embedding
+    from app.recommender.recommender import match_contents, match_creators, rank_candidates
+
+    snapshot = attach_item_indexes(build_snapshot(
+        {c["id"]: c for c in data.contents},
+        {(loc["id"], loc["contents_id"]): loc for loc in data.locations},
+        {c["id"]: c for c in data.creators},
+        {},
+        full_loaded_at=time.time(),
+    ))
+
+    def user():
+        return {"category": rng.choice(synthetic.CATEGORIES), "country": rng.choice(synthetic.COUNTRIES)}
+
+    user_embedding = get_embedding("hidden street market at night")
+    similar = [
+        {"preferred_content_ids": [str(i) for i in rng.sample(data.activity[u["id"]], len(data.activity[u["id"]]))]}
+        for u in data.users[:5]
+    ]
+    matched = match_contents({"category": synthetic.CATEGORIES[0]}, snapshot.contents, snapshot)
+
+    return {
+        "match_contents[index]": lambda: match_contents(user(), snapshot.contents, snapshot),
+        "match_contents[scan]": lambda: match_contents(user(), snapshot.contents),
+        "match_creators[index]": lambda: match_creators(user(), snapshot.creators, snapshot),
+        "match_creators[scan]": lambda: match_creators(user(), snapshot.creators),
+        "rank[preference]": lambda: rank_candidates(matched, similar, "preferred_content_ids"),
+        "rank[similarity]": lambda: rank_candidates(
+            matched, similar, "preferred_content_ids", snapshot.content_index, user_embedding
+        ),
+    }
+
+
+def distance_cases(data, rng: random.Random) -> dict:
+    import numpy as np
+    from app.utils.distance import calculate_distance, calculate_distances
+    from app.utils.spatial import LocationIndex
+
+    index = LocationIndex(data.locations)
+    lats = np.asarray([loc["latitude"] for loc in data.locations])
+    lons = np.asarray([loc["longitude"] for loc in data.locations])
+    content_ids = [c["id"] for c in data.contents]
+
+    def point():
+        lat, lon = rng.choice(synthetic.CITIES)
+        return lat + rng.uniform(-0.1, 0.1), lon + rng.uniform(-0.1, 0.1)
+
+    def loop():
+        lat, lon = point()
+        return min(calculate_distance(lat, lon, loc["latitude"], loc["longitude"]) for loc in data.locations)
+
+    return {
+        f"haversine[loop x{len(data.locations)}]": loop,
+        f"haversine[numpy x{len(data.locations)}]": lambda: calculate_distances(*point(), lats, lons).min(),
+        "nearest[contents_id]": lambda: index.nearest(rng.choice(content_ids), *point()),
+        "nearest[all]": lambda: index.nearest(None, *point()),
+        "within_radius[5km]": lambda: index.within_radius(*point(), 5.0),
+    }
+
+
+CASES = {"embedding": embedding_cases, "filtering": filtering_cases, "distance": distance_cases}
+
+
+def main(args):
+    prepare_environment(real_embedding=args.real_embedding)
+    data = synthetic.from_arguments(args)
+    rng = random.Random(args.seed)
+
+    report = {}
+    for group in args.only or GROUPS:
+        cases = CASES[group](data, rng)
+        results = {name: measure(func, args.repeat, args.warmup) for name, func in cases.items()}
+        print_table(group, results, ["count", "ops_per_s", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+        report[group] = results
+
+    if args.json:
+        write_json(args.json, {"args": vars(args), "results": report})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the recommendation hot paths")
+    parser.add_argument("--only", nargs="+", choices=GROUPS)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--real-embedding", action="store_true", help="hash 대신 EMBEDDING_BACKEND 모델 사용")
+    parser.add_argument("--json", help="결과를 JSON 으로 저장할 경로")
+    synthetic.add_scale_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,45 @@
+import json
+
+
+def percentile(ordered: list, q: float) -> float:
+    if not ordered:
+        return 0.0
+    position = q * (len(ordered) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples: list, elapsed: float = None) -> dict:
+    """
+    지연 시간 샘플(초) 요약. elapsed 를 주면 처리량(rps)도 계산
+    """
+    ordered = sorted(samples)
+    summary = {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+    if elapsed:
+        summary["rps"] = round(len(ordered) / elapsed, 2)
+    return summary
+
+
+def print_table(title: str, rows: dict, columns: list):
+    """
+    {이름: summary} 를 표로 출력
+    """
+    print(f"\n{title}")
+    width = max([len(name) for name in rows] + [8])
+    print(f"{'name':<{width}}  " + "  ".join(f"{column:>10}" for column in columns))
+    for name, summary in rows.items():
+        print(f"{name:<{width}}  " + "  ".join(f"{summary.get(column, ''):>10}" for column in columns))
+
+
+def write_json(path: str, report: dict):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n📝 Report written to {path}")
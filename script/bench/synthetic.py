@@ -0,0 +1,162 @@
+"""
+규모를 조절할 수 있는 합성 카탈로그 / 사용자 활동 데이터.
+
+    python -m script.bench.synthetic --contents 5000 --users 20000 --out data/bench.json
+"""
+import argparse
+import json
+import random
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+
+CATEGORIES = ["FOOD", "NATURE", "CULTURE", "ACTIVITY", "SHOPPING", "NIGHTLIFE"]
+COUNTRIES = ["KR", "US", "JP", "FR", "TH", "VN"]
+NEEDS = ["contents", "creator"]
+
+# 장소 좌표를 모을 도시 중심 (위도, 경도)
+CITIES = [
+    (37.5665, 126.9780), (35.1796, 129.0756), (33.4996, 126.5312), (35.6762, 139.6503),
+    (48.8566, 2.3522), (40.7128, -74.0060), (13.7563, 100.5018), (21.0278, 105.8342),
+]
+
+WORDS = [
+    "hidden", "street", "market", "sunset", "harbor", "temple", "garden", "night", "local", "coffee",
+    "noodle", "mountain", "river", "vintage", "gallery", "rooftop", "island", "forest", "festival", "bakery",
+    "alley", "beach", "museum", "trail", "palace", "lantern", "seafood", "craft", "village", "skyline",
+]
+
+
+@dataclass
+class SyntheticData:
+    contents: list = field(default_factory=list)
+    locations: list = field(default_factory=list)
+    creators: list = field(default_factory=list)
+    users: list = field(default_factory=list)
+    # user_id → 시청/좋아요한 contents id 목록
+    activity: dict = field(default_factory=dict)
+    history: list = field(default_factory=list)
+
+    def to_json(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_json(cls, data: dict) -> "SyntheticData":
+        data = dict(data)
+        data["activity"] = {int(user_id): ids for user_id, ids in data.get("activity", {}).items()}
+        return cls(**data)
+
+
+def phrase(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def generate(contents: int = 2000, locations_per_content: int = 3, creators: int = 500, users: int = 1000,
+             activity_per_user: int = 8, history_per_user: int = 5, seed: int = 42) -> SyntheticData:
+    rng = random.Random(seed)
+    data = SyntheticData()
+
+    for user_id in range(1, users + 1):
+        data.users.append({"id": user_id, "name": f"user{user_id}", "country": rng.choice(COUNTRIES)})
+
+    for creator_id in range(1, creators + 1):
+        data.creators.append({
+            "id": creator_id,
+            "name": f"creator{creator_id}",
+            "category": rng.sample(CATEGORIES, rng.randint(1, 3)),
+            "country": rng.choice(COUNTRIES),
+            "youtube": f"https://youtube.com/@creator{creator_id}",
+            "introduction": f"I share {phrase(rng, 4)} stories.",
+        })
+
+    location_id = 0
+    for contents_id in range(1, contents + 1):
+        category = rng.choice(CATEGORIES)
+        data.contents.append({
+            "id": contents_id,
+            "type": "content",
+            "category": category,
+            "thumbnail": f"https://cdn.example.com/thumbnails/{contents_id}.jpg",
+            "title": phrase(rng, 3).title(),
+            "desc": f"A {phrase(rng, 6)} tour.",
+            "hashtags": rng.sample(WORDS, 3),
+            "creator_id": rng.randint(1, creators) if creators else None,
+        })
+
+        city_lat, city_lon = rng.choice(CITIES)
+        for _ in range(locations_per_content):
+            location_id += 1
+            data.locations.append({
+                "id": location_id,
+                "type": "location",
+                "title": f"{phrase(rng, 2).title()} Spot",
+                "desc": f"{rng.randint(1, 300)} {rng.choice(WORDS).title()}-ro",
+                "latitude": city_lat + rng.uniform(-0.1, 0.1),
+                "longitude": city_lon + rng.uniform(-0.1, 0.1),
+                "google_map_id": f"place-{location_id}",
+                "contents_id": contents_id,
+                "category": category,
+            })
+
+    now = datetime.utcnow()
+    history_id = 0
+    for user in data.users:
+        count = min(activity_per_user, contents)
+        data.activity[user["id"]] = rng.sample(range(1, contents + 1), count) if count else []
+        for _ in range(history_per_user):
+            history_id += 1
+            needs = rng.choice(NEEDS)
+            data.history.append({
+                "id": history_id,
+                "user_id": user["id"],
+                "needs": needs,
+                "category": rng.choice(CATEGORIES),
+                "contents_id": rng.randint(1, contents) if needs == "contents" and contents else None,
+                "creator_id": rng.randint(1, creators) if needs == "creator" and creators else None,
+                "reason": {"title": phrase(rng, 3).title(), "lines": [phrase(rng, 8)]},
+                "created_at": (now - timedelta(minutes=rng.randint(1, 60 * 24 * 30))).isoformat(),
+            })
+    return data
+
+
+def load(path: str) -> SyntheticData:
+    with open(path) as f:
+        return SyntheticData.from_json(json.load(f))
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--data", help="generate 대신 미리 만든 JSON 데이터셋 사용")
+    parser.add_argument("--contents", type=int, default=2000)
+    parser.add_argument("--locations-per-content", type=int, default=3)
+    parser.add_argument("--creators", type=int, default=500)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--activity-per-user", type=int, default=8)
+    parser.add_argument("--history-per-user", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+
+
+def from_arguments(args) -> SyntheticData:
+    if args.data:
+        return load(args.data)
+    return generate(
+        contents=args.contents,
+        locations_per_content=args.locations_per_content,
+        creators=args.creators,
+        users=args.users,
+        activity_per_user=args.activity_per_user,
+        history_per_user=args.history_per_user,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic catalog and user-activity dataset")
+    add_scale_arguments(parser)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    dataset = from_arguments(args)
+    with open(args.out, "w") as f:
+        json.dump(dataset.to_json(), f)
+    print(f"🧪 {len(dataset.contents)} contents, {len(dataset.locations)} locations, "
+          f"{len(dataset.creators)} creators, {len(dataset.users)} users, {len(dataset.history)} history rows "
+          f"→ {args.out}")
@@ -0,0 +1,125 @@
+"""
+로컬 fake Bedrock Runtime 엔드포인트 (invoke / invoke-with-response-stream).
+
+지연 시간, throttle / 장애 비율을 조절해 governor 동작과 부하 상황을 재현한다.
+
+    python script/fake_bedrock.py --port 8001 --latency 0.8 --throttle-rate 0.2
+    BEDROCK_ENDPOINT_URL=http://localhost:8001 AWS_ACCESS_KEY_ID=fake AWS_SECRET_ACCESS_KEY=fake uvicorn app.main:app
+"""
+import argparse
+import base64
+import binascii
+import json
+import random
+import re
+import struct
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_completion(prompt: str) -> str:
+    # 추천 선택 프롬프트면 후보 중 하나를, reason 프롬프트면 title/lines JSON 을 돌려준다
+    match = re.search(r"Available (\w+):", prompt)
+    if match:
+        ids = re.findall(r"- ID: (\d+)", prompt)
+        item_id = int(ids[0]) if ids else None
+        return json.dumps({f"{match.group(1)}Id": item_id, "reason": "A fake pick from the local Bedrock stub."})
+    return json.dumps({
+        "title": "A fake reason worth reading",
+        "lines": [
+            "This line comes from the local Bedrock stub.",
+            "It streams token by token like the real model.",
+            "Swap BEDROCK_ENDPOINT_URL back to use Claude.",
+        ]
+    })
+
+
+def event_stream_message(payload: bytes) -> bytes:
+    """
+    application/vnd.amazon.eventstream 메시지 한 개 (chunk 이벤트)
+    """
+    headers = b""
+    for name, value in ((":event-type", "chunk"), (":content-type", "application/json"), (":message-type", "event")):
+        encoded = value.encode()
+        headers += struct.pack("B", len(name)) + name.encode() + b"\x07" + struct.pack(">H", len(encoded)) + encoded
+
+    total_length = 12 + len(headers) + len(payload) + 4
+    prelude = struct.pack(">II", total_length, len(headers))
+    message = prelude + struct.pack(">I", binascii.crc32(prelude)) + headers + payload
+    return message + struct.pack(">I", binascii.crc32(message))
+
+
+def stream_chunk(text: str) -> bytes:
+    delta = {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text}}
+    payload = json.dumps({"bytes": base64.b64encode(json.dumps(delta).encode()).decode()}).encode()
+    return event_stream_message(payload)
+
+
+class FakeBedrockHandler(BaseHTTPRequestHandler):
+    options = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_error_response(self, status: int, error_type: str, message: str):
+        body = json.dumps({"message": message}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("x-amzn-ErrorType", error_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        prompt = request.get("messages", [{}])[0].get("content", "")
+
+        roll = random.random()
+        if roll < self.options.throttle_rate:
+            return self.send_error_response(429, "ThrottlingException", "Too many requests, please wait.")
+        if roll < self.options.throttle_rate + self.options.error_rate:
+            return self.send_error_response(503, "ServiceUnavailableException", "Service unavailable.")
+
+        text = fake_completion(prompt)
+        if self.path.endswith("/invoke-with-response-stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.amazon.eventstream")
+            self.end_headers()
+            pieces = re.findall(r"\S+\s*|\s+", text)
+            for piece in pieces:
+                time.sleep(self.options.latency / max(len(pieces), 1))
+                self.wfile.write(stream_chunk(piece))
+                self.wfile.flush()
+            return
+
+        time.sleep(self.options.latency)
+        body = json.dumps({
+            "id": "msg_fake",
+            "type": "message",
+            "role": "assistant",
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(port: int, latency: float, throttle_rate: float, error_rate: float):
+    FakeBedrockHandler.options = argparse.Namespace(latency=latency, throttle_rate=throttle_rate, error_rate=error_rate)
+    server = ThreadingHTTPServer(("0.0.0.0", port), FakeBedrockHandler)
+    print(f"🧪 Fake Bedrock on :{port} (latency={latency}s, throttle={throttle_rate}, error={error_rate})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake Bedrock Runtime endpoint")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per completion")
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    serve(args.port, args.latency, args.throttle_rate, args.error_rate)